@@ -0,0 +1,255 @@
+"""
+Офлайн-замер скорости разбора и классификации страниц персонажей.
+
+Корпус - сохраненные HTML-страницы fandom (каталог с *.html или кэш
+ответов http_cache после обычного сбора) и/или синтетические страницы
+в разметке fandom, размноженные до нужного числа. Для каждой стадии
+(извлечение infobox, извлечение текста, подсчет ключевых слов с
+классификацией, запись итоговых файлов) печатаются страницы в секунду и
+пиковая память, а при выходе за бюджет из benchmark_budget.json скрипт
+завершается с кодом 1.
+
+Запуск:
+    python benchmark.py --synthetic 2000
+    python benchmark.py --corpus http_cache --synthetic 0
+    python benchmark.py --synthetic 2000 --write-budget
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from classifier import TARGETED_PARSING, NPC_RE, extract_infobox, extract_text, page_features
+from fixture_server import FIXTURE_PAGES, render_page
+from page_parser import parse_character_page
+from rules import classify_features
+from writers import DEFAULT_FORMATS, write_records
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_budget.json')
+STAGES = ['infobox', 'text', 'keywords', 'output']
+STAGE_TITLES = {
+    'infobox': 'Извлечение infobox (с разбором HTML)',
+    'text': 'Извлечение текста',
+    'keywords': 'Ключевые слова и классификация',
+    'output': 'Запись итоговых файлов',
+}
+
+# Запас при --write-budget: бюджет = замер * (1 - SPEED_MARGIN) по скорости,
+# * MEMORY_MARGIN по памяти, но не меньше MIN_MEMORY_BUDGET_MB
+SPEED_MARGIN = 0.5
+MEMORY_MARGIN = 2.0
+MIN_MEMORY_BUDGET_MB = 1.0
+
+# Обрамление реальной страницы fandom: скрипты и стили в head, навигация, подвал
+SYNTHETIC_HEAD = ('<script>window.fandomContext = {"wiki": "eldenring", "boss": "quest"};</script>' * 150 +
+                  '<style>.wds-dropdown{display:none}.page__main{width:100%}</style>' * 60)
+SYNTHETIC_NAV = ''.join(f'<li><a href="/wiki/Nav_{i}">Navigation link {i}</a></li>' for i in range(400))
+SYNTHETIC_WORDS = ('the tarnished travels through the lands between and meets a merchant who sells items '
+                   'this boss has a second phase 2 and attacks with a great sword talk to the npc to start '
+                   'a quest dialogue friendly hostile enemy field boss evergaol remembrance legend ally').split()
+
+
+def synthetic_corpus(count, seed=0):
+    """
+    Синтетические страницы в разметке fandom на основе статей fixture_server.py:
+    случайные абзацы текста и обрамление страницы реального размера
+
+    Yields:
+        tuple: (персонаж {'name', 'url'}, HTML-страница bytes)
+    """
+    rnd = random.Random(seed)
+    titles = list(FIXTURE_PAGES)
+    for i in range(count):
+        title = titles[i % len(titles)]
+        name = f'{title} {i}'
+        paragraphs = '\n'.join(' '.join(rnd.choice(SYNTHETIC_WORDS) for _ in range(rnd.randint(20, 80)))
+                               for _ in range(rnd.randint(5, 30)))
+        wikitext = FIXTURE_PAGES[title] + '== Notes ==\n' + paragraphs + '\n'
+        page = render_page('https://eldenring.fandom.com', name, wikitext)
+        page = page.replace('</head>', SYNTHETIC_HEAD + '</head>', 1)
+        page = page.replace('<body>', f'<body><nav><ul>{SYNTHETIC_NAV}</ul></nav>', 1)
+        page = page.replace('</body>', f'<footer><ul>{SYNTHETIC_NAV}</ul></footer></body>', 1)
+        yield {'name': name, 'url': 'https://eldenring.fandom.com/wiki/' + name.replace(' ', '_')}, page.encode('utf-8')
+
+
+def load_corpus(directory):
+    """
+    Сохраненные страницы: файлы *.html (имя файла - имя персонажа) или
+    кэш ответов (*.body с метаданными *.json), из которого берутся только статьи
+
+    Yields:
+        tuple: (персонаж {'name', 'url'}, HTML-страница bytes)
+    """
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            if filename.endswith('.html'):
+                name = filename[:-len('.html')]
+                char = {'name': name, 'url': 'file://' + os.path.abspath(path)}
+            elif filename.endswith('.body'):
+                try:
+                    with open(path[:-len('.body')] + '.json', 'r', encoding='utf-8') as f:
+                        url = json.load(f)['url']
+                except (OSError, ValueError, KeyError):
+                    continue
+                if '/wiki/' not in url or 'Category:' in url:
+                    continue
+                char = {'name': url.rsplit('/wiki/', 1)[-1].replace('_', ' '), 'url': url}
+            else:
+                continue
+            with open(path, 'rb') as f:
+                yield char, f.read()
+
+
+class StageMeter:
+    """Суммарное время и пиковый прирост памяти (по tracemalloc) для каждой стадии"""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.peak = dict.fromkeys(STAGES, 0)
+        self.pages = dict.fromkeys(STAGES, 0)
+
+    def run(self, stage, func, *args, pages=1):
+        if self.trace_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args)
+        self.seconds[stage] += time.perf_counter() - start
+        if self.trace_memory:
+            self.peak[stage] = max(self.peak[stage], tracemalloc.get_traced_memory()[1] - baseline)
+        self.pages[stage] += pages
+        return result
+
+
+def run_stages(corpus, meter, output_dir):
+    """Прогоняет корпус через все стадии обработки страницы"""
+    features = []
+    for char, content in corpus:
+        def infobox_stage():
+            char_soup = parse_character_page(content, targeted=TARGETED_PARSING)
+            return (char_soup,) + extract_infobox(char, char_soup)
+
+        char_soup, character_info, infobox = meter.run('infobox', infobox_stage)
+        page_headers, page_strings = meter.run('text', extract_text, char_soup)
+        infobox_npc = bool(infobox and infobox.find(string=NPC_RE))
+        features.append(meter.run('keywords', page_features, character_info, page_headers,
+                                  infobox_npc, page_strings))
+        del char_soup, infobox
+
+    # Правила применяются ко всей выборке сразу, как в collecting.py и reclassify.py
+    records = meter.run('keywords', classify_features, features, pages=0)
+    meter.run('output', write_records, iter(records), os.path.join(output_dir, 'benchmark'),
+              DEFAULT_FORMATS, pages=len(records))
+
+
+def measure(corpus_factory, memory_sample):
+    """
+    Два прохода по корпусу: замер времени без tracemalloc (он сильно замедляет
+    работу) и замер памяти на первых memory_sample страницах.
+
+    Returns:
+        dict: {стадия: {'pages', 'seconds', 'pages_per_sec', 'peak_mb'}}
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        timing = StageMeter(trace_memory=False)
+        run_stages(corpus_factory(), timing, output_dir)
+
+        memory = StageMeter(trace_memory=True)
+        tracemalloc.start()
+        try:
+            run_stages((page for _, page in zip(range(memory_sample), corpus_factory())), memory, output_dir)
+        finally:
+            tracemalloc.stop()
+
+    results = {}
+    for stage in STAGES:
+        seconds = timing.seconds[stage]
+        results[stage] = {
+            'pages': timing.pages[stage],
+            'seconds': round(seconds, 4),
+            'pages_per_sec': round(timing.pages[stage] / seconds, 1) if seconds else 0.0,
+            'peak_mb': round(memory.peak[stage] / 2 ** 20, 2),
+        }
+    return results
+
+
+def check_budget(results, budget):
+    """Список нарушений бюджета: стадия медленнее min_pages_per_sec или тяжелее max_peak_mb"""
+    violations = []
+    for stage, limits in budget.items():
+        result = results.get(stage) if stage in STAGES else None
+        if result is None:
+            continue
+        if 'min_pages_per_sec' in limits and result['pages_per_sec'] < limits['min_pages_per_sec']:
+            violations.append(f"{stage}: {result['pages_per_sec']} стр/с < {limits['min_pages_per_sec']}")
+        if 'max_peak_mb' in limits and result['peak_mb'] > limits['max_peak_mb']:
+            violations.append(f"{stage}: {result['peak_mb']} МБ > {limits['max_peak_mb']}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер скорости и памяти стадий разбора страниц на офлайн-корпусе')
+    parser.add_argument('--corpus', help='каталог с сохраненными страницами (*.html или http_cache)')
+    parser.add_argument('--synthetic', type=int, default=1000, help='число синтетических страниц')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory-sample', type=int, default=200,
+                        help='сколько страниц прогнать с замером памяти')
+    parser.add_argument('--budget', default=BUDGET_PATH, help='JSON с бюджетом по стадиям')
+    parser.add_argument('--write-budget', action='store_true',
+                        help='записать бюджет по текущему замеру (с запасом) вместо проверки')
+    parser.add_argument('--output', help='сохранить результаты замера в JSON')
+    args = parser.parse_args()
+
+    def corpus_factory():
+        if args.corpus:
+            yield from load_corpus(args.corpus)
+        yield from synthetic_corpus(args.synthetic, args.seed)
+
+    results = measure(corpus_factory, args.memory_sample)
+
+    print(f"{'Стадия':<40} {'страниц':>8} {'стр/с':>10} {'пик, МБ':>9}")
+    for stage in STAGES:
+        result = results[stage]
+        print(f"{STAGE_TITLES[stage]:<40} {result['pages']:>8} {result['pages_per_sec']:>10} {result['peak_mb']:>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+    if args.write_budget:
+        budget = {stage: {'min_pages_per_sec': round(result['pages_per_sec'] * (1 - SPEED_MARGIN), 1),
+                          'max_peak_mb': round(max(result['peak_mb'] * MEMORY_MARGIN, MIN_MEMORY_BUDGET_MB), 2)}
+                  for stage, result in results.items()}
+        # Скорость записи файлов зависит от размера корпуса, поэтому запоминаем, на чем мерили
+        budget['corpus'] = {'synthetic': args.synthetic, 'seed': args.seed, 'path': args.corpus}
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, ensure_ascii=False, indent=4)
+            f.write('\n')
+        print(f"Бюджет записан в {args.budget}")
+        return
+
+    if not os.path.exists(args.budget):
+        print(f"Файл бюджета {args.budget} не найден, проверка пропущена")
+        return
+    with open(args.budget, 'r', encoding='utf-8') as f:
+        budget = json.load(f)
+    measured_on = budget.get('corpus')
+    if measured_on and measured_on != {'synthetic': args.synthetic, 'seed': args.seed, 'path': args.corpus}:
+        print(f"Внимание: бюджет записан для другого корпуса {measured_on}")
+    violations = check_budget(results, budget)
+    if violations:
+        print("Превышен бюджет:")
+        for violation in violations:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("Все стадии укладываются в бюджет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""
+Нормализованное хранилище персонажей в SQLite.
+
+Многозначные поля (фракции, локации, роли) хранятся не строками через
+запятую, а в отдельных таблицах справочников со связями многие-ко-многим,
+поэтому запросы вида "все враждебные NPC в Siofra River" идут по индексам.
+NPC отбираются по флагу is_npc (--npc): он стоит и у торговцев, и у
+персонажей с квестами, тогда как character_type у них разный.
+Запись персонажа обновляется на месте по URL (upsert), так что сбор,
+синхронизация и переклассификация дописывают одну и ту же базу.
+
+Запуск:
+    python character_store.py --npc --location "Siofra River" --hostile
+    python character_store.py --type "Merchant NPC"
+    python character_store.py --faction "Golden Order" --count
+"""
+import argparse
+import sqlite3
+import time
+
+from rules import FLAG_FIELDS, RECORD_FIELDS
+
+STORE_PATH = 'elden_ring_characters.sqlite'
+
+# Многозначное поле записи -> (справочник, таблица связей, столбец ссылки на справочник)
+VALUE_TABLES = {
+    'faction': ('factions', 'character_factions', 'faction_id'),
+    'location': ('locations', 'character_locations', 'location_id'),
+    'role': ('roles', 'character_roles', 'role_id'),
+}
+
+CHARACTER_COLUMNS = ['url', 'name', 'health'] + FLAG_FIELDS + ['character_type']
+
+
+def record_values(record):
+    """
+    Значения многозначных полей, восстановленные из строки через запятую -
+    для записей, собранных до появления списков в признаках страниц
+    """
+    values = {}
+    for field in VALUE_TABLES:
+        text = record.get(field) or ''
+        values[field] = [] if text in ('', 'Unknown') else [part for part in text.split(', ') if part]
+    return values
+
+
+class CharacterStore:
+    """
+    Персонажи (characters), справочники factions, locations, roles и таблицы
+    связей character_factions, character_locations, character_roles.
+    В таблицах связей хранится порядок значений, так что запись
+    восстанавливается в исходном виде.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.prune_pending = False
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS characters (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                health INTEGER NOT NULL DEFAULT 0,
+                has_quest INTEGER NOT NULL DEFAULT 0,
+                is_boss INTEGER NOT NULL DEFAULT 0,
+                is_miniboss INTEGER NOT NULL DEFAULT 0,
+                is_npc INTEGER NOT NULL DEFAULT 0,
+                is_hostile INTEGER NOT NULL DEFAULT 0,
+                is_friendly INTEGER NOT NULL DEFAULT 0,
+                character_type TEXT NOT NULL,
+                updated_at REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_characters_type ON characters (character_type)')
+        for table, links, column in VALUE_TABLES.values():
+            self.conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                )
+            ''')
+            self.conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {links} (
+                    character_id INTEGER NOT NULL REFERENCES characters (id) ON DELETE CASCADE,
+                    {column} INTEGER NOT NULL REFERENCES {table} (id),
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (character_id, {column})
+                ) WITHOUT ROWID
+            ''')
+            # Обратный индекс: значение -> персонажи (первичный ключ покрывает персонаж -> значения)
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{links}_value ON {links} ({column}, character_id)')
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _value_id(self, field, name):
+        """id значения в справочнике (новое значение добавляется)"""
+        table = VALUE_TABLES[field][0]
+        self.conn.execute(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (name,))
+        return self.conn.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()[0]
+
+    def _upsert(self, record, values):
+        row = [record['url'], record['name'], int(record.get('health') or 0)]
+        row += [int(bool(record.get(field))) for field in FLAG_FIELDS]
+        row += [record.get('character_type') or 'other', time.time()]
+        columns = CHARACTER_COLUMNS + ['updated_at']
+        self.conn.execute(
+            f'''INSERT INTO characters ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT (url) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in columns[1:])}''',
+            row
+        )
+        character_id = self.conn.execute('SELECT id FROM characters WHERE url = ?', (record['url'],)).fetchone()[0]
+
+        values = values or record_values(record)
+        for field, (_, links, column) in VALUE_TABLES.items():
+            self.conn.execute(f'DELETE FROM {links} WHERE character_id = ?', (character_id,))
+            ids = []
+            for name in values.get(field, []):
+                value_id = self._value_id(field, name)
+                if value_id not in ids:
+                    ids.append(value_id)
+            self.conn.executemany(
+                f'INSERT INTO {links} (character_id, {column}, position) VALUES (?, ?, ?)',
+                [(character_id, value_id, position) for position, value_id in enumerate(ids)]
+            )
+
+    def upsert(self, record, values=None):
+        """
+        Добавляет или обновляет персонажа по URL.
+
+        Args:
+            record: запись о персонаже (поля RECORD_FIELDS)
+            values: {'faction' | 'location' | 'role': список значений} из признаков
+                страницы; если не переданы, восстанавливаются из строк записи
+        """
+        with self.conn:
+            self._upsert(record, values)
+        # Справочники чистятся один раз - в values() или close(), а не после каждой строки
+        self.prune_pending = True
+
+    def upsert_many(self, records, values=None):
+        """Обновляет набор персонажей одной транзакцией; values - списки значений в том же порядке"""
+        with self.conn:
+            for i, record in enumerate(records):
+                self._upsert(record, values[i] if values else None)
+            self._prune()
+
+    def delete(self, urls):
+        """Удаляет персонажей по URL вместе с их связями и ставшими ненужными значениями справочников"""
+        with self.conn:
+            self.conn.executemany('DELETE FROM characters WHERE url = ?', [(url,) for url in urls])
+            self._prune()
+
+    def replace(self, records, values=None):
+        """Приводит хранилище к набору records: обновляет их и удаляет всех остальных персонажей"""
+        records = list(records)
+        with self.conn:
+            for i, record in enumerate(records):
+                self._upsert(record, values[i] if values else None)
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS keep (url TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM keep')
+            self.conn.executemany('INSERT OR IGNORE INTO keep (url) VALUES (?)',
+                                  [(record['url'],) for record in records])
+            self.conn.execute('DELETE FROM characters WHERE url NOT IN (SELECT url FROM keep)')
+            self._prune()
+
+    def _prune(self):
+        """Удаляет значения справочников, на которые не ссылается ни один персонаж"""
+        for table, links, column in VALUE_TABLES.values():
+            self.conn.execute(f'DELETE FROM {table} WHERE id NOT IN (SELECT {column} FROM {links})')
+        self.prune_pending = False
+
+    def prune(self):
+        """Чистит справочники после одиночных upsert (вызывается из values() и close())"""
+        if self.prune_pending:
+            with self.conn:
+                self._prune()
+
+    def _where(self, character_type=None, faction=None, location=None, role=None, **flags):
+        conditions, params = [], []
+        if character_type is not None:
+            conditions.append('c.character_type = ?')
+            params.append(character_type)
+        for field, value in (('faction', faction), ('location', location), ('role', role)):
+            if value is None:
+                continue
+            table, links, column = VALUE_TABLES[field]
+            conditions.append(f'''c.id IN (SELECT l.character_id FROM {links} l
+                                           JOIN {table} v ON v.id = l.{column} WHERE v.name = ?)''')
+            params.append(value)
+        for flag, value in flags.items():
+            if flag not in FLAG_FIELDS:
+                raise ValueError(f"Неизвестный флаг: {flag}")
+            conditions.append(f'c.{flag} = ?')
+            params.append(int(bool(value)))
+        return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    def find(self, **conditions):
+        """
+        Персонажи, подходящие под все условия: character_type, значение faction,
+        location или role (точное совпадение по справочнику) и флаги вида is_hostile=True.
+
+        Returns:
+            list: записи о персонажах (поля RECORD_FIELDS)
+        """
+        where, params = self._where(**conditions)
+        return self._records(f'SELECT c.id, {", ".join(CHARACTER_COLUMNS)} FROM characters c{where} ORDER BY c.id',
+                             params)
+
+    def count(self, **conditions):
+        """Число персонажей, подходящих под условия find"""
+        where, params = self._where(**conditions)
+        return self.conn.execute(f'SELECT COUNT(*) FROM characters c{where}', params).fetchone()[0]
+
+    def records(self):
+        """Все персонажи в порядке добавления"""
+        return self._records(f'SELECT id, {", ".join(CHARACTER_COLUMNS)} FROM characters ORDER BY id', [])
+
+    def values(self, field):
+        """
+        Значения справочника с числом персонажей, по убыванию
+
+        Returns:
+            list: [(значение, число персонажей)]
+        """
+        self.prune()
+        table, links, column = VALUE_TABLES[field]
+        return self.conn.execute(
+            f'''SELECT v.name, COUNT(l.character_id) AS n FROM {table} v
+                LEFT JOIN {links} l ON l.{column} = v.id GROUP BY v.id ORDER BY n DESC, v.name'''
+        ).fetchall()
+
+    def _records(self, query, params):
+        rows = self.conn.execute(query, params).fetchall()
+        if not rows:
+            return []
+        ids = [row[0] for row in rows]
+        values = {character_id: {field: [] for field in VALUE_TABLES} for character_id in ids}
+        self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS selected (id INTEGER PRIMARY KEY)')
+        self.conn.execute('DELETE FROM selected')
+        self.conn.executemany('INSERT INTO selected (id) VALUES (?)', [(character_id,) for character_id in ids])
+        for field, (table, links, column) in VALUE_TABLES.items():
+            for character_id, name in self.conn.execute(
+                    f'''SELECT l.character_id, v.name FROM {links} l
+                        JOIN selected s ON s.id = l.character_id
+                        JOIN {table} v ON v.id = l.{column}
+                        ORDER BY l.character_id, l.position'''):
+                values[character_id][field].append(name)
+        self.conn.commit()
+
+        records = []
+        for row in rows:
+            record = dict(zip(CHARACTER_COLUMNS, row[1:]))
+            for flag in FLAG_FIELDS:
+                record[flag] = bool(record[flag])
+            for field, items in values[row[0]].items():
+                record[field] = ', '.join(items) if items else 'Unknown'
+            records.append({field: record[field] for field in RECORD_FIELDS})
+        return records
+
+    def close(self):
+        self.prune()
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Запросы к хранилищу персонажей (SQLite)')
+    parser.add_argument('--store', default=STORE_PATH, help='файл базы SQLite')
+    parser.add_argument('--type', dest='character_type', help='тип персонажа (точное значение: Boss, Mini-Boss, NPC, Merchant NPC, '
+                             'Quest NPC, Regular Enemy); все NPC - флаг --npc')
+    parser.add_argument('--faction', help='фракция (точное значение)')
+    parser.add_argument('--location', help='локация (точное значение)')
+    parser.add_argument('--role', help='роль (точное значение)')
+    for flag in FLAG_FIELDS:
+        parser.add_argument('--' + flag.replace('is_', '').replace('_', '-'), dest=flag,
+                            action='store_const', const=True, help=f'только {flag}')
+    parser.add_argument('--count', action='store_true', help='вывести только число персонажей')
+    args = parser.parse_args()
+
+    conditions = {flag: True for flag in FLAG_FIELDS if getattr(args, flag)}
+    for field in ('character_type', 'faction', 'location', 'role'):
+        if getattr(args, field) is not None:
+            conditions[field] = getattr(args, field)
+    with CharacterStore(args.store) as store:
+        if args.count:
+            print(store.count(**conditions))
+            return
+        characters = store.find(**conditions)
+    for character in characters:
+        print(f"{character['name']:<40} {character['character_type']:<10} {character['location']}")
+    print(f"Найдено: {len(characters)}")
+
+
+if __name__ == '__main__':
+    main()
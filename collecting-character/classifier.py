@@ -0,0 +1,321 @@
+import re
+import time
+from bisect import bisect_right
+from itertools import accumulate
+
+from frontier import canonical_url
+from keyword_scanner import KeywordScanner
+from page_parser import parse_character_page
+from rules import ALL_KEYWORDS, BOSS_SECTIONS, classify_features
+from wikitext import find_infobox, link_labels, section_headers, text_lines, value_text
+
+# Разбирать только тело статьи (infobox, заголовки, текст), без навигации и подвала
+TARGETED_PARSING = True
+
+# Автомат для поиска всех ключевых слов строится один раз при загрузке модуля
+PAGE_SCANNER = KeywordScanner(ALL_KEYWORDS)
+PHASE_NUMBER_RE = re.compile(r'\s+\d')
+NPC_RE = re.compile(r'\bNPC\b', re.IGNORECASE)
+DIALOG_RE = re.compile(r'dialog|dialogue', re.IGNORECASE)
+QUEST_RE = re.compile(r'quest', re.IGNORECASE)
+
+
+def scan_page(page_strings):
+    """
+    Сканирует текстовые узлы страницы (в нижнем регистре) за один проход.
+
+    Returns:
+        tuple: (счетчики ключевых слов, число узлов с упоминанием квеста,
+                есть ли в одном узле текст вида "phase 2")
+    """
+    page_text = ''.join(page_strings)
+    # Границы текстовых узлов нужны, чтобы считать совпадения внутри одного узла
+    ends = list(accumulate(len(string) for string in page_strings))
+    counts = dict.fromkeys(PAGE_SCANNER.patterns, 0)
+    quest_nodes = set()
+    has_phase = False
+    for end, keyword in PAGE_SCANNER.iter(page_text):
+        counts[keyword] += 1
+        if keyword == 'quest':
+            node = bisect_right(ends, end - len(keyword) + 1)
+            if end < ends[node]:
+                quest_nodes.add(node)
+        elif keyword == 'phase' and not has_phase:
+            node = bisect_right(ends, end - len(keyword) + 1)
+            number = PHASE_NUMBER_RE.match(page_text, end + 1)
+            has_phase = bool(number) and number.end() <= ends[node]
+    return counts, len(quest_nodes), has_phase
+
+
+def extract_features(char, content):
+    """
+    Извлекает из страницы персонажа признаки для классификации:
+    поля infobox, счетчики ключевых слов, совпадения в заголовках и упоминания квестов.
+    """
+    return soup_features(char, parse_character_page(content, targeted=TARGETED_PARSING))
+
+
+def soup_features(char, char_soup):
+    """Признаки из уже разобранной страницы"""
+    character_info, infobox = extract_infobox(char, char_soup)
+    page_headers, page_strings = extract_text(char_soup)
+    # Прямое указание на NPC в инфобоксе
+    infobox_npc = bool(infobox and infobox.find(string=NPC_RE))
+    return page_features(character_info, page_headers, infobox_npc, page_strings)
+
+
+def extract_infobox(char, char_soup):
+    """
+    Поля infobox: фракция, локация, роль и здоровье.
+
+    Returns:
+        tuple: (запись о персонаже, тег infobox или None)
+    """
+    # Базовая информация
+    character_info = {
+        'name': char['name'],
+        'url': char['url'],
+        'faction': 'Unknown',
+        'location': 'Unknown',
+        'role': 'Unknown',
+        'health': 0,
+    }
+    # Значения многозначных полей списками - для реляционного хранилища (character_store.py)
+    values = {'faction': [], 'location': [], 'role': []}
+    
+    # Извлечение информации из infobox
+    infobox = char_soup.find('aside', class_='portable-infobox')
+    
+    # Извлечение ключевой информации из infobox
+    if infobox:
+        # Фракция
+        faction_tag = infobox.find('div', {'data-source': 'faction'})
+        if faction_tag:
+            faction_value = faction_tag.find('div', class_='pi-data-value')
+            if faction_value:
+                faction_links = faction_value.find_all('a')
+                if faction_links and len(faction_links) > 1:
+                    factions = [link.text.strip() for link in faction_links]
+                    character_info['faction'] = ', '.join(factions)
+                    values['faction'] = factions
+                else:
+                    character_info['faction'] = faction_value.text.strip()
+                    values['faction'] = [character_info['faction']]
+        
+        # Локация
+        location_tag = infobox.find('div', {'data-source': 'location'})
+        if location_tag:
+            location_value = location_tag.find('div', class_='pi-data-value')
+            if location_value:
+                location_links = location_value.find_all('a')
+                if location_links and len(location_links) > 1:
+                    locations = [link.text.strip() for link in location_links]
+                    character_info['location'] = ', '.join(locations)
+                else:
+                    location_text = location_value.text.strip()
+                    if ',' in location_text or '\n' in location_text:
+                        locations = [loc.strip() for loc in re.split(r'[,\n]', location_text) if loc.strip()]
+                        character_info['location'] = ', '.join(locations)
+                    else:
+                        character_info['location'] = location_text
+                        locations = [location_text]
+                values['location'] = locations
+        
+        # Роль - ключевой фактор для определения типа персонажа
+        role_tag = infobox.find('div', {'data-source': 'role'})
+        if role_tag:
+            role_value = role_tag.find('div', class_='pi-data-value')
+            if role_value:
+                role_links = role_value.find_all('a')
+                if role_links and len(role_links) > 1:
+                    roles = [link.text.strip() for link in role_links]
+                    character_info['role'] = ', '.join(roles)
+                else:
+                    role_text = role_value.text.strip()
+                    if ',' in role_text or '\n' in role_text:
+                        roles = [role.strip() for role in re.split(r'[,\n]', role_text) if role.strip()]
+                        character_info['role'] = ', '.join(roles)
+                    else:
+                        character_info['role'] = role_text
+                        roles = [role_text]
+                values['role'] = roles
+    
+    # Извлечение значения здоровья (для информации, но не для определения типа персонажа)
+    if infobox:
+        health_tag = infobox.find('div', {'data-source': 'health'})
+        if health_tag:
+            health_value_div = health_tag.find('div', class_='pi-data-value')
+            if health_value_div:
+                health_value = health_value_div.find(class_='pi-font')
+                if not health_value:
+                    health_value = health_value_div
+                
+                if health_value:
+                    health_text = health_value.text.strip()
+                    health_match = re.search(r'(\d[\d,]+)', health_text)
+                    if health_match:
+                        try:
+                            character_info['health'] = int(health_match.group(1).replace(',', ''))
+                        except:
+                            pass
+    
+    character_info['values'] = {field: [value for value in items if value] for field, items in values.items()}
+    return character_info, infobox
+
+
+def extract_text(char_soup):
+    """
+    Текст страницы для подсчета признаков.
+
+    Returns:
+        tuple: (заголовки h2/h3 - пары (текст, строка или None), текстовые узлы в нижнем регистре)
+    """
+    page_headers = [(header.text, header.string) for header in char_soup.find_all(['h2', 'h3'])]
+    # Один проход автомата по тексту страницы дает все счетчики ключевых слов
+    page_strings = [string.lower() for string in char_soup.strings]
+    return page_headers, page_strings
+
+
+def page_features(character_info, page_headers, infobox_npc, page_strings):
+    """
+    Дополняет поля infobox признаками для классификации; общая часть
+    для HTML-страниц и вики-разметки из MediaWiki API.
+
+    Args:
+        page_headers: список (текст заголовка h2/h3, строка заголовка или None)
+        page_strings: текстовые узлы страницы в нижнем регистре
+    """
+    keyword_counts, quest_mentions, has_phase = scan_page(page_strings)
+    
+    # Число разделов, типичных для боссов
+    character_info['boss_section_headers'] = sum(
+        1 for text, _ in page_headers if any(section in text.lower() for section in BOSS_SECTIONS)
+    )
+    # Разделы с диалогами и квестами
+    character_info['dialog_header'] = any(string and DIALOG_RE.search(string) for _, string in page_headers)
+    character_info['quest_header'] = any(string and QUEST_RE.search(string) for _, string in page_headers)
+    character_info['infobox_npc'] = infobox_npc
+    character_info['has_phase'] = has_phase
+    character_info['quest_mentions'] = quest_mentions
+    character_info['keywords'] = {keyword: count for keyword, count in keyword_counts.items() if count}
+    
+    return character_info
+
+
+def split_values(value, split_text=True):
+    """
+    Значения поля infobox из вики-разметки: подписи ссылок, если их
+    несколько, иначе текст (при split_text - с разбиением по запятым и строкам)
+    """
+    links = link_labels(value)
+    if links and len(links) > 1:
+        return links
+    text = value_text(value)
+    if split_text and (',' in text or '\n' in text):
+        return [part.strip() for part in re.split(r'[,\n]', text) if part.strip()]
+    return [text]
+
+
+def extract_wikitext_features(char, wikitext):
+    """
+    Извлекает признаки из вики-разметки статьи (режим MediaWiki API).
+    Поля и признаки те же, что у extract_features для HTML-страницы.
+    """
+    character_info = {
+        'name': char['name'],
+        'url': char['url'],
+        'faction': 'Unknown',
+        'location': 'Unknown',
+        'role': 'Unknown',
+        'health': 0,
+    }
+    values = {'faction': [], 'location': [], 'role': []}
+    
+    infobox = find_infobox(wikitext)
+    infobox_npc = False
+    infobox_strings = []
+    if infobox:
+        _, params = infobox
+        for field in values:
+            if field in params:
+                # Фракция, как и в HTML-режиме, по запятым не разбивается
+                values[field] = split_values(params[field], split_text=field != 'faction')
+                character_info[field] = ', '.join(values[field])
+        if 'health' in params:
+            health_match = re.search(r'(\d[\d,]+)', value_text(params['health']))
+            if health_match:
+                character_info['health'] = int(health_match.group(1).replace(',', ''))
+        # Как в HTML-режиме: текст infobox - значения параметров в порядке вывода, без имени шаблона
+        infobox_strings = [value_text(value) for value in params.values()]
+        infobox_npc = any(NPC_RE.search(text) for text in infobox_strings)
+    
+    character_info['values'] = {field: [value for value in items if value] for field, items in values.items()}
+    
+    page_headers = [(header, header) for header in section_headers(wikitext)]
+    # Infobox стоит на странице перед текстом статьи, и его значения тоже сканируются
+    page_strings = [text.lower() for text in infobox_strings if text]
+    page_strings += [line.lower() for line in text_lines(wikitext)]
+    return page_features(character_info, page_headers, infobox_npc, page_strings)
+
+
+def process_character(char, content):
+    """Разбирает страницу персонажа и определяет его тип"""
+    return classify_features([extract_features(char, content)])[0]
+
+
+def process_page(char, content):
+    """
+    Обработка страницы в рабочем процессе пула.
+
+    Returns:
+        tuple: (запись о персонаже, признаки страницы, canonical URL для дедупликации редиректов,
+                время стадий parse/extract/classify в секундах - пул процессов не видит METRICS основного)
+    """
+    start = time.perf_counter()
+    char_soup = parse_character_page(content, targeted=TARGETED_PARSING)
+    parsed = time.perf_counter()
+    features = soup_features(char, char_soup)
+    extracted = time.perf_counter()
+    character_info = classify_features([features])[0]
+    timings = {'parse': parsed - start, 'extract': extracted - parsed, 'classify': time.perf_counter() - extracted}
+    return character_info, features, canonical_url(content), timings
+
+
+def process_api_batch(batch, pages):
+    """
+    Обработка пачки статей, полученных одним запросом к MediaWiki API.
+
+    Args:
+        batch: персонажи из очереди обхода
+        pages: результат WikiApi.fetch_revisions - {url персонажа: статья или None}
+
+    Returns:
+        tuple: (список (персонаж, запись, признаки, canonical URL, ошибка) для каждого
+                персонажа пачки, время стадий: extract - по страницам, classify - на пачку)
+    """
+    parsed = []
+    timings = {'extract': [], 'classify': []}
+    for char in batch:
+        page = pages.get(char['url'])
+        if page is None:
+            parsed.append((char, None, None, LookupError('страница не найдена')))
+            continue
+        start = time.perf_counter()
+        try:
+            features = extract_wikitext_features(char, page['wikitext'])
+            # Ревизия статьи нужна для инкрементальной синхронизации (sync.py)
+            features['title'] = page['title']
+            features['revid'] = page['revid']
+            parsed.append((char, features, page['url'], None))
+        except Exception as e:
+            parsed.append((char, None, None, e))
+        timings['extract'].append(time.perf_counter() - start)
+
+    # Вся пачка классифицируется одним векторным проходом
+    start = time.perf_counter()
+    features = [entry[1] for entry in parsed if entry[1] is not None]
+    records = iter(classify_features(features) if features else [])
+    timings['classify'].append(time.perf_counter() - start)
+    results = [(char, next(records) if char_features is not None else None, char_features, canonical, error)
+               for char, char_features, canonical, error in parsed]
+    return results, timings
@@ -1,299 +1,322 @@
-import time
-import json
-import pandas as pd
-import requests
-import re
-from bs4 import BeautifulSoup
+import argparse
+import os
+from urllib.parse import unquote, urljoin
+
+from character_store import STORE_PATH, CharacterStore
+from classifier import process_api_batch, process_page
+from fetcher import AdaptiveConcurrency, HostRateLimiter, HttpClient, fetch_page
+from frontier import CrawlFrontier, canonical_url
+from http_cache import ResponseCache
+from journal import CheckpointJournal
+from metrics import METRICS
+from name_search import NameIndex
+from page_parser import CATEGORY_STRAINER, make_soup
+from pipeline import run_pipeline
+from snapshots import SNAPSHOT_DIR, SnapshotStore, diff_manifests
+from wiki_api import API_BATCH_SIZE, NS_CATEGORY, NS_MAIN, WikiApi, page_url, title_from_url
+from writers import DEFAULT_FORMATS, WRITERS, write_records
 
 # Основной URL для сбора данных
-base_url = "https://eldenring.fandom.com/wiki/Category:Characters"
+WIKI_URL = "https://eldenring.fandom.com"
+CATEGORY_TITLE = "Category:Characters"
+base_url = WIKI_URL + "/wiki/" + CATEGORY_TITLE
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
-# Получаем HTML страницы со списком персонажей
-response = requests.get(base_url, headers=headers)
-soup = BeautifulSoup(response.content, 'html.parser')
-
-# Найти все ссылки на персонажей
-character_links = []
-character_containers = soup.find_all('a', class_='category-page__member-link')
-
-for char in character_containers:
-    character_links.append({
-        'name': char.text.strip(),
-        'url': 'https://eldenring.fandom.com' + char['href']
-    })
-
-print(f"Найдено {len(character_links)} персонажей")
-
-# Пропускаем первые 13 записей, так как они не персонажи
-character_links = character_links[13:]
-print(f"После фильтрации осталось {len(character_links)} персонажей")
-
-# Сбор данных о каждом персонаже
-characters_data = []
-
-for idx, char in enumerate(character_links[:50]):  # Ограничимся первыми 50 персонажами
-    print(f"Обрабатываю {idx+1}/{len(character_links[:50])}: {char['name']}")
-    
-    # Делаем паузу между запросами, чтобы не перегружать сервер
-    time.sleep(1)
-    
-    # Получаем HTML страницы персонажа
-    char_response = requests.get(char['url'], headers=headers)
-    char_soup = BeautifulSoup(char_response.content, 'html.parser')
-    
-    # Базовая информация
-    character_info = {
-        'name': char['name'],
-        'url': char['url'],
-        'faction': 'Unknown',
-        'location': 'Unknown',
-        'role': 'Unknown',
-        'health': 0,
-        'has_quest': False,
-        'is_boss': False,
-        'is_miniboss': False,
-        'is_npc': False,
-        'is_hostile': False,
-        'is_friendly': False,
-        'character_type': 'Unknown'  # Новое поле для типа персонажа
-    }
-    
-    # Извлечение информации из infobox
-    infobox = char_soup.find('aside', class_='portable-infobox')
-    
-    # Получаем полный текст страницы для анализа
-    page_text = char_soup.get_text().lower()
-    
-    # Извлечение ключевой информации из infobox
-    if infobox:
-        # Фракция
-        faction_tag = infobox.find('div', {'data-source': 'faction'})
-        if faction_tag:
-            faction_value = faction_tag.find('div', class_='pi-data-value')
-            if faction_value:
-                faction_links = faction_value.find_all('a')
-                if faction_links and len(faction_links) > 1:
-                    factions = [link.text.strip() for link in faction_links]
-                    character_info['faction'] = ', '.join(factions)
-                else:
-                    character_info['faction'] = faction_value.text.strip()
-        
-        # Локация
-        location_tag = infobox.find('div', {'data-source': 'location'})
-        if location_tag:
-            location_value = location_tag.find('div', class_='pi-data-value')
-            if location_value:
-                location_links = location_value.find_all('a')
-                if location_links and len(location_links) > 1:
-                    locations = [link.text.strip() for link in location_links]
-                    character_info['location'] = ', '.join(locations)
-                else:
-                    location_text = location_value.text.strip()
-                    if ',' in location_text or '\n' in location_text:
-                        locations = [loc.strip() for loc in re.split(r'[,\n]', location_text) if loc.strip()]
-                        character_info['location'] = ', '.join(locations)
-                    else:
-                        character_info['location'] = location_text
-        
-        # Роль - ключевой фактор для определения типа персонажа
-        role_tag = infobox.find('div', {'data-source': 'role'})
-        if role_tag:
-            role_value = role_tag.find('div', class_='pi-data-value')
-            if role_value:
-                role_links = role_value.find_all('a')
-                if role_links and len(role_links) > 1:
-                    roles = [link.text.strip() for link in role_links]
-                    character_info['role'] = ', '.join(roles)
-                else:
-                    role_text = role_value.text.strip()
-                    if ',' in role_text or '\n' in role_text:
-                        roles = [role.strip() for role in re.split(r'[,\n]', role_text) if role.strip()]
-                        character_info['role'] = ', '.join(roles)
-                    else:
-                        character_info['role'] = role_text
-    
-    # Извлечение значения здоровья (для информации, но не для определения типа персонажа)
-    if infobox:
-        health_tag = infobox.find('div', {'data-source': 'health'})
-        if health_tag:
-            health_value_div = health_tag.find('div', class_='pi-data-value')
-            if health_value_div:
-                health_value = health_value_div.find(class_='pi-font')
-                if not health_value:
-                    health_value = health_value_div
-                
-                if health_value:
-                    health_text = health_value.text.strip()
-                    health_match = re.search(r'(\d[\d,]+)', health_text)
-                    if health_match:
-                        try:
-                            character_info['health'] = int(health_match.group(1).replace(',', ''))
-                        except:
-                            pass
-    
-    # ОПРЕДЕЛЕНИЕ ТИПА ПЕРСОНАЖА НА ОСНОВЕ РОЛИ И КОНТЕКСТА
-    
-    # 1. Определение босса
-    boss_score = 0
-    
-    # Ключевые слова боссов
-    boss_keywords = ['boss', 'demigod', 'shardbearer', 'remembrance', 'great enemy', 'legend']
-    for keyword in boss_keywords:
-        if keyword in page_text:
-            boss_score += 1
-    
-    # Признаки босса в роли
-    if character_info['role'] and any(term in character_info['role'].lower() for term in boss_keywords):
-        boss_score += 3
-    
-    # Наличие разделов, типичных для боссов
-    boss_sections = ['moveset', 'strategy', 'strategies', 'phases', 'attacks']
-    page_headers = char_soup.find_all(['h2', 'h3'])
-    for header in page_headers:
-        header_text = header.text.lower()
-        for section in boss_sections:
-            if section in header_text:
-                boss_score += 1
-                break
-    
-    # Упоминание фаз боя
-    if char_soup.find(text=re.compile(r'phase\s+\d', re.IGNORECASE)):
-        boss_score += 2
-    
-    # Очевидные указания на босса в тексте
-    if "this boss" in page_text or "defeat the boss" in page_text:
-        boss_score += 2
-    
-    character_info['is_boss'] = boss_score >= 4
-    
-    # 2. Определение мини-босса
-    miniboss_score = 0
-    
-    # Ключевые слова мини-боссов
-    miniboss_keywords = ['mini-boss', 'miniboss', 'field boss', 'dungeon boss', 'evergaol', 'enemy boss']
-    for keyword in miniboss_keywords:
-        if keyword in page_text:
-            miniboss_score += 2
-    
-    # Признаки мини-босса в роли
-    if character_info['role'] and any(term in character_info['role'].lower() for term in miniboss_keywords):
-        miniboss_score += 3
-    
-    # Если персонаж похож на босса, но не дотягивает
-    if 2 <= boss_score < 4:
-        miniboss_score += 1
-    
-    character_info['is_miniboss'] = not character_info['is_boss'] and miniboss_score >= 2
-    
-    # 3. Определение NPC
-    npc_score = 0
-    
-    # Прямое указание на NPC в инфобоксе
-    if infobox and (infobox.find(text=re.compile(r'\bNPC\b', re.IGNORECASE)) or 
-                    (character_info['role'] and 'npc' in character_info['role'].lower())):
-        npc_score += 3
-    
-    # Ключевые слова, указывающие на NPC
-    npc_keywords = ['merchant', 'vendor', 'shopkeeper', 'questgiver', 'blacksmith', 'resident', 'ally']
-    for keyword in npc_keywords:
-        if keyword in page_text:
-            npc_score += 1
-            if keyword in character_info['role'].lower() if character_info['role'] else False:
-                npc_score += 1  # Дополнительные очки, если это указано в роли
-    
-    # Наличие диалогов
-    if 'dialogue' in page_text or 'dialog' in page_text:
-        npc_score += 1
-        # Проверим, есть ли целые разделы с диалогами
-        if char_soup.find(['h2', 'h3'], string=re.compile(r'dialog|dialogue', re.IGNORECASE)):
-            npc_score += 2
-    
-    # Наличие квеста
-    quest_mentions = char_soup.find_all(text=re.compile(r'quest', re.IGNORECASE))
-    if len(quest_mentions) > 2:
-        npc_score += 1
-        if char_soup.find(['h2', 'h3'], string=re.compile(r'quest', re.IGNORECASE)):
-            npc_score += 2
-            character_info['has_quest'] = True
-    
-    # Указание на торговлю или услуги
-    if 'sells' in page_text or 'offers' in page_text or 'shop' in page_text or 'service' in page_text:
-        npc_score += 1
-    
-    # Упоминание взаимодействия с игроком
-    interaction_terms = ['speak to', 'talk to', 'interact with', 'approach']
-    for term in interaction_terms:
-        if term in page_text:
-            npc_score += 1
+# Параметры параллельной загрузки: число потоков и лимит запросов к хосту в секунду
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 2.0
+RATE_BURST = 2
+
+# Повторы неудачных запросов и начальное число одновременных запросов (дальше подстраивается AIMD)
+MAX_RETRIES = 4
+INITIAL_CONCURRENCY = 2
+# Задержка ответа, после которой число одновременных запросов уменьшается, секунды
+LATENCY_TARGET = 5.0
+
+# Параметры конвейера: число процессов разбора страниц и размер очередей между стадиями
+PARSE_WORKERS = os.cpu_count() or 1
+PIPELINE_QUEUE_SIZE = 32
+
+# Каталог дискового кэша ответов (ревалидация через ETag/Last-Modified)
+CACHE_DIR = 'http_cache'
+
+# Журнал обработанных персонажей (JSONL), из которого собираются итоговые файлы
+JOURNAL_PATH = 'elden_ring_characters.jsonl'
+
+# Итоговые файлы: имя без расширения, расширение - формат (json, csv, parquet, arrow)
+DATASET_PATH = 'elden_ring_characters'
+
+# Индекс нечеткого поиска по именам (name_search.py) - рядом с итоговыми файлами
+NAME_INDEX_PATH = DATASET_PATH + '.names.npz'
+
+# Признаки страниц (JSONL) для офлайн-переклассификации без обращения к вики
+FEATURES_PATH = 'elden_ring_features.jsonl'
+
+# Метрики сбора: *.json - сводка в JSON, иначе - текстовый формат Prometheus
+METRICS_PATH = 'crawl_metrics.prom'
+
+# Очередь обхода (SQLite) и максимальная глубина вложенных подкатегорий
+FRONTIER_PATH = 'crawl_frontier.sqlite'
+MAX_CATEGORY_DEPTH = 1
+
+
+def crawl_categories(frontier, response_cache, wiki_url=WIKI_URL, client=None):
+    """Обходит категорию со всеми страницами пагинации и подкатегориями"""
+    while True:
+        categories = frontier.next_batch('category')
+        if not categories:
+            break
+        for category in categories:
+            try:
+                content = fetch_page(category['url'], headers=headers, cache=response_cache, client=client)
+            except Exception as e:
+                print(f"Ошибка загрузки категории {category['url']}: {e}")
+                frontier.mark_failed(category['url'], e)
+                continue
+            soup = make_soup(content, parse_only=CATEGORY_STRAINER)
+
+            for link in soup.find_all('a', class_='category-page__member-link'):
+                url = urljoin(wiki_url, link['href'])
+                title = unquote(link['href'].rsplit('/wiki/', 1)[-1])
+                if title.startswith('Category:'):
+                    # Подкатегории обходим до ограниченной глубины
+                    if category['depth'] < MAX_CATEGORY_DEPTH:
+                        frontier.add(url, name=link.text.strip(), kind='category',
+                                     priority=50 - category['depth'], depth=category['depth'] + 1)
+                elif ':' not in title:
+                    # Страницы из других пространств имен (Template:, File: ...) не являются персонажами
+                    frontier.add(url, name=link.text.strip(), kind='character',
+                                 priority=-category['depth'], depth=category['depth'])
+
+            next_link = soup.find('a', class_='category-page__pagination-next')
+            if next_link and next_link.get('href'):
+                frontier.add(urljoin(wiki_url, next_link['href']), name=category['name'], kind='category',
+                             priority=100 - category['depth'], depth=category['depth'])
+            frontier.mark_fetched(category['url'], canonical_url(content))
+
+
+def crawl_categories_api(frontier, api):
+    """Обходит категорию и подкатегории через list=categorymembers MediaWiki API"""
+    while True:
+        categories = frontier.next_batch('category')
+        if not categories:
             break
-    
-    # NPC не может быть боссом или мини-боссом одновременно
-    character_info['is_npc'] = not character_info['is_boss'] and not character_info['is_miniboss'] and npc_score >= 3
-    
-    # Определение базового типа персонажа
-    if character_info['is_boss']:
-        character_info['character_type'] = 'Boss'
-    elif character_info['is_miniboss']:
-        character_info['character_type'] = 'Mini-Boss'
-    elif character_info['is_npc']:
-        if 'merchant' in page_text or 'vendor' in page_text or 'shop' in page_text:
-            character_info['character_type'] = 'Merchant NPC'
-        elif character_info['has_quest']:
-            character_info['character_type'] = 'Quest NPC'
-        else:
-            character_info['character_type'] = 'NPC'
+        for category in categories:
+            try:
+                members = list(api.category_members(title_from_url(category['url'])))
+            except Exception as e:
+                print(f"Ошибка загрузки категории {category['url']}: {e}")
+                frontier.mark_failed(category['url'], e)
+                continue
+
+            for member in members:
+                url = page_url(api.wiki_url, member['title'])
+                if member['ns'] == NS_CATEGORY:
+                    if category['depth'] < MAX_CATEGORY_DEPTH:
+                        frontier.add(url, name=member['title'].split(':', 1)[-1], kind='category',
+                                     priority=50 - category['depth'], depth=category['depth'] + 1)
+                elif member['ns'] == NS_MAIN:
+                    frontier.add(url, name=member['title'], kind='character',
+                                 priority=-category['depth'], depth=category['depth'])
+            frontier.mark_fetched(category['url'])
+
+
+def export_dataset(records, formats=DEFAULT_FORMATS):
+    """
+    Сохранение данных в выбранных форматах (JSON, CSV, Parquet, Arrow) - потоковым проходом по записям.
+    JSONL-версией набора данных служит сам журнал JOURNAL_PATH, который пишется во время сбора.
+    Заодно строится индекс поиска по именам NAME_INDEX_PATH
+    """
+    counts = {'boss': 0, 'miniboss': 0, 'npc': 0, 'other': 0}
+    names = []
+
+    def counted(records):
+        for character_info in records:
+            names.append(character_info['name'])
+            if character_info['is_boss']:
+                counts['boss'] += 1
+            elif character_info['is_miniboss']:
+                counts['miniboss'] += 1
+            elif character_info['is_npc']:
+                counts['npc'] += 1
+            else:
+                counts['other'] += 1
+            yield character_info
+
+    write_records(counted(records), DATASET_PATH, formats)
+    NameIndex(names).save(NAME_INDEX_PATH)
+    return counts
+
+
+def snapshot_dataset(records):
+    """Сохраняет снимок набора данных (см. snapshots.py) и сообщает, что изменилось с прошлого"""
+    store = SnapshotStore(SNAPSHOT_DIR)
+    previous = store.head()
+    snapshot_id = store.save(records)
+    if snapshot_id == previous:
+        print(f"Набор данных не изменился, снимок {snapshot_id[:12]}")
+        return snapshot_id
+    diff = diff_manifests(store.manifest(previous), store.manifest(snapshot_id))
+    print(f"Новый снимок {snapshot_id[:12]}: добавлено {len(diff['added'])}, "
+          f"удалено {len(diff['removed'])}, изменено {len(diff['changed'])}")
+    return snapshot_id
+
+
+def print_summary(counts):
+    print(f"Боссов: {counts['boss']}")
+    print(f"Мини-боссов: {counts['miniboss']}")
+    print(f"NPC: {counts['npc']}")
+    print(f"Другие персонажи: {counts['other']}")
+
+
+def make_fetcher(fetch_workers=MAX_WORKERS, max_retries=MAX_RETRIES):
+    """
+    Загрузка через общий HTTP-клиент с кэшем ответов и ограничением частоты запросов к хосту.
+
+    Returns:
+        tuple: (fetch_url(url) -> bytes, HttpClient, ResponseCache)
+    """
+    response_cache = ResponseCache(CACHE_DIR)
+    limiter = HostRateLimiter(REQUESTS_PER_SECOND, RATE_BURST)
+    concurrency = AdaptiveConcurrency(initial=min(INITIAL_CONCURRENCY, fetch_workers),
+                                      maximum=fetch_workers, latency_target=LATENCY_TARGET)
+    client = HttpClient(headers=headers, pool_size=fetch_workers, max_retries=max_retries,
+                        concurrency=concurrency)
+
+    def fetch_url(url):
+        limiter.acquire(url)
+        return fetch_page(url, headers=headers, cache=response_cache, client=client)
+
+    return fetch_url, client, response_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сбор данных о персонажах Elden Ring')
+    parser.add_argument('--resume', action='store_true',
+                        help='продолжить прерванный сбор, пропуская персонажей из журнала')
+    parser.add_argument('--limit', type=int, default=50,
+                        help='сколько персонажей обработать за запуск (0 - без ограничения)')
+    parser.add_argument('--source', choices=['html', 'api'], default='html',
+                        help='html - страница каждого персонажа, api - вики-разметка пачками через MediaWiki API')
+    parser.add_argument('--wiki-url', default=WIKI_URL,
+                        help='адрес вики (например, локального fixture_server.py)')
+    parser.add_argument('--formats', nargs='+', choices=sorted(WRITERS), default=DEFAULT_FORMATS,
+                        help='форматы итоговых файлов')
+    parser.add_argument('--metrics', default=METRICS_PATH,
+                        help='файл метрик по стадиям (.json - JSON, иначе формат Prometheus)')
+    parser.add_argument('--fetch-workers', type=int, default=MAX_WORKERS,
+                        help='число потоков загрузки страниц')
+    parser.add_argument('--max-retries', type=int, default=MAX_RETRIES,
+                        help='число повторов запроса при сетевых ошибках и ответах 429/5xx')
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS,
+                        help='число процессов разбора страниц (0 - разбор в основном процессе)')
+    parser.add_argument('--queue-size', type=int, default=PIPELINE_QUEUE_SIZE,
+                        help='размер очередей между стадиями конвейера')
+    args = parser.parse_args()
+    wiki_url = args.wiki_url.rstrip('/')
+
+    fetch_url, client, response_cache = make_fetcher(args.fetch_workers, args.max_retries)
+    api = WikiApi(wiki_url, fetch_url)
+
+    journal = CheckpointJournal(JOURNAL_PATH, resume=args.resume)
+    features_journal = CheckpointJournal(FEATURES_PATH, resume=args.resume)
+    # Хранилище SQLite обновляется на месте (upsert по URL) и между запусками не очищается
+    store = CharacterStore(STORE_PATH)
+    frontier = CrawlFrontier(FRONTIER_PATH, reset=not args.resume)
+    frontier.add(wiki_url + '/wiki/' + CATEGORY_TITLE, name='Characters', kind='category', priority=100)
+    if args.source == 'api':
+        crawl_categories_api(frontier, api)
     else:
-        character_info['character_type'] = 'Regular Enemy'
-    
-    # Определение дружественности/враждебности
-    if character_info['is_boss'] or character_info['is_miniboss']:
-        character_info['is_hostile'] = True
-        character_info['is_friendly'] = False
-    elif character_info['is_npc']:
-        hostile_words = ['hostile', 'enemy', 'invader', 'attacks', 'fight', 'aggro', 'aggressive']
-        friendly_words = ['friendly', 'ally', 'merchant', 'vendor', 'helps', 'quest', 'assistance']
-        
-        hostility_score = sum(page_text.count(word) for word in hostile_words)
-        friendly_score = sum(page_text.count(word) for word in friendly_words)
-        
-        # Проверка конкретных фраз
-        if 'attack on sight' in page_text or 'hostile to player' in page_text:
-            hostility_score += 3
-        if 'friendly to player' in page_text or 'offers assistance' in page_text:
-            friendly_score += 3
-        
-        character_info['is_hostile'] = hostility_score > friendly_score
-        character_info['is_friendly'] = friendly_score >= hostility_score
+        crawl_categories(frontier, response_cache, wiki_url, client)
+
+    # Сбор данных о каждом персонаже: за один запуск обрабатываем не больше --limit страниц
+    selected_links = frontier.next_batch('character', limit=args.limit or None)
+    if args.resume:
+        completed = journal.completed_urls()
+        for char in selected_links:
+            if char['url'] in completed:
+                frontier.mark_fetched(char['url'])
+        selected_links = [char for char in selected_links if char['url'] not in completed]
+        print(f"Возобновление: уже обработано {len(completed)}")
+    print(f"В очереди {len(selected_links)} персонажей")
+
+    # Загрузка (потоки, частоту запросов к хосту ограничивает token bucket), разбор
+    # (пул процессов) и запись (основной поток) работают одновременно.
+    # В режиме api элемент конвейера - пачка до API_BATCH_SIZE статей на один запрос.
+    # Каждый персонаж сразу дописывается в журнал, чтобы сбой не уничтожил собранные данные
+    if args.source == 'api':
+        items = [selected_links[i:i + API_BATCH_SIZE] for i in range(0, len(selected_links), API_BATCH_SIZE)]
+
+        def fetch(batch):
+            return api.fetch_revisions([char['url'] for char in batch])
+
+        process = process_api_batch
     else:
-        # Обычный враг по умолчанию враждебен
-        character_info['is_hostile'] = True
-        character_info['is_friendly'] = False
-    
-    # Если здоровье не найдено, сгенерируем примерное значение по типу
-    if character_info['health'] == 0:
-        if character_info['is_boss']:
-            character_info['health'] = 10000 + (hash(character_info['name']) % 20000)
-        elif character_info['is_miniboss']:
-            character_info['health'] = 5000 + (hash(character_info['name']) % 5000)
-        elif character_info['is_npc']:
-            character_info['health'] = 200 + (hash(character_info['name']) % 300)
-        else:
-            character_info['health'] = 500 + (hash(character_info['name']) % 1500)
-    
-    characters_data.append(character_info)
-
-# Сохранение данных в форматах JSON и CSV
-with open('elden_ring_characters.json', 'w', encoding='utf-8') as f:
-    json.dump(characters_data, f, ensure_ascii=False, indent=4)
-
-df = pd.DataFrame(characters_data)
-df.to_csv('elden_ring_characters.csv', index=False, encoding='utf-8')
-
-print("Сбор данных завершен. Найдено:")
-print(f"Боссов: {sum(1 for c in characters_data if c['is_boss'])}")
-print(f"Мини-боссов: {sum(1 for c in characters_data if c['is_miniboss'])}")
-print(f"NPC: {sum(1 for c in characters_data if c['is_npc'])}")
-print(f"Другие персонажи: {sum(1 for c in characters_data if not c['is_boss'] and not c['is_miniboss'] and not c['is_npc'])}")
+        items = selected_links
+
+        def fetch(char):
+            return fetch_url(char['url'])
+
+        process = process_page
+
+    def results():
+        for item, result, error in run_pipeline(items, fetch, process, fetch_workers=args.fetch_workers,
+                                                process_workers=args.parse_workers,
+                                                queue_size=args.queue_size):
+            if args.source == 'html':
+                if error is not None:
+                    yield item, None, None, None, error
+                    continue
+                character_info, features, canonical, timings = result
+                for stage, seconds in timings.items():
+                    METRICS.observe(stage, seconds)
+                yield item, character_info, features, canonical, None
+            elif error is not None:
+                # Запрос пачки не удался - ошибка относится ко всем ее персонажам
+                for char in item:
+                    yield char, None, None, None, error
+            else:
+                batch_results, timings = result
+                for stage, values in timings.items():
+                    for seconds in values:
+                        METRICS.observe(stage, seconds)
+                yield from batch_results
+
+    with journal, features_journal:
+        for done, (char, character_info, features, canonical, error) in enumerate(results(), start=1):
+            print(f"Обрабатываю {done}/{len(selected_links)}: {char['name']}")
+            if error is not None:
+                print(f"Ошибка обработки {char['url']}: {error}")
+                METRICS.inc('pages', status='failed')
+                frontier.mark_failed(char['url'], error)
+                continue
+            # Разные ссылки могут вести на одну страницу через редирект - сохраняем ее один раз
+            with METRICS.timer('write'):
+                if frontier.mark_fetched(char['url'], canonical):
+                    features_journal.append(features)
+                    journal.append(character_info)
+                    store.upsert(character_info, features.get('values'))
+                    METRICS.inc('pages', status='saved')
+                else:
+                    METRICS.inc('pages', status='duplicate')
+
+    stats = frontier.stats()
+    frontier.close()
+    store.close()
+    client.close()
+    print(f"Очередь обхода: загружено {stats.get(('character', 'fetched'), 0)}, "
+          f"ожидает {stats.get(('character', 'pending'), 0)}, ошибок {stats.get(('character', 'failed'), 0)}")
+
+    METRICS.write(args.metrics)
+    METRICS.print_summary()
+
+    counts = export_dataset(journal.iter_records(), args.formats)
+    print("Сбор данных завершен. Найдено:")
+    print_summary(counts)
+    snapshot_dataset(journal.iter_records())
+
+
+if __name__ == '__main__':
+    main()
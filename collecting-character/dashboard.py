@@ -0,0 +1,187 @@
+"""
+Данные и вспомогательные классы интерактивного дашборда visualization.ipynb.
+
+ChartData считает агрегаты для графиков (сравнение здоровья, типы
+персонажей, анализ NPC, карта локаций, лепестковая диаграмма) по
+фасетному индексу и кэширует их по выбранному набору строк, поэтому
+повторный выбор тех же персонажей или переключение между графиками не
+пересчитывает группировки. FigureCache хранит уже отрисованные фигуры,
+Debouncer откладывает обработку частых событий виджетов.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Сколько наборов агрегатов и отрисованных фигур держать в памяти
+CACHE_SIZE = 32
+
+# Задержка обработки событий виджетов (ползунок, фильтр типов), секунды
+DEBOUNCE_DELAY = 0.3
+
+# Ограничения графиков: NPC на диаграмме, секторов локаций NPC, столбцов карты локаций, линий на лепестковой
+MAX_NPC = 15
+MAX_NPC_LOCATIONS = 8
+MAX_LOCATIONS = 15
+MAX_RADAR = 8
+
+RADAR_CATEGORIES = ['health', 'is_boss', 'is_miniboss', 'is_npc', 'has_quest', 'is_hostile', 'is_friendly']
+NPC_CHARACTERISTICS = ['has_quest', 'is_friendly', 'is_hostile']
+OTHER_LABEL = 'Другие'
+
+
+class ChartData:
+    """
+    Агрегаты графиков дашборда. Ключ выборки - кортеж номеров строк
+    (key(names)), по нему результаты кэшируются в LRU.
+    """
+
+    def __init__(self, df, facets, cache_size=CACHE_SIZE, seed=0):
+        self.df = df
+        self.facets = facets
+        self.seed = seed
+        self.names = df['name'].to_numpy()
+        self.health_values = df['health'].to_numpy()
+        self.types = df['character_type'].to_numpy()
+        self.flags = {field: df[field].to_numpy(dtype=bool) for field in RADAR_CATEGORIES[1:]}
+        # Неизменные для всего набора агрегаты считаются сразу
+        self.type_totals = facets.facet_counts('character_type')
+        self.npc_rows = facets.filter(character_type='NPC')
+        for name in ('health', 'type_counts', 'npc', 'locations', 'radar'):
+            setattr(self, name, lru_cache(maxsize=cache_size)(getattr(self, '_' + name)))
+
+    def key(self, names):
+        """Ключ выборки: отсортированные номера строк выбранных персонажей"""
+        return tuple(self.facets.rows_for(names).tolist())
+
+    def _health(self, key):
+        """Имена, здоровье и типы выбранных персонажей по убыванию здоровья"""
+        rows = np.array(key, dtype=np.int64)
+        order = rows[np.argsort(-self.health_values[rows], kind='stable')]
+        return pd.DataFrame({'name': self.names[order], 'health': self.health_values[order],
+                             'character_type': self.types[order]})
+
+    def _type_counts(self, key):
+        """Число выбранных персонажей по типам, по убыванию"""
+        counts = self.facets.facet_counts('character_type', rows=np.array(key, dtype=np.int64))
+        return pd.Series(counts, dtype=int)
+
+    def _npc(self, key):
+        """
+        NPC среди выбранных (или все NPC при пустой выборке): не больше MAX_NPC
+        случайных, их характеристики и распределение по локациям
+
+        Returns:
+            tuple: (DataFrame name/characteristic/value, Series локация -> число NPC)
+        """
+        rows = self.npc_rows if not key else self.facets.filter(rows=np.array(key, dtype=np.int64),
+                                                                character_type='NPC')
+        if len(rows) > MAX_NPC:
+            # Случайная подвыборка фиксирована для выборки, чтобы повторный показ не менял график
+            rows = np.random.default_rng(self.seed).choice(rows, MAX_NPC, replace=False)
+        if not len(rows):
+            return pd.DataFrame(columns=['name', 'characteristic', 'value']), pd.Series(dtype=int)
+        characteristics = pd.DataFrame({'name': np.repeat(self.names[rows], len(NPC_CHARACTERISTICS)),
+                                        'characteristic': NPC_CHARACTERISTICS * len(rows),
+                                        'value': np.column_stack([self.flags[field][rows].astype(int)
+                                                                  for field in NPC_CHARACTERISTICS]).ravel()})
+        location_counts = pd.Series(self.facets.facet_counts('location', rows=rows), dtype=int)
+        if len(location_counts) > MAX_NPC_LOCATIONS:
+            other_count = location_counts.iloc[MAX_NPC_LOCATIONS:].sum()
+            location_counts = location_counts.iloc[:MAX_NPC_LOCATIONS]
+            if other_count > 0:
+                location_counts[OTHER_LABEL] = other_count
+        return characteristics, location_counts
+
+    def _locations(self, key):
+        """
+        Матрица персонажи x локации; при числе локаций больше MAX_LOCATIONS
+        редкие объединяются в столбец OTHER_LABEL
+
+        Returns:
+            tuple: (локации, имена персонажей, матрица) или None, если локаций нет
+        """
+        rows = np.array(key, dtype=np.int64)
+        location_counts = self.facets.facet_counts('location', rows=rows)
+        if not location_counts:
+            return None
+        locations = sorted(location_counts)
+        matrix = self.facets.value_matrix('location', rows, locations)
+        if len(locations) > MAX_LOCATIONS:
+            top_indices = np.argsort(matrix.sum(axis=0), kind='stable')[-MAX_LOCATIONS + 1:]
+            other = np.setdiff1d(np.arange(len(locations)), top_indices)
+            matrix = np.column_stack([matrix[:, top_indices], matrix[:, other].any(axis=1)]).astype(float)
+            locations = [locations[i] for i in top_indices] + [OTHER_LABEL]
+        return locations, self.names[rows].tolist(), matrix
+
+    def _radar(self, key):
+        """
+        Значения лепестковой диаграммы для первых MAX_RADAR выбранных персонажей:
+        здоровье, нормированное на максимум среди них, и флаги 0/1
+
+        Returns:
+            tuple: (имена, типы, матрица персонажи x RADAR_CATEGORIES, сколько персонажей отброшено)
+        """
+        rows = np.array(key[:MAX_RADAR], dtype=np.int64)
+        health = self.health_values[rows].astype(float)
+        if len(health) and health.max() > 0:
+            health = health / health.max()
+        values = np.column_stack([health] + [self.flags[field][rows].astype(float)
+                                             for field in RADAR_CATEGORIES[1:]])
+        return self.names[rows].tolist(), self.types[rows].tolist(), values, max(len(key) - MAX_RADAR, 0)
+
+
+class FigureCache:
+    """
+    Отрисованные фигуры matplotlib по ключу (график, выборка). Повторный
+    показ того же графика выводит готовую фигуру без перестроения.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.figures = OrderedDict()
+
+    def get(self, key):
+        figure = self.figures.get(key)
+        if figure is not None:
+            self.figures.move_to_end(key)
+        return figure
+
+    def put(self, key, figure):
+        self.figures[key] = figure
+        self.figures.move_to_end(key)
+        while len(self.figures) > self.size:
+            self.figures.popitem(last=False)
+
+    def clear(self):
+        self.figures.clear()
+
+
+class Debouncer:
+    """
+    Откладывает вызов func на delay секунд; новый вызов за это время
+    отменяет предыдущий, так что выполняется только последний (с его аргументами)
+    """
+
+    def __init__(self, func, delay=DEBOUNCE_DELAY):
+        self.func = func
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.delay, self.func, args, kwargs)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Отменяет ожидание (например, перед немедленным обновлением)"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
@@ -0,0 +1,258 @@
+"""
+Фасетный индекс набора персонажей для быстрой фильтрации в визуализации.
+
+Для каждого значения фасета (тип персонажа, флаги is_boss/is_npc/...,
+отдельные фракции, локации и роли) хранится множество строк: частые
+значения - битовой картой (по биту на персонажа, 64 персонажа в слове
+uint64), редкие - отсортированным списком номеров строк. Фильтр по
+нескольким фасетам сводится к AND/OR битовых карт и проверке битов для
+коротких списков, подсчет - к popcount, поэтому запросы не зависят от
+строковых операций pandas и остаются быстрыми на 100 тысячах персонажей.
+
+Пример:
+    index = FacetIndex.from_frame(df)
+    rows = index.filter(character_type='NPC', location='Siofra River', is_hostile=True)
+    index.count(character_type=['Boss', 'Mini-Boss'])
+    index.facet_counts('location', rows=rows)
+"""
+import numpy as np
+
+from rules import FLAG_FIELDS
+
+# Поля с одним значением на персонажа и многозначные поля (строки через запятую)
+SINGLE_FIELDS = ['character_type']
+VALUE_FIELDS = ['faction', 'location', 'role']
+
+# Значения, которые не индексируются (как и 'Unknown' в визуализации, они означают "нет данных")
+MISSING_VALUES = {'', 'Unknown', 'nan', 'None'}
+
+# Значение хранится битовой картой, если встречается хотя бы у 1/DENSE_RATIO персонажей,
+# иначе - списком строк (битовая карта редкого значения почти целиком из нулей)
+DENSE_RATIO = 32
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        return int(np.bitwise_count(words).sum())
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return int(_POPCOUNT_TABLE[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def split_values(value):
+    """Значения многозначного поля: список или строка через запятую (как в итоговых файлах)"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        items = value
+    elif value is None or value != value:
+        return []
+    else:
+        items = str(value).split(', ')
+    return [str(item).strip() for item in items if str(item).strip() not in MISSING_VALUES]
+
+
+class FacetIndex:
+    """
+    Инвертированный индекс: (фасет, значение) -> битовая карта или список строк.
+
+    Условия фильтра по разным фасетам объединяются через AND, несколько
+    значений одного фасета (список) - через OR; флаг со значением False
+    выбирает персонажей без флага. Результат - отсортированные номера строк
+    в том порядке, в каком строки были переданы при построении.
+    """
+
+    def __init__(self, names, fields):
+        """
+        Args:
+            names: имена персонажей по строкам
+            fields: {фасет: список значений по строкам}; для флагов - bool,
+                для многозначных полей - список значений или строка через запятую
+        """
+        self.names = list(names)
+        self.size = len(self.names)
+        self.words = (self.size + 63) // 64
+        self.name_rows = {}
+        for row, name in enumerate(self.names):
+            self.name_rows.setdefault(name, []).append(row)
+        self.all = self._bitmap(np.ones(self.size, dtype=bool))
+
+        self.postings = {}
+        self.totals = {}
+        for field, column in fields.items():
+            if field in FLAG_FIELDS:
+                mask = np.asarray(column, dtype=bool)
+                postings = {True: self._bitmap(mask), False: self._bitmap(~mask)}
+            else:
+                postings = self._value_postings(field, column)
+            self.postings[field] = postings
+            self.totals[field] = {value: self._size(posting) for value, posting in postings.items()}
+
+    @classmethod
+    def from_frame(cls, df, fields=None):
+        """Индекс по DataFrame набора персонажей (по умолчанию - все известные фасеты, что есть в df)"""
+        if fields is None:
+            fields = [field for field in SINGLE_FIELDS + FLAG_FIELDS + VALUE_FIELDS if field in df.columns]
+        return cls(df['name'].tolist(), {field: df[field].tolist() for field in fields})
+
+    @classmethod
+    def from_records(cls, records, fields=None):
+        """Индекс по списку записей (например, CharacterStore.records() или JSON)"""
+        records = list(records)
+        if fields is None:
+            fields = [field for field in SINGLE_FIELDS + FLAG_FIELDS + VALUE_FIELDS
+                      if records and field in records[0]]
+        return cls([record['name'] for record in records],
+                   {field: [record.get(field) for record in records] for field in fields})
+
+    def __len__(self):
+        return self.size
+
+    # Битовые карты: строка i - бит i % 64 слова i // 64
+
+    def _bitmap(self, mask):
+        packed = np.packbits(mask, bitorder='little')
+        words = np.zeros(self.words * 8, dtype=np.uint8)
+        words[:len(packed)] = packed
+        return words.view('<u8')
+
+    def _bitmap_from_rows(self, rows):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return self._bitmap(mask)
+
+    def _rows_from_bitmap(self, bitmap):
+        return np.flatnonzero(np.unpackbits(bitmap.view(np.uint8), bitorder='little', count=self.size))
+
+    @staticmethod
+    def _test(bitmap, rows):
+        """Для каждой строки из rows - установлен ли ее бит"""
+        shifts = (rows & 63).astype(np.uint64)
+        return ((bitmap[rows >> 6] >> shifts) & np.uint64(1)).astype(bool)
+
+    @staticmethod
+    def _is_bitmap(posting):
+        return posting.dtype == np.dtype('<u8')
+
+    def _size(self, posting):
+        return _popcount(posting) if self._is_bitmap(posting) else len(posting)
+
+    def _value_postings(self, field, column):
+        rows_by_value = {}
+        for row, value in enumerate(column):
+            values = split_values(value) if field in VALUE_FIELDS else split_values([value])
+            for item in values:
+                rows = rows_by_value.setdefault(item, [])
+                # Повтор значения у одного персонажа
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+        postings = {}
+        for value, rows in rows_by_value.items():
+            rows = np.array(rows, dtype=np.int64)
+            postings[value] = self._bitmap_from_rows(rows) if len(rows) * DENSE_RATIO >= self.size else rows
+        return postings
+
+    # Запросы
+
+    def _term(self, field, value):
+        """Множество строк одного условия: битовая карта или отсортированный массив строк"""
+        if field not in self.postings:
+            raise KeyError(f"Фасет {field} не проиндексирован")
+        postings = self.postings[field]
+        if field in FLAG_FIELDS:
+            return postings[bool(value)]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            found = [postings[item] for item in value if item in postings]
+            if not found:
+                return np.empty(0, dtype=np.int64)
+            if len(found) == 1:
+                return found[0]
+            if all(not self._is_bitmap(posting) for posting in found):
+                return np.unique(np.concatenate(found))
+            bitmap = np.zeros(self.words, dtype='<u8')
+            for posting in found:
+                bitmap |= posting if self._is_bitmap(posting) else self._bitmap_from_rows(posting)
+            return bitmap
+        return postings.get(value, np.empty(0, dtype=np.int64))
+
+    def _select(self, rows=None, **conditions):
+        """Пересечение условий; результат - битовая карта или массив строк"""
+        terms = [self._term(field, value) for field, value in conditions.items()]
+        if rows is not None:
+            terms.append(np.unique(np.asarray(rows, dtype=np.int64)))
+        lists = sorted((term for term in terms if not self._is_bitmap(term)), key=len)
+        bitmaps = [term for term in terms if self._is_bitmap(term)]
+        if not lists:
+            result = self.all.copy()
+            for bitmap in bitmaps:
+                result &= bitmap
+            return result
+        # Есть короткий список - перебираем его строки и проверяем биты остальных условий
+        result = lists[0]
+        for other in lists[1:]:
+            result = result[np.isin(result, other, assume_unique=True)]
+        for bitmap in bitmaps:
+            if not len(result):
+                break
+            result = result[self._test(bitmap, result)]
+        return result
+
+    def filter(self, rows=None, **conditions):
+        """
+        Номера строк персонажей, подходящих под все условия.
+
+        Args:
+            rows: ограничить выборку этими строками (например, выбранными персонажами)
+            conditions: фасет=значение, фасет=[значение, ...] или флаг=True/False
+        """
+        result = self._select(rows, **conditions)
+        return self._rows_from_bitmap(result) if self._is_bitmap(result) else result
+
+    def count(self, rows=None, **conditions):
+        """Число персонажей, подходящих под условия filter"""
+        return self._size(self._select(rows, **conditions))
+
+    def facet_counts(self, field, rows=None, **conditions):
+        """
+        Число персонажей по значениям фасета среди подходящих под условия,
+        по убыванию (значения без персонажей не включаются)
+
+        Returns:
+            dict: {значение: число персонажей}
+        """
+        if rows is None and not conditions:
+            counts = self.totals[field]
+        else:
+            selection = self._select(rows, **conditions)
+            counts = {}
+            if self._is_bitmap(selection):
+                for value, posting in self.postings[field].items():
+                    if self._is_bitmap(posting):
+                        counts[value] = _popcount(selection & posting)
+                    else:
+                        counts[value] = int(self._test(selection, posting).sum())
+            else:
+                for value, posting in self.postings[field].items():
+                    if self._is_bitmap(posting):
+                        counts[value] = int(self._test(posting, selection).sum())
+                    else:
+                        counts[value] = int(np.isin(selection, posting, assume_unique=True).sum())
+        return dict(sorted(((value, count) for value, count in counts.items() if count),
+                           key=lambda item: (-item[1], str(item[0]))))
+
+    def contains(self, field, value, rows):
+        """Для каждой из строк rows - есть ли у персонажа это значение фасета"""
+        rows = np.asarray(rows, dtype=np.int64)
+        posting = self._term(field, value)
+        if self._is_bitmap(posting):
+            return self._test(posting, rows)
+        return np.isin(rows, posting)
+
+    def value_matrix(self, field, rows, values):
+        """Матрица строки x значения фасета (1 - значение есть у персонажа), например для тепловой карты"""
+        return np.column_stack([self.contains(field, value, rows) for value in values]).astype(float) \
+            if len(values) else np.zeros((len(rows), 0))
+
+    def rows_for(self, names):
+        """Отсортированные номера строк персонажей с этими именами"""
+        rows = [row for name in set(names) for row in self.name_rows.get(name, [])]
+        return np.array(sorted(rows), dtype=np.int64)
@@ -0,0 +1,257 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+
+# HTTP/2 доступен через httpx с пакетом h2; без них используется пул соединений requests (HTTP/1.1 keep-alive)
+try:
+    import h2  # noqa: F401
+    import httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# urllib3 распаковывает brotli, если установлен brotli или brotlicffi
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate'
+
+# Таймауты (подключение, чтение), секунды
+REQUEST_TIMEOUT = (10, 30)
+
+# Ответы, после которых запрос повторяется; 429 и 503 также означают перегрузку сервера
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+OVERLOAD_STATUSES = {429, 503}
+
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+if HTTP2_AVAILABLE:
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов по алгоритму token bucket"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Блокирует поток, пока в ведре не появится свободный токен"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """Хранит отдельный token bucket для каждого хоста"""
+
+    def __init__(self, rate=2.0, burst=2):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+class AdaptiveConcurrency:
+    """
+    Ограничение числа одновременных запросов по схеме AIMD (как окно TCP).
+
+    Каждый быстрый успешный ответ увеличивает лимит на 1/лимит (примерно +1
+    за "окно" ответов), а ответ 429/503, сетевая ошибка или задержка выше
+    latency_target уменьшают лимит в decrease_factor раз - не чаще раза
+    в cooldown секунд, чтобы одна волна отказов не обрушила лимит до минимума.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, latency_target=2.0,
+                 decrease_factor=0.5, cooldown=1.0):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Блокирует поток, пока число запросов в работе не меньше текущего лимита"""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, overloaded=False):
+        """Освобождает место и корректирует лимит по результату запроса"""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded or latency > self.latency_target:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self.last_decrease = now
+                    METRICS.inc('concurrency_decreases')
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+class HttpClient:
+    """
+    Общий HTTP-клиент сборщика.
+
+    Соединения берутся из пула и переиспользуются (keep-alive; HTTP/2 через
+    httpx, если он установлен), запрашивается сжатие gzip/brotli. Сетевые
+    ошибки и ответы из RETRY_STATUSES повторяются с экспоненциальной задержкой
+    со случайным разбросом (full jitter) или по заголовку Retry-After.
+    Если передан concurrency (AdaptiveConcurrency), число одновременных
+    запросов подстраивается под задержки и ответы 429/503.
+    """
+
+    def __init__(self, headers=None, pool_size=16, max_retries=4, backoff_base=0.5, backoff_max=30.0,
+                 concurrency=None, timeout=REQUEST_TIMEOUT, http2=HTTP2_AVAILABLE):
+        self.headers = {'Accept-Encoding': ACCEPT_ENCODING, **(headers or {})}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if self.http2:
+            self.client = httpx.Client(http2=True, timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+                                       limits=httpx.Limits(max_connections=pool_size,
+                                                           max_keepalive_connections=pool_size),
+                                       follow_redirects=True)
+        else:
+            # Одна сессия на все потоки: пул urllib3 потокобезопасен и держит до pool_size соединений на хост
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=False)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    def _send(self, url, headers):
+        if self.http2:
+            return self.client.get(url, headers=headers)
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def backoff(self, attempt, response=None):
+        """Пауза перед повтором: Retry-After сервера или случайная в [0, base * 2^attempt]"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url, headers=None):
+        """
+        GET с повторами. Возвращает последний ответ (в том числе неуспешный, если
+        повторы кончились) или пробрасывает сетевую ошибку последней попытки
+        """
+        request_headers = {**self.headers, **(headers or {})}
+        attempt = 0
+        while True:
+            if self.concurrency is not None:
+                self.concurrency.acquire()
+            start = time.monotonic()
+            response = error = None
+            try:
+                response = self._send(url, request_headers)
+            except TRANSIENT_ERRORS as e:
+                error = e
+            finally:
+                if self.concurrency is not None:
+                    overloaded = response is None or response.status_code in OVERLOAD_STATUSES
+                    self.concurrency.release(time.monotonic() - start, overloaded)
+
+            if response is not None:
+                METRICS.inc('http_responses', status=str(response.status_code))
+                METRICS.inc('bytes_downloaded', len(response.content))
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            if attempt >= self.max_retries:
+                if response is not None:
+                    return response
+                raise error
+            METRICS.inc('retries', reason=str(response.status_code) if response is not None else type(error).__name__)
+            time.sleep(self.backoff(attempt, response))
+            attempt += 1
+
+    def close(self):
+        if self.http2:
+            self.client.close()
+        else:
+            self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def default_client():
+    """Клиент по умолчанию для вызовов fetch_page без явного client"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def fetch_page(url, headers=None, cache=None, client=None):
+    """
+    Загружает страницу и возвращает ее тело (bytes).
+
+    Если передан cache (ResponseCache), запрос отправляется с условными
+    заголовками, и при ответе 304 тело берется из кэша.
+    Время запроса, объем ответа, коды ответов и попадания в кэш учитываются в METRICS.
+    """
+    client = client or default_client()
+    request_headers = dict(headers or {})
+    if cache is not None:
+        request_headers.update(cache.conditional_headers(url))
+    with METRICS.timer('fetch'):
+        response = client.get(url, request_headers)
+        if response.status_code == 304 and cache is not None:
+            body, _ = cache.get(url)
+            if body is not None:
+                METRICS.inc('cache_hits')
+                return body
+            # Запись в кэше пропала между запросами - загружаем заново без условий
+            response = client.get(url, headers)
+        response.raise_for_status()
+    if cache is not None:
+        METRICS.inc('cache_misses')
+        cache.store(url, response)
+    return response.content
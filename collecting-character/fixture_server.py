@@ -0,0 +1,364 @@
+"""
+Локальная копия вики для проверки сборщика без обращения к fandom.
+
+Отдает одни и те же статьи двумя способами: HTML-страницами (/wiki/...,
+режим --source html) и через MediaWiki API (/api.php, режим --source api),
+поэтому результаты обоих режимов можно сравнить между собой.
+
+Запуск:
+    python fixture_server.py --port 8765
+    python collecting.py --wiki-url http://127.0.0.1:8765 --source api --limit 0
+
+Для проверки повторов и адаптивной загрузки сервер может имитировать
+перегрузку: --latency (задержка ответа), --error-rate (доля ответов 503)
+и --max-concurrency (429, если одновременных запросов больше лимита).
+"""
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from wikitext import find_infobox, link_labels, section_headers, text_lines, value_text
+
+# Статьи: название -> вики-разметка
+FIXTURE_PAGES = {
+    'Godrick the Grafted': """{{Infobox Boss
+|faction = [[The Golden Lineage]]
+|location = [[Stormveil Castle]]
+|role = Shardbearer, Demigod
+|health = 6,080
+}}
+'''Godrick the Grafted''' is a demigod boss and shardbearer. Defeat the boss to obtain his remembrance.
+== Moveset ==
+He attacks with an axe. Phase 2 begins at half health.
+== Strategy ==
+This boss is hostile and aggressive; fight him from the side.
+""",
+    'Margit, the Fell Omen': """{{Infobox Boss
+|location = [[Stormveil Castle]]
+|role = Boss
+|health = 4,174
+}}
+Margit is a legend among the enemies of Limgrave. This boss attacks on sight.
+== Strategies ==
+Summon an ally and fight near the gate.
+""",
+    'Ranni the Witch': """{{Infobox NPC
+|faction = [[Carian Royal Family]]
+|location = [[Three Sisters]]<br>[[Ranni's Rise]]
+|role = NPC, Questgiver
+}}
+Ranni is an NPC who offers assistance. Talk to her to start a quest.
+== Quest ==
+Her quest spans the whole game; the quest ends at the Moon. Continue the quest after each step.
+== Dialogue ==
+Dialogue options change during the quest.
+""",
+    'Kalé': """{{Infobox NPC
+|faction = [[Merchants]]
+|location = [[Church of Elleh]]
+|role = Merchant
+}}
+Kalé is a merchant and vendor who sells tools. He is friendly to player.
+== Shop ==
+Speak to him to open the shop.
+""",
+    'Tree Sentinel': """{{Infobox Boss
+|location = [[Limgrave]], [[Altus Plateau]]
+|role = Field Boss
+|health = 2,889
+}}
+The Tree Sentinel is a field boss mounted on horseback. An enemy boss guarding the road.
+""",
+    'Bloodhound Knight Darriwil': """{{Infobox Boss
+|location = [[Forlorn Hound Evergaol]]
+|role = Enemy Boss
+|health = 1,450
+}}
+Darriwil is fought inside an evergaol. He is a hostile mini-boss.
+""",
+    'Godrick Soldier': """{{Infobox Enemy
+|location = [[Stormveil Castle]]
+|health = 167
+}}
+A soldier found in Stormveil. Hostile enemy that attacks in groups.
+""",
+    'Melina': """{{Infobox NPC
+|faction = [[Finger Maidens]]
+|location = [[Church of Elleh]]
+|role = NPC, Ally
+}}
+Melina helps the player and offers assistance. Approach any site of grace.
+== Dialogue ==
+Her dialogue changes after each demigod is defeated.
+""",
+}
+
+# Номера последних ревизий статей; edit_page() создает новую ревизию
+FIXTURE_REVISIONS = {title: 1001 + i for i, title in enumerate(FIXTURE_PAGES)}
+
+# Редиректы: название -> цель
+FIXTURE_REDIRECTS = {
+    'Margit': 'Margit, the Fell Omen',
+}
+
+# Категории: название -> участники (статьи, редиректы и подкатегории)
+FIXTURE_CATEGORIES = {
+    'Category:Characters': ['Godrick the Grafted', 'Margit', 'Margit, the Fell Omen', 'Ranni the Witch',
+                            'Kalé', 'Melina', 'Category:Bosses', 'Template:Character'],
+    'Category:Bosses': ['Tree Sentinel', 'Bloodhound Knight Darriwil', 'Godrick Soldier', 'Godrick the Grafted'],
+}
+
+# Небольшие лимиты, чтобы сборщик проходил по продолжениям (continue) API
+CATEGORY_PAGE_SIZE = 4
+CONTENT_PAGE_SIZE = 3
+
+
+def edit_page(title, wikitext):
+    """Правка статьи (или создание новой): меняет текст и номер последней ревизии"""
+    FIXTURE_PAGES[title] = wikitext
+    FIXTURE_REVISIONS[title] = max(FIXTURE_REVISIONS.values(), default=1000) + 1
+
+
+def _wiki_path(title):
+    return '/wiki/' + quote(title.replace(' ', '_'), safe=";@$!*(),/~:")
+
+
+def _link_html(value):
+    labels = link_labels(value)
+    if labels:
+        return ''.join(f'<a href="{_wiki_path(label)}">{html.escape(label)}</a>' for label in labels)
+    return html.escape(value_text(value))
+
+
+def render_page(base_url, title, wikitext=None):
+    """HTML-страница статьи в разметке fandom (portable-infobox, mw-parser-output)"""
+    if wikitext is None:
+        wikitext = FIXTURE_PAGES[title]
+    infobox_html = ''
+    infobox = find_infobox(wikitext)
+    if infobox:
+        name, params = infobox
+        rows = ''.join(
+            f'<div data-source="{field}"><h3 class="pi-data-label">{field.title()}</h3>'
+            f'<div class="pi-data-value pi-font">{_link_html(value)}</div></div>'
+            for field, value in params.items())
+        infobox_html = f'<aside class="portable-infobox"><h2>{html.escape(title)}</h2>{rows}</aside>'
+
+    headers = set(section_headers(wikitext))
+    body = ''.join(f'<h2><span class="mw-headline">{html.escape(line)}</span></h2>' if line in headers
+                   else f'<p>{html.escape(line)}</p>' for line in text_lines(wikitext))
+    return (f'<html><head><title>{html.escape(title)}</title>'
+            f'<link rel="canonical" href="{base_url}{_wiki_path(title)}"></head>'
+            f'<body><main class="page__main"><div class="mw-parser-output">{infobox_html}{body}</div>'
+            f'</main></body></html>')
+
+
+def render_category(title):
+    links = ''.join(f'<a class="category-page__member-link" href="{_wiki_path(member)}">{html.escape(member)}</a>'
+                    for member in FIXTURE_CATEGORIES[title])
+    return f'<html><body><div class="category-page__members">{links}</div></body></html>'
+
+
+def _namespace(title):
+    if title.startswith('Category:'):
+        return 14
+    if title.startswith('Template:'):
+        return 10
+    return 0
+
+
+def api_query(params):
+    """Ответ на action=query в формате formatversion=2"""
+    if params.get('generator') == 'categorymembers':
+        titles = FIXTURE_CATEGORIES.get(params.get('gcmtitle'), [])
+        start = int(params.get('gcmcontinue', 0))
+        pages = []
+        for title in titles[start:start + CATEGORY_PAGE_SIZE]:
+            page = {'ns': _namespace(title), 'title': title, 'lastrevid': FIXTURE_REVISIONS.get(title, 1)}
+            if title in FIXTURE_REDIRECTS:
+                page['redirect'] = True
+            pages.append(page)
+        response = {'batchcomplete': True, 'query': {'pages': pages}}
+        if start + CATEGORY_PAGE_SIZE < len(titles):
+            response['continue'] = {'gcmcontinue': str(start + CATEGORY_PAGE_SIZE), 'continue': 'gcmcontinue||'}
+        return response
+
+    if 'list' in params:
+        members = [{'ns': _namespace(title), 'title': title}
+                   for title in FIXTURE_CATEGORIES.get(params.get('cmtitle'), [])]
+        start = int(params.get('cmcontinue', 0))
+        response = {'batchcomplete': True,
+                    'query': {'categorymembers': members[start:start + CATEGORY_PAGE_SIZE]}}
+        if start + CATEGORY_PAGE_SIZE < len(members):
+            response['continue'] = {'cmcontinue': str(start + CATEGORY_PAGE_SIZE), 'continue': '-||'}
+        return response
+
+    query = {'normalized': [], 'redirects': [], 'pages': []}
+    resolved = []
+    for title in params.get('titles', '').split('|'):
+        normalized = title.replace('_', ' ')
+        if normalized != title:
+            query['normalized'].append({'from': title, 'to': normalized})
+        if params.get('redirects') and normalized in FIXTURE_REDIRECTS:
+            query['redirects'].append({'from': normalized, 'to': FIXTURE_REDIRECTS[normalized]})
+            normalized = FIXTURE_REDIRECTS[normalized]
+        if normalized not in resolved:
+            resolved.append(normalized)
+
+    # Как и MediaWiki, отдаем содержимое не всех страниц сразу, а с продолжением rvcontinue
+    start = int(params.get('rvcontinue', 0))
+    for i, title in enumerate(resolved):
+        if title not in FIXTURE_PAGES:
+            query['pages'].append({'ns': _namespace(title), 'title': title, 'missing': True})
+            continue
+        page = {'pageid': list(FIXTURE_PAGES).index(title) + 1, 'ns': 0, 'title': title}
+        if start <= i < start + CONTENT_PAGE_SIZE:
+            page['revisions'] = [{'revid': FIXTURE_REVISIONS[title],
+                                  'slots': {'main': {'contentmodel': 'wikitext',
+                                                     'content': FIXTURE_PAGES[title]}}}]
+        query['pages'].append(page)
+    response = {'query': query}
+    if start + CONTENT_PAGE_SIZE < len(resolved):
+        response['continue'] = {'rvcontinue': str(start + CONTENT_PAGE_SIZE), 'continue': '||'}
+    else:
+        response['batchcomplete'] = True
+    return response
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """HTTP-сервер со счетчиками запросов и имитацией перегрузки"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, max_concurrency=0, seed=0):
+        super().__init__(('127.0.0.1', port), FixtureHandler)
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.bytes_sent = 0
+        self.rejected = {}
+
+    def enter(self):
+        """Учитывает запрос; возвращает код отказа (429/503) или None"""
+        with self.lock:
+            self.request_count += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.max_concurrency and self.in_flight > self.max_concurrency:
+                status = 429
+            elif self.error_rate and self.random.random() < self.error_rate:
+                status = 503
+            else:
+                return None
+            self.rejected[status] = self.rejected.get(status, 0) + 1
+            return status
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        rejected = self.server.enter()
+        try:
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            if rejected:
+                return self._send(rejected, 'Overloaded', 'text/plain', {'Retry-After': '0'})
+            self._handle()
+        finally:
+            self.server.leave()
+
+    def _handle(self):
+        parts = urlsplit(self.path)
+        base_url = f'http://{self.headers.get("Host")}'
+        if parts.path == '/api.php':
+            params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            if params.get('action') != 'query':
+                return self._send(200, json.dumps({'error': {'code': 'badvalue', 'info': 'unsupported action'}}),
+                                  'application/json')
+            return self._send(200, json.dumps(api_query(params)), 'application/json')
+
+        title = unquote(parts.path[len('/wiki/'):]).replace('_', ' ') if parts.path.startswith('/wiki/') else ''
+        title = FIXTURE_REDIRECTS.get(title, title)
+        if title in FIXTURE_CATEGORIES:
+            return self._send(200, render_category(title), 'text/html')
+        if title in FIXTURE_PAGES:
+            return self._send(200, render_page(base_url, title), 'text/html')
+        self._send(404, 'Not found', 'text/plain')
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        data = body.encode('utf-8')
+        # ETag позволяет проверить условную ревалидацию через кэш ответов (304 Not Modified)
+        etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', content_type + '; charset=utf-8')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            data = gzip.compress(data)
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.bytes_sent += len(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(port=0, **faults):
+    """
+    Запускает сервер в фоновом потоке. Адрес - server.url, счетчики -
+    server.request_count, server.peak_in_flight, server.rejected
+    """
+    server = FixtureServer(port, **faults)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальная вики с тестовыми статьями (HTML и MediaWiki API)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка каждого ответа, секунды')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля случайных ответов 503')
+    parser.add_argument('--max-concurrency', type=int, default=0,
+                        help='отвечать 429, если одновременных запросов больше (0 - без ограничения)')
+    args = parser.parse_args()
+    server = FixtureServer(args.port, latency=args.latency, error_rate=args.error_rate,
+                           max_concurrency=args.max_concurrency)
+    print(f"Вики доступна по адресу {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Обработано запросов: {server.request_count}, отказов: {server.rejected}, "
+          f"максимум одновременных: {server.peak_in_flight}")
+
+
+if __name__ == '__main__':
+    main()
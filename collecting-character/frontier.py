@@ -0,0 +1,115 @@
+import re
+import sqlite3
+import time
+from urllib.parse import urldefrag
+
+CANONICAL_RE = re.compile(rb'<link[^>]+rel=["\']canonical["\'][^>]*>', re.IGNORECASE)
+HREF_RE = re.compile(rb'href=["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+def normalize_url(url):
+    """Приводит URL к единому виду для дедупликации"""
+    url, _ = urldefrag(url.strip())
+    return url
+
+
+def canonical_url(content):
+    """Извлекает canonical URL из HTML страницы (с учетом редиректов вики)"""
+    tag = CANONICAL_RE.search(content)
+    if tag:
+        href = HREF_RE.search(tag.group(0))
+        if href:
+            return normalize_url(href.group(1).decode('utf-8', 'replace'))
+    return None
+
+
+class CrawlFrontier:
+    """
+    Очередь обхода, сохраняемая в SQLite.
+
+    Для каждого URL хранится тип (category/character), состояние
+    (pending, fetched, failed, duplicate), приоритет и число попыток,
+    поэтому обход можно прерывать и продолжать по частям.
+    """
+
+    def __init__(self, path='crawl_frontier.sqlite', reset=False, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path)
+        if reset:
+            self.conn.execute('DROP TABLE IF EXISTS urls')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                name TEXT,
+                kind TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                priority INTEGER NOT NULL DEFAULT 0,
+                depth INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                canonical_url TEXT,
+                error TEXT,
+                updated_at REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_queue ON urls (kind, state, priority DESC)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_canonical ON urls (canonical_url)')
+        self.conn.commit()
+
+    def add(self, url, name=None, kind='character', priority=0, depth=0):
+        """Добавляет URL в очередь; повторно добавленные URL игнорируются"""
+        cursor = self.conn.execute(
+            'INSERT OR IGNORE INTO urls (url, name, kind, priority, depth, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (normalize_url(url), name, kind, priority, depth, time.time())
+        )
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def next_batch(self, kind, limit=None):
+        """Возвращает ожидающие URL заданного типа в порядке приоритета"""
+        query = ('SELECT url, name, depth FROM urls WHERE kind = ? AND state = ? '
+                 'ORDER BY priority DESC, rowid')
+        params = [kind, 'pending']
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [{'url': url, 'name': name, 'depth': depth}
+                for url, name, depth in self.conn.execute(query, params)]
+
+    def mark_fetched(self, url, canonical=None):
+        """
+        Отмечает URL как загруженный.
+
+        Если canonical URL уже был получен по другой ссылке (редирект),
+        запись помечается как duplicate и функция возвращает False.
+        """
+        url = normalize_url(url)
+        canonical = normalize_url(canonical) if canonical else url
+        duplicate = self.conn.execute(
+            'SELECT 1 FROM urls WHERE state = ? AND url != ? AND (canonical_url = ? OR url = ?) LIMIT 1',
+            ('fetched', url, canonical, canonical)
+        ).fetchone()
+        state = 'duplicate' if duplicate else 'fetched'
+        self.conn.execute(
+            'UPDATE urls SET state = ?, canonical_url = ?, error = NULL, updated_at = ? WHERE url = ?',
+            (state, canonical, time.time(), url)
+        )
+        self.conn.commit()
+        return not duplicate
+
+    def mark_failed(self, url, error):
+        """Увеличивает счетчик попыток; после max_attempts URL считается failed"""
+        self.conn.execute(
+            '''UPDATE urls SET attempts = attempts + 1, error = ?, updated_at = ?,
+                   state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+               WHERE url = ?''',
+            (str(error), time.time(), self.max_attempts, normalize_url(url))
+        )
+        self.conn.commit()
+
+    def stats(self):
+        """Количество URL по типам и состояниям"""
+        return {(kind, state): count for kind, state, count in self.conn.execute(
+            'SELECT kind, state, COUNT(*) FROM urls GROUP BY kind, state')}
+
+    def close(self):
+        self.conn.close()
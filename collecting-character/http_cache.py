@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class ResponseCache:
+    """
+    Дисковый кэш HTTP-ответов с ключом по URL.
+
+    Для каждого URL хранится тело ответа и метаданные (ETag, Last-Modified),
+    по которым при следующем запросе выполняется условная ревалидация:
+    если страница не менялась, сервер отвечает 304 и тело берется из кэша.
+    """
+
+    def __init__(self, directory='http_cache'):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.body', base + '.json'
+
+    def get(self, url):
+        """Возвращает (тело, метаданные) или (None, None), если URL не закэширован"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, None
+
+    def meta(self, url):
+        """Метаданные ответа (ETag, Last-Modified) без чтения тела или None"""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url):
+        """Заголовки If-None-Match / If-Modified-Since для ревалидации (тело читается только после 304)"""
+        meta = self.meta(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Сохраняет ответ, если сервер прислал ETag или Last-Modified"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        body_path, meta_path = self._paths(url)
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified}
+        with self.lock:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            # Пишем во временные файлы и переименовываем, чтобы не оставить битую запись
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(response.content)
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(body_path + '.tmp', body_path)
+            os.replace(meta_path + '.tmp', meta_path)
@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+
+
+def iter_journal(path):
+    """Потоково читает записи журнала, пропуская оборванную последнюю строку"""
+    if not os.path.exists(path):
+        return
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # При повторной обработке URL оставляем первую запись
+            if record.get('url') in seen:
+                continue
+            seen.add(record.get('url'))
+            yield record
+
+
+def rewrite_journal(path, records):
+    """Атомарно заменяет журнал новым набором записей"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointJournal:
+    """
+    Журнал обработанных персонажей в формате JSONL (одна запись на строку).
+
+    Каждая запись дописывается в конец файла сразу после классификации
+    персонажа, поэтому при сбое теряется не больше одной страницы.
+    """
+
+    def __init__(self, path='elden_ring_characters.jsonl', resume=False):
+        self.path = path
+        self.lock = threading.Lock()
+        if not resume and os.path.exists(path):
+            # Новый запуск без возобновления начинает журнал с чистого листа
+            os.remove(path)
+        self.file = open(path, 'a', encoding='utf-8')
+        if self.file.tell() > 0:
+            # Если прошлый запуск оборвался посреди строки, начинаем с новой
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self.file.write('\n')
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def iter_records(self):
+        return iter_journal(self.path)
+
+    def completed_urls(self):
+        """Множество URL, уже записанных в журнал"""
+        return {record['url'] for record in self.iter_records()}
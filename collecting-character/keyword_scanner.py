@@ -0,0 +1,90 @@
+from collections import deque
+
+# C-реализация автомата Ахо-Корасик используется, если установлена (pip install pyahocorasick)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordScanner:
+    """
+    Многошаблонный поиск ключевых слов по алгоритму Ахо-Корасик.
+
+    Автомат строится один раз по всему набору шаблонов, после чего за один
+    линейный проход по тексту находятся все вхождения всех шаблонов
+    (включая перекрывающиеся), поэтому стоимость поиска не зависит от
+    количества правил.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = sorted(set(patterns))
+        if AHOCORASICK_AVAILABLE:
+            self.automaton = ahocorasick.Automaton()
+            for pattern in self.patterns:
+                self.automaton.add_word(pattern, pattern)
+            self.automaton.make_automaton()
+        else:
+            self.automaton = None
+            self._build()
+
+    def _build(self):
+        # Бор шаблонов: переходы, выходы (шаблоны, заканчивающиеся в состоянии)
+        goto = [{}]
+        output = [[]]
+        for pattern in self.patterns:
+            state = 0
+            for ch in pattern:
+                if ch not in goto[state]:
+                    goto.append({})
+                    output.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            output[state].append(pattern)
+
+        # Суффиксные ссылки и выходы вычисляются обходом бора в ширину
+        fail = [0] * len(goto)
+        order = []
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                link = fail[state]
+                while link and ch not in goto[link]:
+                    link = fail[link]
+                fail[nxt] = goto[link].get(ch, 0)
+                output[nxt] = output[nxt] + output[fail[nxt]]
+
+        # Достраиваем переходы до полного автомата, чтобы при сканировании
+        # на каждый символ приходился один поиск в словаре
+        for state in order:
+            for ch, nxt in goto[fail[state]].items():
+                goto[state].setdefault(ch, nxt)
+        self.goto = goto
+        self.output = output
+
+    def iter(self, text):
+        """Возвращает пары (индекс последнего символа, шаблон) для всех вхождений"""
+        if self.automaton is not None:
+            if len(self.automaton):
+                yield from self.automaton.iter(text)
+            return
+        goto = self.goto
+        output = self.output
+        root = goto[0]
+        state = 0
+        for i, ch in enumerate(text):
+            state = goto[state].get(ch) or root.get(ch, 0)
+            if output[state]:
+                for pattern in output[state]:
+                    yield i, pattern
+
+    def count(self, text):
+        """Количество вхождений каждого шаблона (для отсутствующих - 0)"""
+        counts = dict.fromkeys(self.patterns, 0)
+        for _, pattern in self.iter(text):
+            counts[pattern] += 1
+        return counts
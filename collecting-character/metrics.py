@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Стадии сбора в порядке прохождения страницы
+STAGES = ['fetch', 'parse', 'extract', 'classify', 'write']
+
+PREFIX = 'scraper'
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как histogram в Prometheus)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Пары (граница, число наблюдений <= границы), последняя граница - +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((float('inf'), self.count))
+        return result
+
+    def quantile(self, q):
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """
+    Потокобезопасный набор метрик сбора: счетчики с метками и гистограммы
+    задержек по стадиям. Выгружается в текстовом формате Prometheus или в JSON.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def value(self, name, **labels):
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def total(self, name):
+        """Сумма счетчика по всем меткам"""
+        return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def cache_hit_ratio(self):
+        hits = self.value('cache_hits')
+        requests = hits + self.value('cache_misses')
+        return hits / requests if requests else 0.0
+
+    def summary(self):
+        """Сводка в виде словаря (для JSON)"""
+        with self.lock:
+            stages = {}
+            for stage in sorted(self.histograms, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+                histogram = self.histograms[stage]
+                stages[stage] = {
+                    'count': histogram.count,
+                    'seconds': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'buckets': {('+Inf' if bound == float('inf') else str(bound)): total
+                                for bound, total in histogram.cumulative()},
+                }
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                label = ','.join(f'{key}={val}' for key, val in labels)
+                counters[f'{name}{{{label}}}' if label else name] = value
+        return {
+            'elapsed_seconds': round(time.time() - self.started, 3),
+            'stages': stages,
+            'counters': counters,
+            'cache_hit_ratio': round(self.cache_hit_ratio(), 4),
+        }
+
+    def to_prometheus(self):
+        """Текстовый формат Prometheus (для node_exporter textfile collector)"""
+        lines = [f'# HELP {PREFIX}_stage_seconds Время обработки страницы на стадии сбора',
+                 f'# TYPE {PREFIX}_stage_seconds histogram']
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                for bound, total in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {total}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f'# TYPE {PREFIX}_{name}_total counter')
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter != name:
+                        continue
+                    label = ','.join(f'{key}="{val}"' for key, val in labels)
+                    lines.append(f'{PREFIX}_{name}_total{{{label}}} {value}' if label
+                                 else f'{PREFIX}_{name}_total {value}')
+        lines.append(f'# TYPE {PREFIX}_cache_hit_ratio gauge')
+        lines.append(f'{PREFIX}_cache_hit_ratio {self.cache_hit_ratio():.4f}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Сохраняет метрики: *.json - сводка в JSON, иначе - текстовый формат Prometheus"""
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                json.dump(self.summary(), f, ensure_ascii=False, indent=4)
+            else:
+                f.write(self.to_prometheus())
+        # Сборщик метрик не должен увидеть наполовину записанный файл
+        os.replace(path + '.tmp', path)
+
+    def print_summary(self):
+        summary = self.summary()
+        print("Стадии сбора (число, всего с, p50 с, p95 с):")
+        for stage, stats in summary['stages'].items():
+            print(f"  {stage:<9} {stats['count']:>6} {stats['seconds']:>10.3f} {stats['p50']:>7} {stats['p95']:>7}")
+        print(f"Загружено {self.value('bytes_downloaded') / 2 ** 20:.2f} МБ, "
+              f"попаданий в кэш {summary['cache_hit_ratio']:.0%}, "
+              f"ответов 429: {self.value('http_responses', status='429')}, повторов: {self.total('retries')}")
+
+
+# Общий набор метрик процесса сбора
+METRICS = Metrics()
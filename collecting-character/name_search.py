@@ -0,0 +1,197 @@
+"""
+Нечеткий поиск персонажей по имени.
+
+Имена и их сокращения (часть до запятой: "Adan" для "Adan, Thief of Fire")
+приводятся к нижнему регистру без диакритики и раскладываются на
+триграммы. Индекс триграмма -> имена хранится в CSR-виде (отсортированные
+триграммы, смещения, плоский массив номеров) и сохраняется рядом с
+набором данных, поэтому в блокноте он не строится заново. Запрос ранжирует
+имена по совпадению начала (префиксу) и по доле общих триграмм, так что
+находятся и имена с опечатками.
+
+Пример:
+    index = NameIndex.load('elden_ring_characters.names.npz')
+    index.search('malenia blade', limit=5)
+"""
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Минимальная доля общих триграмм (коэффициент Жаккара) для нечеткого совпадения - как порог pg_trgm
+MIN_SCORE = 0.3
+
+# Сколько имен с подходящим началом рассматривается при коротком запросе
+PREFIX_CANDIDATES = 1000
+
+NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def normalize_name(text):
+    """Нижний регистр без диакритики и знаков препинания: 'Kalé, the Merchant' -> 'kale the merchant'"""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return NON_WORD_RE.sub(' ', text.casefold()).strip()
+
+
+def trigrams(text):
+    """Триграммы нормализованной строки с отступами (начало строки весит больше)"""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_aliases(name):
+    """Сокращенные формы имени: часть до запятой ('Margit, the Fell Omen' -> 'Margit')"""
+    aliases = []
+    if ', ' in name:
+        aliases.append(name.split(', ', 1)[0])
+    return aliases
+
+
+class NameIndex:
+    """Триграммный индекс имен персонажей с префиксным и нечетким поиском"""
+
+    def __init__(self, names=None, aliases=None):
+        """
+        Args:
+            names: имена персонажей
+            aliases: {имя: [другие названия, например редиректы вики]}
+        """
+        if names is None:
+            return
+        names = list(names)
+        aliases = aliases or {}
+        terms, owners = [], []
+        for owner, name in enumerate(names):
+            seen = set()
+            for variant in [name] + name_aliases(name) + list(aliases.get(name, [])):
+                term = normalize_name(variant)
+                if term and term not in seen:
+                    seen.add(term)
+                    terms.append(term)
+                    owners.append(owner)
+        # Строки хранятся в UTF-8 (dtype S): вчетверо компактнее UCS-4 и так же сортируются
+        self.names = np.array([name.encode('utf-8') for name in names], dtype='S')
+        encoded = np.array([term.encode('utf-8') for term in terms], dtype='S')
+        order = np.argsort(encoded, kind='stable')
+        self.terms = encoded[order]
+        self.owners = np.array(owners, dtype=np.int32)[order]
+        self.term_lengths = np.char.str_len(self.terms).astype(np.int32)
+
+        postings = {}
+        sizes = np.zeros(len(self.terms), dtype=np.int32)
+        for term_id, term in enumerate(self.terms.tolist()):
+            grams = trigrams(term.decode('utf-8'))
+            sizes[term_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram.encode('utf-8'), []).append(term_id)
+        self.term_sizes = sizes
+        self.grams = np.array(sorted(postings), dtype='S')
+        lengths = np.array([len(postings[gram]) for gram in self.grams.tolist()], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self.postings = np.array([term_id for gram in self.grams.tolist() for term_id in postings[gram]],
+                                 dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def save(self, path):
+        """Сохраняет индекс в .npz (без pickle); запись атомарная"""
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, version=np.array(FORMAT_VERSION), names=self.names, terms=self.terms,
+                 owners=self.owners, term_lengths=self.term_lengths, term_sizes=self.term_sizes, grams=self.grams,
+                 offsets=self.offsets, postings=self.postings)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Загружает индекс, сохраненный save(); при другой версии формата - ValueError"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != FORMAT_VERSION:
+                raise ValueError(f"Индекс имен {path}: неподдерживаемая версия {int(data['version'])}")
+            index = cls()
+            for field in ('names', 'terms', 'owners', 'term_lengths', 'term_sizes', 'grams', 'offsets', 'postings'):
+                setattr(index, field, data[field])
+        return index
+
+    @classmethod
+    def load_or_build(cls, path, names):
+        """Индекс из файла, если он есть и построен для тех же имен, иначе - новый (и сохраняется)"""
+        names = list(names)
+        if os.path.exists(path):
+            try:
+                index = cls.load(path)
+                if [name.decode('utf-8') for name in index.names.tolist()] == names:
+                    return index
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Индекс имен {path} не прочитан: {e}")
+        index = cls(names)
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Не удалось сохранить индекс имен {path}: {e}")
+        return index
+
+    def search(self, query, limit=10, min_score=MIN_SCORE):
+        """
+        Имена, похожие на запрос, по убыванию оценки: сначала имена
+        (или их сокращения), начинающиеся с запроса, - короткие выше, затем
+        нечеткие совпадения по доле общих триграмм
+
+        Returns:
+            list: [(имя, оценка)]; оценка > 1 - совпадение по префиксу
+        """
+        query = normalize_name(query)
+        if not query or not len(self.terms):
+            return []
+        term_ids, scores = [], []
+
+        # Префикс: диапазон в отсортированном массиве имен (UTF-8 сохраняет порядок символов)
+        key = query.encode('utf-8')
+        lo = int(np.searchsorted(self.terms, key, side='left'))
+        hi = int(np.searchsorted(self.terms, key + b'\xff', side='left'))
+        hi = min(hi, lo + PREFIX_CANDIDATES)
+        if hi > lo:
+            term_ids.append(np.arange(lo, hi))
+            scores.append(1.0 + len(key) / self.term_lengths[lo:hi])
+
+        # Нечеткое совпадение: число общих триграмм по спискам индекса
+        grams = np.array(sorted(gram.encode('utf-8') for gram in trigrams(query)), dtype='S')
+        positions = np.searchsorted(self.grams, grams)
+        found = positions < len(self.grams)
+        found[found] = self.grams[positions[found]] == grams[found]
+        positions = positions[found]
+        if len(positions):
+            # Жаккар >= min_score требует не меньше need общих триграмм, поэтому кандидаты
+            # берутся только из самых коротких списков, а длинные списки лишь проверяются
+            need = max(1, int(np.ceil(min_score * len(grams))))
+            probes = len(grams) - need + 1 - (len(grams) - len(positions))
+            positions = positions[np.argsort(self.offsets[positions + 1] - self.offsets[positions], kind='stable')]
+            if probes > 0:
+                candidates, shared = np.unique(np.concatenate(
+                    [self.postings[self.offsets[i]:self.offsets[i + 1]] for i in positions[:probes]]),
+                    return_counts=True)
+                for i in positions[probes:]:
+                    # Списки отсортированы по номеру имени - проверка двоичным поиском
+                    posting = self.postings[self.offsets[i]:self.offsets[i + 1]]
+                    found = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                    shared += posting[found] == candidates
+                jaccard = shared / (len(grams) + self.term_sizes[candidates] - shared)
+                good = jaccard >= min_score
+                term_ids.append(candidates[good])
+                scores.append(jaccard[good])
+
+        if not term_ids:
+            return []
+        term_ids = np.concatenate(term_ids)
+        scores = np.concatenate(scores)
+        # Лучшая оценка среди имени и его сокращений
+        order = np.lexsort((term_ids, -scores))
+        owners = self.owners[term_ids[order]]
+        _, first = np.unique(owners, return_index=True)
+        best = order[np.sort(first)][:limit]
+        return [(self.names[owner].decode('utf-8'), round(float(score), 4))
+                for owner, score in zip(self.owners[term_ids[best]].tolist(), scores[best].tolist())]
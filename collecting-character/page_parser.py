@@ -0,0 +1,56 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Быстрый парсер на C (lxml) используется, если установлен; иначе - встроенный html.parser
+try:
+    import lxml  # noqa: F401
+    PARSER_BACKEND = 'lxml'
+except ImportError:
+    PARSER_BACKEND = 'html.parser'
+
+# Тело статьи на fandom: внутри него находятся infobox, заголовки h2/h3 и текст.
+# Навигация, реклама, комментарии и подвал страницы в дерево не попадают
+ARTICLE_STRAINER = SoupStrainer(class_='mw-parser-output')
+
+# Начало открывающего тега тела статьи (имя класса может стоять среди других классов)
+ARTICLE_START_RE = re.compile(rb'<[a-z]+\s[^<>]*class=["\'][^"\'<>]*\bmw-parser-output\b', re.IGNORECASE)
+
+# На странице категории нужны только ссылки на участников и пагинация
+CATEGORY_STRAINER = SoupStrainer('a', class_=['category-page__member-link', 'category-page__pagination-next'])
+
+
+def article_slice(content):
+    """
+    Отрезает от страницы все, что находится до тела статьи (head со скриптами
+    и стилями, шапка сайта), чтобы парсер не токенизировал лишний HTML.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    match = ARTICLE_START_RE.search(content)
+    if not match:
+        return None
+    # Страницы fandom всегда в UTF-8; meta charset остается в отрезанной части
+    return content[match.start():].decode('utf-8', 'replace')
+
+
+def make_soup(content, parse_only=None, backend=None):
+    """Строит дерево BeautifulSoup выбранным парсером, при необходимости - только для части страницы"""
+    return BeautifulSoup(content, backend or PARSER_BACKEND, parse_only=parse_only)
+
+
+def parse_character_page(content, targeted=True, backend=None):
+    """
+    Разбирает страницу персонажа.
+
+    При targeted=True парсер получает страницу начиная с тела статьи
+    и строит дерево только для div.mw-parser-output. Если на странице нет
+    такого блока (нестандартная разметка), страница разбирается целиком.
+    """
+    if targeted:
+        article = article_slice(content)
+        if article is not None:
+            soup = make_soup(article, parse_only=ARTICLE_STRAINER, backend=backend)
+            if soup.find(class_='mw-parser-output') is not None:
+                return soup
+    return make_soup(content, backend=backend)
@@ -0,0 +1,103 @@
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+
+# Маркер окончания потока данных между стадиями
+_DONE = object()
+
+
+def run_pipeline(items, fetch, process, fetch_workers=8, process_workers=None, queue_size=32):
+    """
+    Конвейер загрузка -> обработка -> запись с ограниченными очередями.
+
+    Стадия загрузки: fetch_workers потоков вызывают fetch(item) и кладут
+    результат в очередь размера queue_size. Стадия обработки: пул из
+    process_workers процессов вызывает process(item, content) (при
+    process_workers=0 обработка идет в потоке диспетчера). Стадия записи -
+    вызывающий код, который перебирает результаты генератора.
+
+    Если обработка или запись не успевают, очереди заполняются и
+    предыдущая стадия блокируется, поэтому в памяти одновременно находится
+    не больше 2 * queue_size страниц.
+
+    Yields:
+        tuple: (элемент, результат process или None, ошибка или None) в порядке завершения
+    """
+    items = iter(items)
+    items_lock = threading.Lock()
+    fetched = queue.Queue(maxsize=queue_size)
+    processed = queue.Queue()
+    # Число обрабатываемых, но еще не прочитанных записью результатов
+    in_flight = threading.BoundedSemaphore(queue_size)
+    stop = threading.Event()
+
+    def fetch_worker():
+        while not stop.is_set():
+            with items_lock:
+                item = next(items, _DONE)
+            if item is _DONE:
+                break
+            try:
+                fetched.put((item, fetch(item), None))
+            except Exception as e:
+                fetched.put((item, None, e))
+        fetched.put(_DONE)
+
+    def on_processed(item, future):
+        error = future.exception()
+        processed.put((item, None if error else future.result(), error))
+
+    def dispatcher():
+        finished_fetchers = 0
+        futures = set()
+        executor = ProcessPoolExecutor(process_workers) if process_workers != 0 else None
+        try:
+            while finished_fetchers < fetch_workers:
+                entry = fetched.get()
+                if entry is _DONE:
+                    finished_fetchers += 1
+                    continue
+                item, content, error = entry
+                in_flight.acquire()
+                if stop.is_set():
+                    in_flight.release()
+                    continue
+                if error is not None:
+                    processed.put((item, None, error))
+                elif executor is None:
+                    try:
+                        processed.put((item, process(item, content), None))
+                    except Exception as e:
+                        processed.put((item, None, e))
+                else:
+                    future = executor.submit(process, item, content)
+                    future.add_done_callback(lambda f, item=item: on_processed(item, f))
+                    futures.add(future)
+                    futures = {f for f in futures if not f.done()}
+            wait(futures)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=stop.is_set())
+            processed.put(_DONE)
+
+    threads = [threading.Thread(target=fetch_worker, daemon=True) for _ in range(fetch_workers)]
+    threads.append(threading.Thread(target=dispatcher, daemon=True))
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            entry = processed.get()
+            if entry is _DONE:
+                break
+            in_flight.release()
+            yield entry
+    finally:
+        # Генератор закрыт досрочно (ошибка записи, Ctrl+C) - останавливаем стадии
+        stop.set()
+        # Освобождаем диспетчер, если он ждет места в конвейере
+        for _ in range(queue_size):
+            try:
+                in_flight.release()
+            except ValueError:
+                break
@@ -0,0 +1,42 @@
+import argparse
+import time
+
+from character_store import STORE_PATH, CharacterStore
+from collecting import FEATURES_PATH, JOURNAL_PATH, export_dataset, print_summary, snapshot_dataset
+from journal import iter_journal, rewrite_journal
+from rules import DEFAULT_RULES, FeatureMatrix, classify_features, load_rules
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Переклассификация персонажей по сохраненным признакам страниц без обращения к вики')
+    parser.add_argument('--rules', help='JSON-файл с таблицей правил (разделы scores, flags, types ...)')
+    parser.add_argument('--features', default=FEATURES_PATH, help='журнал признаков страниц (JSONL)')
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
+
+    features = list(iter_journal(args.features))
+    if not features:
+        print(f"Нет сохраненных признаков в {args.features}. Сначала запустите collecting.py")
+        return
+
+    matrix = FeatureMatrix(features)
+    start = time.perf_counter()
+    records = classify_features(matrix, rules)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Переклассифицировано {len(records)} персонажей за {elapsed:.1f} мс")
+
+    # Журнал записей обновляется целиком, чтобы --resume и следующие выгрузки видели новые типы
+    rewrite_journal(JOURNAL_PATH, records)
+    with CharacterStore(STORE_PATH) as store:
+        store.replace(records, [f.get('values') for f in features])
+
+    counts = export_dataset(records)
+    print("Найдено:")
+    print_summary(counts)
+    snapshot_dataset(records)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+import hashlib
+import json
+
+import numpy as np
+
+# Ключевые слова, по которым классифицируются персонажи
+BOSS_KEYWORDS = ['boss', 'demigod', 'shardbearer', 'remembrance', 'great enemy', 'legend']
+BOSS_SECTIONS = ['moveset', 'strategy', 'strategies', 'phases', 'attacks']
+MINIBOSS_KEYWORDS = ['mini-boss', 'miniboss', 'field boss', 'dungeon boss', 'evergaol', 'enemy boss']
+NPC_KEYWORDS = ['merchant', 'vendor', 'shopkeeper', 'questgiver', 'blacksmith', 'resident', 'ally']
+SERVICE_TERMS = ['sells', 'offers', 'shop', 'service']
+INTERACTION_TERMS = ['speak to', 'talk to', 'interact with', 'approach']
+HOSTILE_WORDS = ['hostile', 'enemy', 'invader', 'attacks', 'fight', 'aggro', 'aggressive']
+FRIENDLY_WORDS = ['friendly', 'ally', 'merchant', 'vendor', 'helps', 'quest', 'assistance']
+TEXT_PHRASES = ['this boss', 'defeat the boss', 'dialogue', 'dialog', 'phase',
+                'attack on sight', 'hostile to player', 'friendly to player', 'offers assistance']
+
+# Все слова, счетчики которых сохраняются в признаках страницы
+ALL_KEYWORDS = (BOSS_KEYWORDS + MINIBOSS_KEYWORDS + NPC_KEYWORDS + SERVICE_TERMS +
+                INTERACTION_TERMS + HOSTILE_WORDS + FRIENDLY_WORDS + TEXT_PHRASES)
+
+# Таблица правил классификации. Условия записаны списками, чтобы таблицу
+# можно было целиком переопределить JSON-файлом (см. load_rules):
+#   ['each_present', [слова]]          - число найденных на странице слов
+#   ['any_present', [слова]]           - найдено ли хотя бы одно слово
+#   ['count', [слова]]                 - суммарное число вхождений слов
+#   ['role_any', [слова]]              - есть ли слово в роли из infobox
+#   ['each_present_and_in_role', [...]]- число слов, найденных и на странице, и в роли
+#   ['feature', имя]                   - значение признака, очков или флага
+#   ['at_least', имя, n] / ['greater', имя, n] / ['between', имя, от, до)
+#   ['compare', имя, '>' | '>=', имя]
+#   ['all', усл, ...] / ['any', усл, ...] / ['not', усл]
+DEFAULT_RULES = {
+    # Очки: [имя, вес, условие]; правила применяются по порядку
+    'scores': [
+        # 1. Босс: ключевые слова, роль, разделы страницы, фазы боя, явные указания
+        ['boss_score', 1, ['each_present', BOSS_KEYWORDS]],
+        ['boss_score', 3, ['role_any', BOSS_KEYWORDS]],
+        ['boss_score', 1, ['feature', 'boss_section_headers']],
+        ['boss_score', 2, ['feature', 'has_phase']],
+        ['boss_score', 2, ['any_present', ['this boss', 'defeat the boss']]],
+        # 2. Мини-босс; персонаж, похожий на босса, но не дотягивающий, тоже получает очко
+        ['miniboss_score', 2, ['each_present', MINIBOSS_KEYWORDS]],
+        ['miniboss_score', 3, ['role_any', MINIBOSS_KEYWORDS]],
+        ['miniboss_score', 1, ['between', 'boss_score', 2, 4]],
+        # 3. NPC: infobox, ключевые слова (и они же в роли), диалоги, квесты, торговля, взаимодействие
+        ['npc_score', 3, ['any', ['feature', 'infobox_npc'], ['role_any', ['npc']]]],
+        ['npc_score', 1, ['each_present', NPC_KEYWORDS]],
+        ['npc_score', 1, ['each_present_and_in_role', NPC_KEYWORDS]],
+        ['npc_score', 1, ['any_present', ['dialogue', 'dialog']]],
+        ['npc_score', 2, ['all', ['any_present', ['dialogue', 'dialog']], ['feature', 'dialog_header']]],
+        ['npc_score', 1, ['greater', 'quest_mentions', 2]],
+        ['npc_score', 2, ['all', ['greater', 'quest_mentions', 2], ['feature', 'quest_header']]],
+        ['npc_score', 1, ['any_present', SERVICE_TERMS]],
+        ['npc_score', 1, ['any_present', INTERACTION_TERMS]],
+        # Враждебность и дружелюбие NPC
+        ['hostility_score', 1, ['count', HOSTILE_WORDS]],
+        ['hostility_score', 3, ['any_present', ['attack on sight', 'hostile to player']]],
+        ['friendly_score', 1, ['count', FRIENDLY_WORDS]],
+        ['friendly_score', 3, ['any_present', ['friendly to player', 'offers assistance']]],
+    ],
+    # Флаги: [имя, условие]; вычисляются по порядку и могут ссылаться на предыдущие
+    'flags': [
+        ['is_boss', ['at_least', 'boss_score', 4]],
+        ['is_miniboss', ['all', ['not', ['feature', 'is_boss']], ['at_least', 'miniboss_score', 2]]],
+        # NPC не может быть боссом или мини-боссом одновременно
+        ['is_npc', ['all', ['not', ['feature', 'is_boss']], ['not', ['feature', 'is_miniboss']],
+                    ['at_least', 'npc_score', 3]]],
+        ['has_quest', ['all', ['greater', 'quest_mentions', 2], ['feature', 'quest_header']]],
+        # Боссы, мини-боссы и обычные враги враждебны; NPC - по соотношению очков
+        ['is_hostile', ['any', ['not', ['feature', 'is_npc']],
+                        ['compare', 'hostility_score', '>', 'friendly_score']]],
+        ['is_friendly', ['all', ['feature', 'is_npc'], ['compare', 'friendly_score', '>=', 'hostility_score']]],
+    ],
+    # Тип персонажа: первое сработавшее правило
+    'types': [
+        ['Boss', ['feature', 'is_boss']],
+        ['Mini-Boss', ['feature', 'is_miniboss']],
+        ['Merchant NPC', ['all', ['feature', 'is_npc'], ['any_present', ['merchant', 'vendor', 'shop']]]],
+        ['Quest NPC', ['all', ['feature', 'is_npc'], ['feature', 'has_quest']]],
+        ['NPC', ['feature', 'is_npc']],
+    ],
+    'default_type': 'Regular Enemy',
+    # Примерное здоровье, если его нет в infobox: [флаг или null, база, разброс]
+    'health_fallback': [
+        ['is_boss', 10000, 20000],
+        ['is_miniboss', 5000, 5000],
+        ['is_npc', 200, 300],
+        [None, 500, 1500],
+    ],
+}
+
+# Порядок полей в итоговой записи о персонаже
+RECORD_FIELDS = ['name', 'url', 'faction', 'location', 'role', 'health', 'has_quest', 'is_boss',
+                 'is_miniboss', 'is_npc', 'is_hostile', 'is_friendly', 'character_type']
+FLAG_FIELDS = ['has_quest', 'is_boss', 'is_miniboss', 'is_npc', 'is_hostile', 'is_friendly']
+
+
+def stable_hash(text):
+    """Детерминированный неотрицательный хэш строки (встроенный hash() солится при каждом запуске)"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> 1
+
+
+def load_rules(path):
+    """Загружает таблицу правил из JSON; отсутствующие разделы берутся из DEFAULT_RULES"""
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    rules = dict(DEFAULT_RULES)
+    rules.update(overrides)
+    return rules
+
+
+class FeatureMatrix:
+    """
+    Признаки страниц в столбцовом виде: матрица счетчиков ключевых слов
+    (персонажи x слова), числовые признаки и строки infobox.
+    Строится один раз и переиспользуется при любом наборе правил.
+    """
+
+    def __init__(self, features):
+        self.names = [f['name'] for f in features]
+        self.urls = [f['url'] for f in features]
+        self.text = {field: [f[field] for f in features] for field in ('faction', 'location', 'role')}
+        self.health = np.array([f['health'] for f in features], dtype=np.int64)
+        self.role_lower = np.array([(f['role'] or '').lower() for f in features], dtype=str)
+
+        keywords = sorted({keyword for f in features for keyword in f['keywords']})
+        self.keyword_index = {keyword: i for i, keyword in enumerate(keywords)}
+        self.counts = np.zeros((len(features), len(keywords)), dtype=np.int32)
+        for row, f in enumerate(features):
+            for keyword, count in f['keywords'].items():
+                if count:
+                    self.counts[row, self.keyword_index[keyword]] = count
+
+        self.columns = {}
+        for column in ('boss_section_headers', 'quest_mentions', 'has_phase', 'dialog_header',
+                       'quest_header', 'infobox_npc'):
+            self.columns[column] = np.array([f[column] for f in features], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def keyword_counts(self, keywords):
+        """Подматрица счетчиков для списка слов (неизвестные слова - нулевые столбцы)"""
+        result = np.zeros((len(self), len(keywords)), dtype=np.int32)
+        for j, keyword in enumerate(keywords):
+            i = self.keyword_index.get(keyword)
+            if i is not None:
+                result[:, j] = self.counts[:, i]
+        return result
+
+    def role_contains(self, keywords):
+        """Матрица персонажи x слова: встречается ли слово в роли"""
+        result = np.zeros((len(self), len(keywords)), dtype=bool)
+        for j, keyword in enumerate(keywords):
+            result[:, j] = np.char.find(self.role_lower, keyword) >= 0
+        return result
+
+
+def _evaluate(condition, matrix, columns):
+    op, *args = condition
+    if op == 'each_present':
+        return (matrix.keyword_counts(args[0]) > 0).sum(axis=1)
+    if op == 'any_present':
+        return (matrix.keyword_counts(args[0]) > 0).any(axis=1)
+    if op == 'count':
+        return matrix.keyword_counts(args[0]).sum(axis=1)
+    if op == 'role_any':
+        return matrix.role_contains(args[0]).any(axis=1)
+    if op == 'each_present_and_in_role':
+        return ((matrix.keyword_counts(args[0]) > 0) & matrix.role_contains(args[0])).sum(axis=1)
+    if op == 'feature':
+        return columns[args[0]]
+    if op == 'at_least':
+        return columns[args[0]] >= args[1]
+    if op == 'greater':
+        return columns[args[0]] > args[1]
+    if op == 'between':
+        return (columns[args[0]] >= args[1]) & (columns[args[0]] < args[2])
+    if op == 'compare':
+        left, sign, right = args
+        if sign == '>':
+            return columns[left] > columns[right]
+        if sign == '>=':
+            return columns[left] >= columns[right]
+        raise ValueError(f"Неизвестный оператор сравнения: {sign}")
+    if op == 'all':
+        return np.logical_and.reduce([_evaluate(arg, matrix, columns).astype(bool) for arg in args])
+    if op == 'any':
+        return np.logical_or.reduce([_evaluate(arg, matrix, columns).astype(bool) for arg in args])
+    if op == 'not':
+        return ~_evaluate(args[0], matrix, columns).astype(bool)
+    raise ValueError(f"Неизвестное условие в правилах: {op}")
+
+
+def classify_matrix(matrix, rules=DEFAULT_RULES):
+    """
+    Применяет таблицу правил ко всем персонажам сразу.
+
+    Returns:
+        dict: столбцы очков, флагов, типа персонажа и здоровья (numpy-массивы)
+    """
+    columns = dict(matrix.columns)
+    for name, weight, condition in rules['scores']:
+        value = _evaluate(condition, matrix, columns).astype(np.int64) * weight
+        columns[name] = columns.get(name, 0) + value
+    for name, condition in rules['flags']:
+        columns[name] = _evaluate(condition, matrix, columns).astype(bool)
+
+    type_conditions = [_evaluate(condition, matrix, columns).astype(bool) for _, condition in rules['types']]
+    type_names = [name for name, _ in rules['types']]
+    columns['character_type'] = np.select(type_conditions, type_names, default=rules['default_type'])
+
+    # Если здоровье не найдено, сгенерируем примерное значение по типу.
+    # Хэш имени не зависит от запуска, поэтому одинаковые страницы дают одинаковые файлы
+    name_hash = np.array([stable_hash(name) for name in matrix.names], dtype=np.int64)
+    fallback_conditions = [columns[flag] if flag else np.ones(len(matrix), dtype=bool)
+                           for flag, _, _ in rules['health_fallback']]
+    fallback_values = [base + name_hash % spread for _, base, spread in rules['health_fallback']]
+    fallback = np.select(fallback_conditions, fallback_values, default=0)
+    columns['health'] = np.where(matrix.health == 0, fallback, matrix.health)
+    return columns
+
+
+def classify_features(features, rules=DEFAULT_RULES):
+    """Классифицирует список признаков страниц и возвращает записи о персонажах"""
+    if not features:
+        return []
+    matrix = features if isinstance(features, FeatureMatrix) else FeatureMatrix(features)
+    columns = classify_matrix(matrix, rules)
+    flags = {field: columns[field].tolist() for field in FLAG_FIELDS}
+    health = columns['health'].tolist()
+    types = columns['character_type'].tolist()
+    records = []
+    for i in range(len(matrix)):
+        record = {
+            'name': matrix.names[i],
+            'url': matrix.urls[i],
+            'faction': matrix.text['faction'][i],
+            'location': matrix.text['location'][i],
+            'role': matrix.text['role'][i],
+            'health': health[i],
+        }
+        for field in FLAG_FIELDS:
+            record[field] = flags[field][i]
+        record['character_type'] = types[i]
+        records.append({field: record[field] for field in RECORD_FIELDS})
+    return records
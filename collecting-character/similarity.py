@@ -0,0 +1,196 @@
+"""
+Поиск похожих персонажей.
+
+Каждый персонаж представлен числовым вектором: здоровье (в логарифмической
+шкале), тип персонажа (one-hot), флаги is_boss/is_npc/..., локации и
+фракции (multi-hot по самым частым значениям). Блоки признаков
+взвешиваются и нормируются, поэтому близость - косинусная, а top-k ближайших
+для пачки запросов считается одним умножением матриц (BLAS) и argpartition.
+
+Для больших наборов есть приближенный индекс IVF: векторы разбиты на
+кластеры сферическим k-means, запрос сравнивается только с персонажами
+из n_probe ближайших кластеров.
+
+Пример:
+    index = SimilarityIndex(df, facets)
+    index.similar('Margit, the Fell Omen', k=5)
+"""
+import numpy as np
+
+from facet_index import FacetIndex
+from rules import FLAG_FIELDS
+
+# Вес блоков признаков в векторе персонажа
+WEIGHTS = {
+    'health': 1.0,
+    'character_type': 1.0,
+    'flags': 1.0,
+    'location': 1.0,
+    'faction': 0.5,
+}
+
+# Сколько самых частых значений локаций и фракций превращается в отдельные измерения
+MAX_VALUES = 64
+
+# Начиная с этого числа персонажей поиск по умолчанию приближенный (IVF)
+APPROXIMATE_THRESHOLD = 50000
+
+# Параметры IVF: обучающая выборка k-means, число итераций, кластеров просматривается за запрос
+IVF_TRAIN_SIZE = 20000
+IVF_ITERATIONS = 10
+IVF_PROBES = 8
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores, k):
+    """Номера k наибольших значений в каждой строке scores, по убыванию"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+class IvfIndex:
+    """
+    Приближенный поиск по максимальному скалярному произведению
+    нормированных векторов: инвертированные списки по кластерам k-means
+    """
+
+    def __init__(self, vectors, n_lists=None, n_probe=IVF_PROBES, seed=0):
+        self.vectors = vectors
+        n = len(vectors)
+        self.n_lists = n_lists or max(1, int(np.sqrt(n)))
+        self.n_probe = n_probe
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, min(n, IVF_TRAIN_SIZE), replace=False)]
+        centroids = sample[rng.choice(len(sample), min(self.n_lists, len(sample)), replace=False)]
+        for _ in range(IVF_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=len(centroids)) == 0
+            # Пустой кластер сохраняет прежний центр
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        self.centroids = centroids
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(centroids))]
+
+    def search(self, queries, k):
+        """
+        Returns:
+            tuple: (номера строк k x запрос, близость) - строки дополняются -1, если кандидатов меньше k
+        """
+        probes = _top_k(queries @ self.centroids.T, self.n_probe)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[j] for j in probes[i]])
+            if not len(candidates):
+                continue
+            candidate_scores = self.vectors[candidates] @ query
+            top = _top_k(candidate_scores[np.newaxis, :], k)[0]
+            rows[i, :len(top)] = candidates[top]
+            scores[i, :len(top)] = candidate_scores[top]
+        return rows, scores
+
+
+class SimilarityIndex:
+    """Векторы персонажей и поиск top-k похожих (точный или через IvfIndex)"""
+
+    def __init__(self, df, facets=None, weights=WEIGHTS, max_values=MAX_VALUES, approximate=None):
+        self.names = df['name'].tolist()
+        self.facets = facets if facets is not None else FacetIndex.from_frame(df)
+        self.row_by_name = {}
+        for row, name in enumerate(self.names):
+            self.row_by_name.setdefault(name, row)
+
+        blocks, self.dimensions = [], []
+        all_rows = np.arange(len(df), dtype=np.int64)
+
+        health = np.log1p(np.clip(df['health'].to_numpy(dtype=float), 0, None))
+        if health.max(initial=0) > 0:
+            health = health / health.max()
+        blocks.append(('health', health[:, np.newaxis]))
+        self.dimensions.append('health')
+
+        types = sorted(self.facets.totals.get('character_type', {}))
+        blocks.append(('character_type', self.facets.value_matrix('character_type', all_rows, types)))
+        self.dimensions += [f'character_type={value}' for value in types]
+
+        flags = [field for field in FLAG_FIELDS if field in df.columns]
+        blocks.append(('flags', df[flags].to_numpy(dtype=float)))
+        self.dimensions += flags
+
+        for field in ('location', 'faction'):
+            values = list(self.facets.facet_counts(field))[:max_values] if field in self.facets.totals else []
+            blocks.append((field, self.facets.value_matrix(field, all_rows, values)))
+            self.dimensions += [f'{field}={value}' for value in values]
+
+        # Каждый блок нормируется отдельно, чтобы вес блока не зависел от числа его измерений
+        self.vectors = _normalize(np.hstack([
+            (block if name == 'health' else _normalize(block)) * weights.get(name, 1.0)
+            for name, block in blocks if block.shape[1]
+        ]).astype(np.float32))
+
+        if approximate is None:
+            approximate = len(self.names) >= APPROXIMATE_THRESHOLD
+        self.ivf = IvfIndex(self.vectors) if approximate and len(self.names) else None
+
+    def __len__(self):
+        return len(self.names)
+
+    def _rows(self, queries):
+        rows = []
+        for query in queries:
+            row = self.row_by_name.get(query) if isinstance(query, str) else int(query)
+            if row is None:
+                raise KeyError(f"Персонаж не найден: {query}")
+            rows.append(row)
+        return np.array(rows, dtype=np.int64)
+
+    def search(self, queries, k=5, exclude_self=True):
+        """
+        Top-k похожих для пачки персонажей одним проходом.
+
+        Args:
+            queries: имена персонажей или номера строк
+            exclude_self: не включать сам запрос в результат
+
+        Returns:
+            tuple: (номера строк - массив запросы x k, косинусная близость того же размера;
+                    при нехватке кандидатов в приближенном режиме строки дополняются -1)
+        """
+        rows = self._rows(queries)
+        extra = 1 if exclude_self else 0
+        query_vectors = self.vectors[rows]
+        if self.ivf is not None:
+            found, scores = self.ivf.search(query_vectors, k + extra)
+        else:
+            all_scores = query_vectors @ self.vectors.T
+            found = _top_k(all_scores, k + extra)
+            scores = np.take_along_axis(all_scores, found, axis=1)
+        if exclude_self:
+            keep = found != rows[:, np.newaxis]
+            # Запрос мог не попасть в свой top-(k+1) (одинаковые векторы) - тогда отбрасываем последний
+            keep[keep.all(axis=1), -1] = False
+            found = found[keep].reshape(len(rows), -1)
+            scores = scores[keep].reshape(len(rows), -1)
+        return found[:, :k], scores[:, :k]
+
+    def similar(self, query, k=5):
+        """
+        Returns:
+            list: [(имя, близость)] для k самых похожих на персонажа query
+        """
+        found, scores = self.search([query], k)
+        return [(self.names[row], float(score)) for row, score in zip(found[0], scores[0]) if row >= 0]
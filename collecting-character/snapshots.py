@@ -0,0 +1,226 @@
+"""
+Версионированные снимки набора данных с адресацией по содержимому.
+
+Каждая запись о персонаже хранится один раз в objects/ под своим хэшем,
+снимок - это манифест {url: хэш записи}, а идентификатор снимка - хэш
+манифеста. Одинаковые данные всегда дают один и тот же снимок, а разница
+между снимками находится сравнением манифестов без чтения всех записей.
+
+Запуск:
+    python snapshots.py list
+    python snapshots.py diff [СТАРЫЙ] [НОВЫЙ] [--json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+SNAPSHOT_DIR = 'snapshots'
+
+
+def canonical_json(value):
+    """Сериализация, не зависящая от порядка ключей"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def content_hash(value):
+    return hashlib.sha256(canonical_json(value).encode('utf-8')).hexdigest()
+
+
+def diff_manifests(old, new):
+    """
+    Сравнивает манифесты {url: хэш записи}.
+
+    Returns:
+        dict: списки URL added, removed и changed
+    """
+    return {
+        'added': sorted(url for url in new if url not in old),
+        'removed': sorted(url for url in old if url not in new),
+        'changed': sorted(url for url in new if url in old and new[url] != old[url]),
+    }
+
+
+class SnapshotStore:
+    """Хранилище снимков: objects/ (записи), manifests/ (снимки), HEAD и history.jsonl"""
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.manifests_dir = os.path.join(directory, 'manifests')
+        self.head_path = os.path.join(directory, 'HEAD')
+        self.history_path = os.path.join(directory, 'history.jsonl')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + '.json')
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.manifests_dir, snapshot_id + '.json')
+
+    @staticmethod
+    def _write_atomic(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def save(self, records):
+        """
+        Сохраняет записи как снимок и делает его текущим (HEAD).
+
+        Записи читаются потоком: в памяти остается только манифест.
+        Уже известные записи и снимки повторно не пишутся.
+
+        Returns:
+            str: идентификатор снимка
+        """
+        manifest = {}
+        for record in records:
+            digest = content_hash(record)
+            manifest[record['url']] = digest
+            path = self._object_path(digest)
+            if not os.path.exists(path):
+                self._write_atomic(path, canonical_json(record))
+        manifest = dict(sorted(manifest.items()))
+        snapshot_id = content_hash(manifest)
+
+        manifest_path = self._manifest_path(snapshot_id)
+        if not os.path.exists(manifest_path):
+            self._write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=1))
+        if self.head() != snapshot_id:
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'id': snapshot_id, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                    'count': len(manifest)}) + '\n')
+            self._write_atomic(self.head_path, snapshot_id + '\n')
+        return snapshot_id
+
+    def head(self):
+        """Идентификатор текущего снимка или None"""
+        try:
+            with open(self.head_path, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def history(self):
+        """Список снимков в порядке создания: словари {'id', 'created_at', 'count'}"""
+        if not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def resolve(self, ref):
+        """
+        Находит снимок по ссылке: HEAD, HEAD~N (N-й предыдущий) или начало идентификатора.
+        Возвращает None, если такого снимка нет
+        """
+        history = [entry['id'] for entry in self.history()]
+        if ref == 'HEAD' or ref.startswith('HEAD~'):
+            back = int(ref[5:] or 1) if ref.startswith('HEAD~') else 0
+            return history[-1 - back] if back < len(history) else None
+        matches = {snapshot_id for snapshot_id in history if snapshot_id.startswith(ref)}
+        if os.path.exists(self._manifest_path(ref)):
+            matches.add(ref)
+        if len(matches) > 1:
+            raise ValueError(f"Неоднозначный идентификатор снимка: {ref}")
+        return matches.pop() if matches else None
+
+    def manifest(self, snapshot_id):
+        """Манифест снимка: {url: хэш записи}"""
+        if snapshot_id is None:
+            return {}
+        with open(self._manifest_path(snapshot_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, digest):
+        """Запись по ее хэшу"""
+        with open(self._object_path(digest), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def records(self, snapshot_id):
+        """Записи снимка в порядке URL"""
+        for digest in self.manifest(snapshot_id).values():
+            yield self.load(digest)
+
+    def diff(self, old_id, new_id):
+        """
+        Разница между снимками с самими записями.
+
+        Returns:
+            dict: added и removed - списки записей, changed - список
+                  {'url', 'name', 'fields': {поле: [старое, новое]}}
+        """
+        old = self.manifest(old_id)
+        new = self.manifest(new_id)
+        urls = diff_manifests(old, new)
+        changed = []
+        for url in urls['changed']:
+            before, after = self.load(old[url]), self.load(new[url])
+            fields = {field: [before.get(field), after.get(field)]
+                      for field in sorted(set(before) | set(after)) if before.get(field) != after.get(field)}
+            changed.append({'url': url, 'name': after.get('name'), 'fields': fields})
+        return {
+            'added': [self.load(new[url]) for url in urls['added']],
+            'removed': [self.load(old[url]) for url in urls['removed']],
+            'changed': changed,
+        }
+
+    def changed_since(self, snapshot_id, new_id=None):
+        """
+        Добавленные и измененные записи относительно снимка snapshot_id
+        (по умолчанию - до HEAD), чтобы потребители обрабатывали только их
+        """
+        new = self.manifest(new_id or self.head())
+        old = self.manifest(snapshot_id)
+        for url, digest in new.items():
+            if old.get(url) != digest:
+                yield self.load(digest)
+
+
+def print_diff(diff):
+    print(f"Добавлено: {len(diff['added'])}, удалено: {len(diff['removed'])}, изменено: {len(diff['changed'])}")
+    for record in diff['added']:
+        print(f"  + {record['name']}")
+    for record in diff['removed']:
+        print(f"  - {record['name']}")
+    for change in diff['changed']:
+        fields = ', '.join(f"{field}: {old!r} -> {new!r}" for field, (old, new) in change['fields'].items())
+        print(f"  ~ {change['name']}: {fields}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Снимки набора данных о персонажах и разница между ними')
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help='каталог снимков')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='список снимков')
+    diff_parser = commands.add_parser('diff', help='добавленные, удаленные и измененные персонажи')
+    diff_parser.add_argument('old', nargs='?', default='HEAD~1')
+    diff_parser.add_argument('new', nargs='?', default='HEAD')
+    diff_parser.add_argument('--json', action='store_true', help='вывести разницу в JSON')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.dir)
+    if args.command == 'list':
+        head = store.head()
+        for entry in store.history():
+            marker = '*' if entry['id'] == head else ' '
+            print(f"{marker} {entry['id'][:12]}  {entry['created_at']}  персонажей: {entry['count']}")
+        return
+
+    old_id, new_id = store.resolve(args.old), store.resolve(args.new)
+    if new_id is None:
+        print(f"Снимок {args.new} не найден")
+        return
+    diff = store.diff(old_id, new_id)
+    if args.json:
+        print(json.dumps(diff, ensure_ascii=False, indent=2))
+    else:
+        print_diff(diff)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Инкрементальное обновление набора данных по номерам ревизий статей.
+
+Список статей категории вместе с номерами последних ревизий запрашивается
+через MediaWiki API (generator=categorymembers + prop=info: один запрос на
+500 статей). Загружаются и заново классифицируются только статьи, ревизия
+которых изменилась с прошлого сбора, и новые статьи; статьи, исчезнувшие
+из категории, удаляются. Остальные записи берутся из журнала как есть.
+
+Запуск:
+    python sync.py
+    python sync.py --wiki-url http://127.0.0.1:8765 --dry-run
+"""
+import argparse
+
+from character_store import STORE_PATH, CharacterStore
+from classifier import process_api_batch
+from collecting import (CATEGORY_TITLE, FEATURES_PATH, JOURNAL_PATH, MAX_CATEGORY_DEPTH, MAX_RETRIES,
+                        MAX_WORKERS, WIKI_URL, export_dataset, make_fetcher, print_summary, snapshot_dataset)
+from journal import iter_journal, rewrite_journal
+from wiki_api import API_BATCH_SIZE, NS_CATEGORY, NS_MAIN, WikiApi, page_url, title_from_url
+from writers import DEFAULT_FORMATS, WRITERS
+
+
+def category_pages(api, category_title=CATEGORY_TITLE, max_depth=MAX_CATEGORY_DEPTH):
+    """
+    Статьи категории и ее подкатегорий (до max_depth) без редиректов.
+
+    Returns:
+        dict: {название статьи: номер последней ревизии}
+    """
+    pages = {}
+    categories = [(category_title, 0)]
+    seen = {category_title}
+    while categories:
+        category, depth = categories.pop(0)
+        for member in api.category_revisions(category):
+            if member['ns'] == NS_CATEGORY:
+                if depth < max_depth and member['title'] not in seen:
+                    seen.add(member['title'])
+                    categories.append((member['title'], depth + 1))
+            elif member['ns'] == NS_MAIN and not member.get('redirect'):
+                pages[member['title']] = member.get('lastrevid')
+    return pages
+
+
+def feature_title(features):
+    """Название статьи для сохраненных признаков (у собранных из HTML ревизии нет)"""
+    return features.get('title') or title_from_url(features['url'])
+
+
+def plan_sync(features, pages):
+    """
+    Сравнивает сохраненные ревизии с текущими.
+
+    Returns:
+        tuple: (названия новых и измененных статей, названия статей, исчезнувших из категории)
+    """
+    known = {feature_title(f): f.get('revid') for f in features}
+    changed = sorted(title for title, revid in pages.items() if title not in known or known[title] != revid)
+    removed = sorted(title for title in known if title not in pages)
+    return changed, removed
+
+
+def fetch_changed(api, titles):
+    """
+    Загружает и классифицирует измененные статьи пачками по API_BATCH_SIZE.
+
+    Returns:
+        tuple: (записи, признаки) - списки в одном порядке
+    """
+    records, features = [], []
+    chars = [{'name': title, 'url': page_url(api.wiki_url, title)} for title in titles]
+    for i in range(0, len(chars), API_BATCH_SIZE):
+        batch = chars[i:i + API_BATCH_SIZE]
+        try:
+            pages = api.fetch_revisions([char['url'] for char in batch])
+        except Exception as e:
+            print(f"Ошибка загрузки пачки статей: {e}")
+            continue
+        results, _ = process_api_batch(batch, pages)
+        for char, character_info, char_features, _, error in results:
+            if error is not None:
+                print(f"Ошибка обработки {char['url']}: {error}")
+                continue
+            records.append(character_info)
+            features.append(char_features)
+    return records, features
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Инкрементальное обновление данных о персонажах по ревизиям вики')
+    parser.add_argument('--wiki-url', default=WIKI_URL, help='адрес вики (например, локального fixture_server.py)')
+    parser.add_argument('--dry-run', action='store_true', help='только показать, какие статьи изменились')
+    parser.add_argument('--formats', nargs='+', choices=sorted(WRITERS), default=DEFAULT_FORMATS,
+                        help='форматы итоговых файлов')
+    parser.add_argument('--fetch-workers', type=int, default=MAX_WORKERS,
+                        help='размер пула соединений')
+    parser.add_argument('--max-retries', type=int, default=MAX_RETRIES,
+                        help='число повторов запроса при сетевых ошибках и ответах 429/5xx')
+    args = parser.parse_args()
+
+    features = list(iter_journal(FEATURES_PATH))
+    if not features:
+        print(f"Нет сохраненных признаков в {FEATURES_PATH}. Сначала запустите collecting.py")
+        return
+
+    fetch_url, client, _ = make_fetcher(args.fetch_workers, args.max_retries)
+    api = WikiApi(args.wiki_url.rstrip('/'), fetch_url)
+    try:
+        pages = category_pages(api)
+        changed, removed = plan_sync(features, pages)
+        print(f"Статей в категории: {len(pages)}, новых или измененных: {len(changed)}, удалено: {len(removed)}")
+        if args.dry_run:
+            for title in changed:
+                print(f"  ~ {title}")
+            for title in removed:
+                print(f"  - {title}")
+            return
+        if not changed and not removed:
+            print("Набор данных актуален")
+            return
+        new_records, new_features = fetch_changed(api, changed)
+    finally:
+        client.close()
+
+    # Признаки и записи неизмененных статей остаются как есть, обновленные заменяются
+    replaced = {feature_title(f) for f in new_features} | set(removed)
+    kept_urls = {f['url'] for f in features if feature_title(f) not in replaced}
+    merged_features = [f for f in features if f['url'] in kept_urls] + new_features
+    merged_records = [r for r in iter_journal(JOURNAL_PATH) if r['url'] in kept_urls] + new_records
+    rewrite_journal(FEATURES_PATH, merged_features)
+    rewrite_journal(JOURNAL_PATH, merged_records)
+    # В хранилище SQLite меняются только затронутые строки
+    stale_urls = {f['url'] for f in features if f['url'] not in kept_urls} - {r['url'] for r in new_records}
+    with CharacterStore(STORE_PATH) as store:
+        store.delete(stale_urls)
+        store.upsert_many(new_records, [f.get('values') for f in new_features])
+    print(f"Обновлено {len(new_records)} персонажей, удалено {len(removed)}")
+
+    counts = export_dataset(merged_records, args.formats)
+    print("Найдено:")
+    print_summary(counts)
+    snapshot_dataset(merged_records)
+
+
+if __name__ == '__main__':
+    main()
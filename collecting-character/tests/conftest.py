@@ -0,0 +1,40 @@
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import collecting  # noqa: E402
+import fixture_server  # noqa: E402
+
+
+@pytest.fixture
+def wiki(monkeypatch):
+    """Локальная вики (fixture_server); правки статей в тесте не переживают сам тест"""
+    for name in ('FIXTURE_PAGES', 'FIXTURE_REVISIONS', 'FIXTURE_CATEGORIES'):
+        monkeypatch.setattr(fixture_server, name, copy.deepcopy(getattr(fixture_server, name)))
+    server = fixture_server.start_fixture_server(0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Журналы, кэш и базы сборщика - во временной папке; без ограничения частоты запросов"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collecting, 'REQUESTS_PER_SECOND', 1000.0)
+    monkeypatch.setattr(collecting, 'RATE_BURST', 100)
+    return tmp_path
+
+
+@pytest.fixture
+def run(monkeypatch, capsys):
+    """Запускает main() модуля с аргументами командной строки и возвращает его вывод"""
+    def run(module, *args):
+        monkeypatch.setattr(sys, 'argv', [module.__name__ + '.py', *args])
+        module.main()
+        return capsys.readouterr().out
+    return run
@@ -0,0 +1,37 @@
+import collecting
+import fixture_server
+from journal import iter_journal
+
+# Признаки страниц, по которым классифицируются записи: у обоих режимов они должны совпадать,
+# иначе записи совпадают только пока оценки далеки от порогов правил
+FEATURE_FIELDS = ['keywords', 'quest_mentions', 'infobox_npc', 'has_phase', 'boss_section_headers',
+                  'dialog_header', 'quest_header']
+
+
+def collect(run, wiki, monkeypatch, directory, source):
+    """
+    Собирает фикстуру в режиме source в отдельной папке
+
+    Returns:
+        tuple: (записи по URL, признаки по URL)
+    """
+    directory.mkdir()
+    monkeypatch.chdir(directory)
+    run(collecting, '--wiki-url', wiki.url, '--source', source, '--limit', '0', '--parse-workers', '0',
+        '--formats', 'json')
+    records = {record['url']: record for record in iter_journal(collecting.JOURNAL_PATH)}
+    features = {features['url']: {field: features[field] for field in FEATURE_FIELDS}
+                for features in iter_journal(collecting.FEATURES_PATH)}
+    return records, features
+
+
+def test_html_and_api_modes_give_identical_records(wiki, workdir, run, monkeypatch):
+    html_records, html_features = collect(run, wiki, monkeypatch, workdir / 'html', 'html')
+    api_records, api_features = collect(run, wiki, monkeypatch, workdir / 'api', 'api')
+
+    # Редирект Margit и статья Margit, the Fell Omen - одна запись; Template: и Category: не персонажи
+    assert len(api_records) == len(fixture_server.FIXTURE_PAGES)
+    assert api_records == html_records
+    assert set(api_features) == set(html_features)
+    for url, features in api_features.items():
+        assert features == html_features[url], url
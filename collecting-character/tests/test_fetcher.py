@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import fixture_server
+from fetcher import AdaptiveConcurrency, HttpClient
+
+
+class RecordingConcurrency(AdaptiveConcurrency):
+    """AdaptiveConcurrency, запоминающий лимит после каждого ответа"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.history = []
+
+    def release(self, latency, overloaded=False):
+        super().release(latency, overloaded)
+        with self.condition:
+            self.history.append(self.limit)
+
+
+def fetch_all(client, url, count, workers):
+    with ThreadPoolExecutor(workers) as pool:
+        return [response.status_code for response in pool.map(lambda _: client.get(url), range(count))]
+
+
+def test_client_retries_and_adapts_to_overload():
+    server = fixture_server.start_fixture_server(0, latency=0.02, error_rate=0.1, max_concurrency=2, seed=1)
+    concurrency = RecordingConcurrency(initial=8, maximum=8, cooldown=0.05)
+    client = HttpClient(pool_size=8, max_retries=10, backoff_base=0.01, concurrency=concurrency)
+    url = server.url + '/wiki/Melina'
+    try:
+        # Сервер отвечает 429 сверх двух одновременных запросов и 503 на часть остальных
+        assert fetch_all(client, url, 64, 8) == [200] * 64
+        assert server.rejected.get(429) and server.rejected.get(503)
+        assert server.request_count > 64
+        lowest = min(concurrency.history)
+        assert lowest <= server.max_concurrency
+
+        # Перегрузка прошла - лимит снова растет до максимума
+        server.error_rate = 0.0
+        server.max_concurrency = 0
+        assert fetch_all(client, url, 64, 8) == [200] * 64
+        assert concurrency.limit == concurrency.maximum
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,114 @@
+import collecting
+import fixture_server
+import sync
+from collecting import FEATURES_PATH, JOURNAL_PATH
+from journal import iter_journal
+
+MALENIA = """{{Infobox Boss
+|role = Demigod, Boss
+|health = 33,251
+}}
+Malenia is a demigod boss. Phase 2 begins at half health.
+"""
+
+
+def edit_corpus():
+    """Одна правка, одна новая статья и одна статья, убранная из категории"""
+    melina = fixture_server.FIXTURE_PAGES['Melina'].replace('NPC, Ally', 'NPC, Merchant')
+    fixture_server.edit_page('Melina', melina + 'She is a merchant vendor with a shop.\n')
+    fixture_server.edit_page('Malenia', MALENIA)
+    fixture_server.FIXTURE_CATEGORIES['Category:Bosses'].append('Malenia')
+    fixture_server.FIXTURE_CATEGORIES['Category:Bosses'].remove('Godrick Soldier')
+
+
+def record_requests(monkeypatch, fail=None):
+    """
+    Запоминает URL запросов sync.py; запросы, содержащие fail, завершаются ошибкой
+
+    Returns:
+        list: URL в порядке запросов
+    """
+    urls = []
+
+    def make_fetcher(*args):
+        fetch_url, client, cache = collecting.make_fetcher(*args)
+
+        def fetch(url):
+            urls.append(url)
+            if fail and fail in url:
+                raise ConnectionError('connection reset')
+            return fetch_url(url)
+        return fetch, client, cache
+
+    monkeypatch.setattr(sync, 'make_fetcher', make_fetcher)
+    return urls
+
+
+def collect(run, wiki):
+    run(collecting, '--wiki-url', wiki.url, '--source', 'api', '--limit', '0', '--parse-workers', '0',
+        '--formats', 'json')
+    return {record['name']: record for record in iter_journal(JOURNAL_PATH)}
+
+
+def test_plan_sync_classifies_pages(wiki, workdir, run):
+    collect(run, wiki)
+    edit_corpus()
+    api = sync.WikiApi(wiki.url, collecting.make_fetcher()[0])
+
+    changed, removed = sync.plan_sync(list(iter_journal(FEATURES_PATH)), sync.category_pages(api))
+
+    assert changed == ['Malenia', 'Melina']
+    assert removed == ['Godrick Soldier']
+
+
+def test_sync_fetches_only_changed_pages(wiki, workdir, run, monkeypatch):
+    before = collect(run, wiki)
+    edit_corpus()
+    urls = record_requests(monkeypatch)
+    count = wiki.request_count
+
+    output = run(sync, '--wiki-url', wiki.url, '--formats', 'json')
+
+    # Три запроса списка ревизий (Characters - две страницы, Bosses - одна) и одна пачка статей
+    assert wiki.request_count - count == len(urls) == 4
+    assert sum('prop=revisions' in url for url in urls) == 1
+    assert 'новых или измененных: 2, удалено: 1' in output
+    after = {record['name']: record for record in iter_journal(JOURNAL_PATH)}
+    assert set(after) == set(before) - {'Godrick Soldier'} | {'Malenia'}
+    assert after['Melina']['character_type'] == 'Merchant NPC'
+    assert after['Malenia']['is_boss']
+    assert {name: after[name] for name in before if name not in ('Melina', 'Godrick Soldier')} == \
+        {name: record for name, record in before.items() if name not in ('Melina', 'Godrick Soldier')}
+    revisions = {feature['title']: feature['revid'] for feature in iter_journal(FEATURES_PATH)}
+    assert revisions['Melina'] == fixture_server.FIXTURE_REVISIONS['Melina']
+
+
+def test_sync_unchanged_corpus_is_up_to_date(wiki, workdir, run, monkeypatch):
+    before = collect(run, wiki)
+    urls = record_requests(monkeypatch)
+    count = wiki.request_count
+
+    output = run(sync, '--wiki-url', wiki.url, '--formats', 'json')
+
+    assert 'Набор данных актуален' in output
+    assert wiki.request_count - count == len(urls) == 3
+    assert all('generator=categorymembers' in url for url in urls)
+    assert {record['name']: record for record in iter_journal(JOURNAL_PATH)} == before
+
+
+def test_sync_keeps_record_when_fetch_fails(wiki, workdir, run, monkeypatch):
+    before = collect(run, wiki)
+    revision = fixture_server.FIXTURE_REVISIONS['Melina']
+    edit_corpus()
+    record_requests(monkeypatch, fail='prop=revisions')
+
+    output = run(sync, '--wiki-url', wiki.url, '--formats', 'json')
+
+    assert 'Ошибка загрузки пачки статей' in output
+    after = {record['name']: record for record in iter_journal(JOURNAL_PATH)}
+    assert after['Melina'] == before['Melina']
+    assert 'Malenia' not in after
+    assert 'Godrick Soldier' not in after
+    # Прежняя ревизия остается в признаках, поэтому следующий запуск загрузит статью снова
+    revisions = {feature['title']: feature['revid'] for feature in iter_journal(FEATURES_PATH)}
+    assert revisions['Melina'] == revision
@@ -0,0 +1,113 @@
+import json
+from urllib.parse import quote, unquote, urlencode
+
+# MediaWiki отдает содержимое не более чем 50 страниц за запрос (для обычных пользователей)
+API_BATCH_SIZE = 50
+
+# Пространства имен MediaWiki: статьи и категории
+NS_MAIN = 0
+NS_CATEGORY = 14
+
+
+def page_url(wiki_url, title):
+    """URL статьи в том же виде, в каком его формирует MediaWiki (пробелы -> _)"""
+    return wiki_url + '/wiki/' + quote(title.replace(' ', '_'), safe=";@$!*(),/~:")
+
+
+def title_from_url(url):
+    """Название статьи по ее URL"""
+    return unquote(url.rsplit('/wiki/', 1)[-1]).replace('_', ' ')
+
+
+class WikiApi:
+    """
+    Клиент MediaWiki API (api.php) поверх функции загрузки fetch(url) -> bytes,
+    поэтому запросы к API проходят через тот же ограничитель частоты и кэш,
+    что и загрузка HTML-страниц.
+    """
+
+    def __init__(self, wiki_url, fetch):
+        self.wiki_url = wiki_url.rstrip('/')
+        self.endpoint = self.wiki_url + '/api.php'
+        self.fetch = fetch
+
+    def query(self, **params):
+        """
+        Выполняет action=query и проходит по всем продолжениям (continue).
+
+        Yields:
+            dict: раздел query каждого ответа
+        """
+        params = dict(params, action='query', format='json', formatversion=2)
+        continuation = {}
+        while True:
+            url = self.endpoint + '?' + urlencode(sorted({**params, **continuation}.items()))
+            data = json.loads(self.fetch(url))
+            if 'error' in data:
+                raise RuntimeError(f"MediaWiki API: {data['error'].get('info', data['error'])}")
+            yield data.get('query', {})
+            if 'continue' not in data:
+                break
+            continuation = data['continue']
+
+    def category_members(self, category_title):
+        """Статьи и подкатегории категории: словари {'ns', 'title'}"""
+        for result in self.query(list='categorymembers', cmtitle=category_title,
+                                 cmtype='page|subcat', cmlimit='max'):
+            yield from result.get('categorymembers', [])
+
+    def category_revisions(self, category_title):
+        """
+        Участники категории вместе с номером последней ревизии - один запрос
+        на 500 участников (generator=categorymembers + prop=info)
+
+        Yields:
+            dict: {'ns', 'title', 'lastrevid', 'redirect' (если это редирект)}
+        """
+        for result in self.query(generator='categorymembers', gcmtitle=category_title,
+                                 gcmtype='page|subcat', gcmlimit='max', prop='info'):
+            yield from result.get('pages', [])
+
+    def fetch_revisions(self, urls):
+        """
+        Загружает вики-разметку последних ревизий статей пачкой (titles=A|B|...).
+
+        Редиректы разрешаются на стороне API, поэтому ссылки на одну
+        статью получают одинаковый canonical URL.
+
+        Returns:
+            dict: {url: {'title', 'url', 'revid', 'wikitext'} или None, если статьи нет}
+        """
+        titles = {url: title_from_url(url) for url in urls}
+        renamed = {}
+        pages = {}
+        for result in self.query(titles='|'.join(titles.values()), prop='revisions',
+                                 rvprop='ids|content', rvslots='main', redirects=1):
+            for entry in result.get('normalized', []) + result.get('redirects', []):
+                renamed[entry['from']] = entry['to']
+            for page in result.get('pages', []):
+                if page.get('missing') or page.get('invalid'):
+                    continue
+                # При большом объеме API возвращает содержимое части страниц в следующем ответе
+                revisions = page.get('revisions')
+                if revisions:
+                    pages[page['title']] = revisions[0]
+
+        articles = {}
+        for url, title in titles.items():
+            # Цепочка: исходное название -> нормализованное -> цель редиректа
+            seen = set()
+            while title in renamed and title not in seen:
+                seen.add(title)
+                title = renamed[title]
+            revision = pages.get(title)
+            if revision is None:
+                articles[url] = None
+                continue
+            articles[url] = {
+                'title': title,
+                'url': page_url(self.wiki_url, title),
+                'revid': revision.get('revid'),
+                'wikitext': revision['slots']['main']['content'],
+            }
+        return articles
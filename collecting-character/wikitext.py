@@ -0,0 +1,135 @@
+import re
+
+# Поля infobox, которые нужны для записи о персонаже
+INFOBOX_FIELDS = ('faction', 'location', 'role', 'health')
+
+LINK_RE = re.compile(r'\[\[(?:[^\[\]|]*\|)?([^\[\]]*)\]\]')
+EXTERNAL_LINK_RE = re.compile(r'\[https?://[^\s\]]+\s*([^\]]*)\]')
+REF_RE = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.IGNORECASE | re.DOTALL)
+COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^<>]+>')
+EMPHASIS_RE = re.compile(r"'{2,}")
+HEADER_RE = re.compile(r'^(={2,3})(?!=)\s*(.+?)\s*\1\s*$', re.MULTILINE)
+HEADER_MARKUP_RE = re.compile(r'^=+\s*(.*?)\s*=+\s*$', re.MULTILINE)
+FILE_LINK_RE = re.compile(r'\[\[(?:File|Image):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]', re.IGNORECASE)
+CATEGORY_LINK_RE = re.compile(r'\[\[Category:[^\[\]]*\]\]', re.IGNORECASE)
+
+
+def iter_templates(text):
+    """
+    Находит шаблоны верхнего уровня {{...}} с учетом вложенных шаблонов и ссылок.
+
+    Yields:
+        tuple: (начало, конец) шаблона в тексте
+    """
+    depth = 0
+    start = None
+    i = 0
+    while i < len(text) - 1:
+        pair = text[i:i + 2]
+        if pair == '{{':
+            if depth == 0:
+                start = i
+            depth += 1
+            i += 2
+        elif pair == '}}' and depth:
+            depth -= 1
+            i += 2
+            if depth == 0:
+                yield start, i
+        else:
+            i += 1
+
+
+def split_template(template):
+    """
+    Разбирает шаблон {{Имя|param = value|...}} на имя и именованные параметры.
+    Разделители | внутри вложенных шаблонов и ссылок не учитываются.
+    """
+    body = template[2:-2]
+    parts = []
+    depth = 0
+    last = 0
+    i = 0
+    while i < len(body):
+        pair = body[i:i + 2]
+        if pair in ('{{', '[['):
+            depth += 1
+            i += 2
+        elif pair in ('}}', ']]') and depth:
+            depth -= 1
+            i += 2
+        else:
+            if body[i] == '|' and depth == 0:
+                parts.append(body[last:i])
+                last = i + 1
+            i += 1
+    parts.append(body[last:])
+
+    params = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition('=')
+        if sep:
+            params[key.strip().lower()] = value.strip()
+    return parts[0].strip(), params
+
+
+def find_infobox(wikitext):
+    """
+    Возвращает (имя шаблона, параметры) infobox статьи или None.
+
+    Infobox - первый шаблон верхнего уровня, в имени которого есть "infobox",
+    либо, если такого нет, первый шаблон с полями faction/location/role/health.
+    """
+    fallback = None
+    for start, end in iter_templates(wikitext):
+        name, params = split_template(wikitext[start:end])
+        if 'infobox' in name.lower():
+            return name, params
+        if fallback is None and any(field in params for field in INFOBOX_FIELDS):
+            fallback = name, params
+    return fallback
+
+
+def link_labels(value):
+    """Подписи вики-ссылок [[Цель|Подпись]] в значении параметра"""
+    return [label.strip() for label in LINK_RE.findall(value)]
+
+
+def to_plain_text(wikitext):
+    """Убирает из вики-разметки шаблоны, ссылки, теги и выделение, оставляя текст"""
+    text = COMMENT_RE.sub('', wikitext)
+    text = REF_RE.sub('', text)
+    text = FILE_LINK_RE.sub('', text)
+    text = CATEGORY_LINK_RE.sub('', text)
+    # Шаблоны (infobox, навигация, иконки) в тексте статьи не отображаются
+    pieces = []
+    last = 0
+    for start, end in iter_templates(text):
+        pieces.append(text[last:start])
+        last = end
+    pieces.append(text[last:])
+    text = ''.join(pieces)
+    text = LINK_RE.sub(r'\1', text)
+    text = EXTERNAL_LINK_RE.sub(r'\1', text)
+    text = BR_RE.sub('\n', text)
+    text = TAG_RE.sub('', text)
+    text = EMPHASIS_RE.sub('', text)
+    text = HEADER_MARKUP_RE.sub(r'\1', text)
+    return text.replace('&nbsp;', ' ')
+
+
+def value_text(value):
+    """Текст значения параметра: ссылки заменяются подписями, <br> - переводом строки"""
+    return to_plain_text(value).strip()
+
+
+def section_headers(wikitext):
+    """Заголовки разделов второго и третьего уровня (аналог h2/h3 в HTML)"""
+    return [to_plain_text(match.group(2)).strip() for match in HEADER_RE.finditer(wikitext)]
+
+
+def text_lines(wikitext):
+    """Непустые строки текста статьи - аналог текстовых узлов HTML-страницы"""
+    return [line for line in to_plain_text(wikitext).split('\n') if line.strip()]
@@ -0,0 +1,173 @@
+import csv
+import json
+
+from rules import FLAG_FIELDS, RECORD_FIELDS
+
+# Parquet/Arrow пишутся через pyarrow, если он установлен
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Поля с небольшим числом различных значений хранятся словарем (категориальный тип в pandas)
+CATEGORICAL_FIELDS = ['character_type', 'faction', 'location']
+
+# Сколько записей накапливается перед записью очередной группы строк Parquet/Arrow
+ROW_GROUP_SIZE = 4096
+
+
+class JsonArrayWriter:
+    """JSON-массив с отступами (как json.dump(..., indent=4)), записываемый по одной записи"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('[')
+        self.empty = True
+
+    def write(self, record):
+        if not self.empty:
+            self.file.write(',')
+        self.file.write('\n    ' + json.dumps(record, ensure_ascii=False, indent=4).replace('\n', '\n    '))
+        self.empty = False
+
+    def close(self):
+        self.file.write('\n]')
+        self.file.close()
+
+
+class CsvWriter:
+    """CSV с заголовком по полям первой записи"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = None
+
+    def write(self, record):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(record.keys()))
+            self.writer.writeheader()
+        self.writer.writerow(record)
+
+    def close(self):
+        self.file.close()
+
+
+def arrow_schema():
+    """Схема таблицы персонажей: категориальные поля - dictionary<int32, string>"""
+    fields = []
+    for name in RECORD_FIELDS:
+        if name in CATEGORICAL_FIELDS:
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        elif name in FLAG_FIELDS:
+            field_type = pa.bool_()
+        elif name == 'health':
+            field_type = pa.int64()
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+
+class _ArrowBatchWriter:
+    """
+    Накапливает записи по столбцам и сбрасывает их пачками по ROW_GROUP_SIZE.
+
+    Словари категориальных полей общие для всего файла и только дополняются
+    новыми значениями, поэтому каждая следующая пачка несет лишь дельту словаря
+    """
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE):
+        if not PYARROW_AVAILABLE:
+            raise ImportError('Для записи Parquet/Arrow установите pyarrow')
+        self.path = path
+        self.schema = arrow_schema()
+        self.row_group_size = row_group_size
+        self.columns = {name: [] for name in self.schema.names}
+        self.dictionaries = {name: {} for name in CATEGORICAL_FIELDS}
+        self.rows = 0
+        self.writer = self._open()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def write(self, record):
+        for name, values in self.columns.items():
+            value = record.get(name)
+            dictionary = self.dictionaries.get(name)
+            if dictionary is not None and value is not None:
+                value = dictionary.setdefault(value, len(dictionary))
+            values.append(value)
+        self.rows += 1
+        if self.rows >= self.row_group_size:
+            self._flush()
+
+    def _array(self, field):
+        values = self.columns[field.name]
+        dictionary = self.dictionaries.get(field.name)
+        if dictionary is None:
+            return pa.array(values, type=field.type)
+        return pa.DictionaryArray.from_arrays(pa.array(values, type=pa.int32()),
+                                              pa.array(list(dictionary), type=pa.string()))
+
+    def _flush(self):
+        if not self.rows:
+            return
+        batch = pa.record_batch([self._array(field) for field in self.schema], schema=self.schema)
+        self.writer.write_batch(batch)
+        for values in self.columns.values():
+            values.clear()
+        self.rows = 0
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+class ParquetWriter(_ArrowBatchWriter):
+    """Parquet: каждая пачка записей - отдельная группа строк"""
+
+    def _open(self):
+        return pq.ParquetWriter(self.path, self.schema)
+
+
+class ArrowWriter(_ArrowBatchWriter):
+    """Arrow IPC (Feather v2): читается без копирования через pyarrow.ipc.open_file(pyarrow.memory_map(path))"""
+
+    def _open(self):
+        return pa.ipc.new_file(self.path, self.schema,
+                               options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+
+# Форматы вывода: суффикс файла -> класс записи
+WRITERS = {
+    'json': JsonArrayWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+    'arrow': ArrowWriter,
+}
+DEFAULT_FORMATS = ['json', 'csv', 'parquet', 'arrow'] if PYARROW_AVAILABLE else ['json', 'csv']
+
+
+def write_records(records, base_path, formats=DEFAULT_FORMATS):
+    """
+    Записывает поток записей во все выбранные форматы за один проход,
+    не держа весь набор данных в памяти.
+
+    Returns:
+        int: число записанных записей
+    """
+    writers = []
+    try:
+        for fmt in formats:
+            writers.append(WRITERS[fmt](f'{base_path}.{fmt}'))
+        total = 0
+        for record in records:
+            for writer in writers:
+                writer.write(record)
+            total += 1
+    finally:
+        for writer in writers:
+            writer.close()
+    return total
@@ -0,0 +1,654 @@
+"""
+Загрузка показаний PM2.5 (Экология/Атмосфера/PM2,5.csv) по частям.
+
+Формат даты определяется один раз по первым строкам файла (из
+DATE_FORMATS), после чего CSV читается кусками по CHUNK_SIZE строк и
+каждый кусок разбирается с фиксированным форматом - без перебора
+стратегий pd.to_datetime и медленного format='mixed'. Для каждого месяца
+накапливаются сумма, число, минимум и максимум показаний, поэтому память
+ограничена размером куска, а не всего файла.
+
+Файл показаний обычно только дописывается: PM25Ingest запоминает, до
+какого места файл уже прочитан, и при следующем update() читает только
+новые строки, пересчитывая лишь затронутые ими месяцы. Если начало файла
+изменилось (файл заменен), он читается заново.
+
+Показания многих станций и веществ хранятся в AirQualityStore
+(Экология/Атмосфера/Хранилище): разделы станция/вещество/месяц со
+сводками min/max/sum/count в индексе, так что график любой станции и
+вещества за любой период читает только нужные разделы.
+
+Пример:
+    ingest = PM25Ingest('Экология/Атмосфера/PM2,5.csv')
+    ingest.update()
+    monthly_data = ingest.monthly()
+"""
+import io
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = 'Дата/время'
+VALUE_COLUMN = 'Значение'
+DELIMITER = ';'
+
+# Строк в одном куске при чтении CSV
+CHUNK_SIZE = 100000
+
+# Сколько первых строк используется для определения формата даты
+SAMPLE_ROWS = 1000
+
+# Форматы дат, которые пробуются по порядку; выбирается разбирающий больше всего строк выборки
+DATE_FORMATS = [
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%d.%m.%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+]
+
+# Какая доля выборки должна разбираться форматом, чтобы он считался найденным
+MIN_FORMAT_SHARE = 0.9
+
+# Сколько байт перед прочитанной границей файла сравнивается, чтобы отличить дописывание от замены файла
+FINGERPRINT_SIZE = 256
+
+SUMMARY_COLUMNS = ['sum', 'count', 'min', 'max']
+
+
+def infer_date_format(values):
+    """
+    Формат из DATE_FORMATS, разбирающий больше всего значений (не меньше
+    MIN_FORMAT_SHARE), или None - тогда даты разбираются с dayfirst=True
+    """
+    values = pd.Series(values, dtype=object).dropna().astype(str).str.strip()
+    if values.empty:
+        return None
+    best_format, best_share = None, 0.0
+    for date_format in DATE_FORMATS:
+        share = pd.to_datetime(values, format=date_format, errors='coerce').notna().mean()
+        if share > best_share:
+            best_format, best_share = date_format, share
+    return best_format if best_share >= MIN_FORMAT_SHARE else None
+
+
+def parse_dates(values, date_format):
+    """
+    Даты с фиксированным форматом (None - автоопределение с dayfirst=True);
+    нераспознанные - NaT. У нескольких станций время показаний совпадает,
+    поэтому разбираются только уникальные строки
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    if date_format is None:
+        parsed = pd.to_datetime(uniques, dayfirst=True, errors='coerce')
+    else:
+        parsed = pd.to_datetime(uniques, format=date_format, errors='coerce')
+    # Код -1 (пустое значение) указывает на добавленный в конец NaT
+    parsed = np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT'))
+    return pd.Series(parsed[codes], index=values.index)
+
+
+def parse_values(values):
+    """Числа из столбца значений; десятичная запятая тоже допускается"""
+    if values.dtype == object:
+        values = values.str.replace(',', '.', regex=False)
+    return pd.to_numeric(values, errors='coerce')
+
+
+def month_keys(dates):
+    """Номер месяца год * 12 + (месяц - 1) - целочисленный ключ группировки"""
+    return dates.dt.year.to_numpy() * 12 + dates.dt.month.to_numpy() - 1
+
+
+def summarize(dates, values):
+    """Сумма, число, минимум и максимум показаний по месяцам (индекс - month_keys)"""
+    valid = dates.notna().to_numpy() & values.notna().to_numpy()
+    if not valid.any():
+        return pd.DataFrame(columns=SUMMARY_COLUMNS, dtype=float)
+    summary = pd.Series(values.to_numpy()[valid]).groupby(month_keys(dates[valid])).agg(SUMMARY_COLUMNS)
+    return summary.astype(float)
+
+
+def merge_summaries(left, right):
+    """Объединяет месячные сводки: суммы и числа складываются, минимумы и максимумы сравниваются"""
+    if left.empty:
+        return right
+    if right.empty:
+        return left
+    both = pd.concat([left, right])
+    return both.groupby(level=0).agg({'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'})
+
+
+def monthly_frame(summary):
+    """Среднемесячные значения в прежнем виде: year, month, Значение, date"""
+    summary = summary[summary['count'] > 0].sort_index()
+    keys = summary.index.to_numpy(dtype=np.int64)
+    monthly_data = pd.DataFrame({
+        'year': keys // 12,
+        'month': keys % 12 + 1,
+        VALUE_COLUMN: (summary['sum'] / summary['count']).to_numpy(),
+    })
+    monthly_data['date'] = pd.to_datetime(monthly_data[['year', 'month']].assign(day=1))
+    return monthly_data
+
+
+class _Limited(io.RawIOBase):
+    """Файл, читаемый с текущей позиции не дальше limit байт"""
+
+    def __init__(self, file, limit):
+        self.file = file
+        self.left = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.left <= 0:
+            return 0
+        view = memoryview(buffer)[:self.left]
+        count = self.file.readinto(view)
+        self.left -= count
+        return count
+
+
+class PM25Ingest:
+    """
+    Поэтапная загрузка CSV показаний: месячные сводки и позиция, до
+    которой файл прочитан. update() дочитывает новые строки.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.date_format = None
+        self.columns = None
+        self.header_size = 0
+        self.offset = 0
+        self.fingerprint = b''
+        self.summary = pd.DataFrame(columns=SUMMARY_COLUMNS, dtype=float)
+
+    def _fingerprint(self, file, offset):
+        start = max(self.header_size, offset - FINGERPRINT_SIZE)
+        file.seek(start)
+        return file.read(offset - start)
+
+    def _complete_end(self, file, size):
+        """Конец последней полной строки не дальше size (недописанная строка читается в следующий раз)"""
+        position = size
+        while position > self.offset:
+            start = max(self.offset, position - 65536)
+            file.seek(start)
+            block = file.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+        return self.offset
+
+    def _read_header(self, file):
+        """Заголовок и формат даты по первым SAMPLE_ROWS строкам"""
+        file.seek(0)
+        header_line = file.readline()
+        self.header_size = len(header_line)
+        self.columns = pd.read_csv(io.BytesIO(header_line), delimiter=DELIMITER, nrows=0).columns.tolist()
+        file.seek(0)
+        sample = pd.read_csv(file, delimiter=DELIMITER, usecols=[DATE_COLUMN], dtype=str, nrows=SAMPLE_ROWS)
+        self.date_format = infer_date_format(sample[DATE_COLUMN])
+        if self.date_format is None:
+            print(f"Формат дат в {self.path} не определен, даты будут разбираться автоматически (медленнее)")
+        self.offset = self.header_size
+
+    def update(self):
+        """
+        Дочитывает новые строки файла (весь файл - при первом вызове или
+        если файл был заменен) и обновляет месячные сводки
+
+        Returns:
+            set: ключи month_keys затронутых месяцев
+        """
+        with self.lock:
+            with open(self.path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                appended = (self.columns is not None and size >= self.offset
+                            and self._fingerprint(file, self.offset) == self.fingerprint)
+                if not appended:
+                    self.reset()
+                    self._read_header(file)
+                end = self._complete_end(file, size)
+                touched = set()
+                if end > self.offset:
+                    file.seek(self.offset)
+                    reader = pd.read_csv(io.BufferedReader(_Limited(file, end - self.offset)),
+                                         delimiter=DELIMITER, header=None, names=self.columns,
+                                         usecols=[DATE_COLUMN, VALUE_COLUMN], dtype={DATE_COLUMN: str},
+                                         chunksize=self.chunk_size, encoding='utf-8')
+                    for chunk in reader:
+                        summary = summarize(parse_dates(chunk[DATE_COLUMN], self.date_format),
+                                            parse_values(chunk[VALUE_COLUMN]))
+                        touched.update(summary.index.tolist())
+                        self.summary = merge_summaries(self.summary, summary)
+                self.offset = end
+                self.fingerprint = self._fingerprint(file, end)
+            return touched
+
+    def monthly(self):
+        """Среднемесячные значения (year, month, Значение, date); пустой DataFrame, если показаний нет"""
+        if self.summary.empty:
+            return pd.DataFrame()
+        return monthly_frame(self.summary)
+
+
+_ingests = {}
+_ingests_lock = threading.Lock()
+
+
+def load_monthly(path):
+    """
+    Среднемесячные показания файла path. Состояние загрузки хранится на
+    процесс, поэтому повторный вызов (например, перезагрузка набора при
+    изменении файла) дочитывает только дописанные строки.
+    """
+    key = os.path.abspath(path)
+    with _ingests_lock:
+        ingest = _ingests.get(key)
+        if ingest is None:
+            ingest = _ingests[key] = PM25Ingest(path)
+    ingest.update()
+    monthly_data = ingest.monthly()
+    if monthly_data.empty:
+        print("После обработки дат все строки признаны недопустимыми")
+    return monthly_data
+
+
+# Хранилище показаний многих станций и веществ
+
+# Папка хранилища внутри Экология/Атмосфера
+STORE_NAME = 'Хранилище'
+
+# Необязательные столбцы CSV: станция и вещество (иначе - из имени папки и файла)
+STATION_COLUMN = 'Станция'
+POLLUTANT_COLUMN = 'Вещество'
+
+# Станция для файлов, лежащих прямо в Экология/Атмосфера (как PM2,5.csv)
+DEFAULT_STATION = 'Основная станция'
+
+INDEX_COLUMNS = ['station', 'pollutant', 'month', 'count', 'sum', 'min', 'max', 'file']
+UNSAFE_NAME_RE = re.compile(r'[\\/:*?"<>|]+')
+
+# Разделы хранятся в Feather, если установлен pyarrow, иначе - в CSV
+try:
+    import pyarrow.feather as feather
+    PARTITION_EXTENSION = '.feather'
+except ImportError:
+    feather = None
+    PARTITION_EXTENSION = '.csv'
+
+
+def month_name(key):
+    """Ключ month_keys -> 'ГГГГ-ММ'"""
+    return f'{key // 12:04d}-{key % 12 + 1:02d}'
+
+
+def month_start(key):
+    return pd.Timestamp(year=int(key // 12), month=int(key % 12 + 1), day=1)
+
+
+def time_range(start=None, end=None):
+    """
+    Границы [start, stop) по началу и концу периода; конец без времени
+    ('2022-03-31') включает весь день
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    stop = None
+    if end is not None:
+        end = pd.Timestamp(end)
+        stop = end + pd.Timedelta(days=1) if end == end.normalize() else end + pd.Timedelta(1)
+    return start, stop
+
+
+def _safe_name(name):
+    return UNSAFE_NAME_RE.sub('_', str(name)).strip() or '_'
+
+
+def source_files(directory, skip=None):
+    """
+    CSV показаний папки directory: файлы в самой папке (станция None) и в ее
+    подпапках (станция - имя подпапки); папка skip (хранилище) пропускается
+
+    Returns:
+        list: [(путь относительно directory, станция)]
+    """
+    files = []
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.lower().endswith('.csv'):
+            files.append((entry.name, None))
+        elif entry.is_dir() and (skip is None or os.path.abspath(entry.path) != os.path.abspath(skip)):
+            for sub_entry in sorted(os.scandir(entry.path), key=lambda sub_entry: sub_entry.name):
+                if sub_entry.is_file() and sub_entry.name.lower().endswith('.csv'):
+                    files.append((os.path.join(entry.name, sub_entry.name), entry.name))
+    return files
+
+
+def source_signature(directory):
+    """
+    Состояние CSV-файлов папки (без хранилища): кортеж (файл, mtime, размер),
+    меняется при правке, добавлении или удалении любого из них
+    """
+    signature = []
+    for file, _ in source_files(directory, skip=os.path.join(directory, STORE_NAME)):
+        try:
+            stat = os.stat(os.path.join(directory, file))
+        except OSError:
+            continue
+        signature.append((file, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class AirQualityStore:
+    """
+    Показания станций, разбитые на разделы станция/вещество/месяц:
+    <root>/<вещество>/<станция>/<ГГГГ-ММ>.feather со столбцами date и value.
+
+    Для каждого раздела в index.csv хранятся число, сумма, минимум и
+    максимум показаний, поэтому месячные графики строятся по индексу без
+    чтения разделов, а показания за период читаются только из разделов,
+    пересекающихся с этим периодом. Повторная запись тех же моментов
+    времени заменяет значения, так что файл можно загружать повторно.
+
+    Пример:
+        store = AirQualityStore('Экология/Атмосфера/Хранилище')
+        store.sync('Экология/Атмосфера')
+        store.monthly('Листвянка', 'PM2,5', '2021-01-01', '2022-12-31')
+        store.readings('Листвянка', 'PM2,5', '2022-03-01', '2022-03-07')
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.RLock()
+        self.index_path = os.path.join(root, 'index.csv')
+        self.sources_path = os.path.join(root, 'sources.csv')
+        self.partitions = {}
+        self.sources = {}
+        self._frame = None
+        if os.path.exists(self.index_path):
+            index = pd.read_csv(self.index_path, dtype={'station': str, 'pollutant': str, 'file': str})
+            for row in index.itertuples(index=False):
+                key = (row.station, row.pollutant, int(row.month))
+                self.partitions[key] = [int(row.count), float(row.sum), float(row.min), float(row.max), row.file]
+        if os.path.exists(self.sources_path):
+            sources = pd.read_csv(self.sources_path, dtype={'file': str})
+            self.sources = {row.file: (int(row.mtime), int(row.size)) for row in sources.itertuples(index=False)}
+
+    @property
+    def empty(self):
+        return not self.partitions
+
+    # Разделы
+
+    def _partition_file(self, station, pollutant, key):
+        return os.path.join(_safe_name(pollutant), _safe_name(station), month_name(key) + PARTITION_EXTENSION)
+
+    def _read_partition(self, file):
+        path = os.path.join(self.root, file)
+        if not os.path.exists(path):
+            return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'value': pd.Series(dtype=float)})
+        if file.endswith('.feather'):
+            return feather.read_table(path, memory_map=True).to_pandas()
+        return pd.read_csv(path, parse_dates=['date'])
+
+    def _write_partition(self, file, df):
+        path = os.path.join(self.root, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        if file.endswith('.feather'):
+            feather.write_feather(df, tmp_path, compression='uncompressed')
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def write(self, station, pollutant, dates, values):
+        """
+        Добавляет показания одной станции и вещества: каждый затронутый
+        месяц объединяется со своим разделом, сводка раздела пересчитывается
+
+        Returns:
+            set: ключи month_keys затронутых месяцев
+        """
+        valid = dates.notna().to_numpy() & values.notna().to_numpy()
+        readings = pd.DataFrame({'date': dates.to_numpy()[valid], 'value': values.to_numpy(dtype=float)[valid]})
+        if readings.empty:
+            return set()
+        keys = month_keys(readings['date'])
+        touched = set()
+        with self.lock:
+            for key, part in readings.groupby(keys):
+                key = int(key)
+                partition_key = (station, pollutant, key)
+                file = self._partition_file(station, pollutant, key)
+                part = pd.concat([self._read_partition(file), part], ignore_index=True)
+                # Повтор момента времени (повторная загрузка файла) заменяет прежнее значение
+                part = part.drop_duplicates('date', keep='last').sort_values('date', ignore_index=True)
+                self._write_partition(file, part)
+                values_array = part['value'].to_numpy()
+                self.partitions[partition_key] = [len(part), float(values_array.sum()), float(values_array.min()),
+                                                  float(values_array.max()), file]
+                touched.add(key)
+            self._frame = None
+        return touched
+
+    def ingest(self, path, station=None, pollutant=None, chunk_size=CHUNK_SIZE):
+        """
+        Загружает CSV показаний (Дата/время;Значение и, если есть, Станция;Вещество)
+        по частям с форматом даты, определенным по первым строкам
+
+        Args:
+            station, pollutant: для файлов без соответствующих столбцов
+                (по умолчанию - DEFAULT_STATION и имя файла)
+
+        Returns:
+            set: затронутые разделы (станция, вещество, ключ месяца)
+        """
+        station = station or DEFAULT_STATION
+        pollutant = pollutant or os.path.splitext(os.path.basename(path))[0]
+        columns = pd.read_csv(path, delimiter=DELIMITER, nrows=0).columns.tolist()
+        usecols = [column for column in (DATE_COLUMN, VALUE_COLUMN, STATION_COLUMN, POLLUTANT_COLUMN)
+                   if column in columns]
+        sample = pd.read_csv(path, delimiter=DELIMITER, usecols=[DATE_COLUMN], dtype=str, nrows=SAMPLE_ROWS)
+        date_format = infer_date_format(sample[DATE_COLUMN])
+        touched = set()
+        reader = pd.read_csv(path, delimiter=DELIMITER, usecols=usecols, chunksize=chunk_size,
+                             dtype={DATE_COLUMN: str, STATION_COLUMN: str, POLLUTANT_COLUMN: str})
+        for chunk in reader:
+            chunk = chunk.assign(date=parse_dates(chunk[DATE_COLUMN], date_format),
+                                 value=parse_values(chunk[VALUE_COLUMN]))
+            if STATION_COLUMN not in chunk:
+                chunk[STATION_COLUMN] = station
+            if POLLUTANT_COLUMN not in chunk:
+                chunk[POLLUTANT_COLUMN] = pollutant
+            for (chunk_station, chunk_pollutant), part in chunk.groupby([STATION_COLUMN, POLLUTANT_COLUMN]):
+                for key in self.write(chunk_station, chunk_pollutant, part['date'], part['value']):
+                    touched.add((chunk_station, chunk_pollutant, key))
+        return touched
+
+    def sync(self, directory):
+        """
+        Загружает новые и изменившиеся CSV из directory: файлы в самой папке -
+        показания DEFAULT_STATION, файлы в подпапках - станции с именем подпапки;
+        вещество - имя файла. Неизменившиеся файлы (по mtime и размеру) пропускаются.
+
+        Returns:
+            set: затронутые разделы (станция, вещество, ключ месяца)
+        """
+        touched = set()
+        changed = False
+        with self.lock:
+            for file, station in source_files(directory, skip=self.root):
+                path = os.path.join(directory, file)
+                stat = os.stat(path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self.sources.get(file) == signature:
+                    continue
+                try:
+                    touched |= self.ingest(path, station=station)
+                    self.sources[file] = signature
+                    changed = True
+                except Exception as e:
+                    print(f"Ошибка при загрузке показаний {path} в хранилище: {e}")
+            # Список файлов сохраняется и без новых разделов, иначе следующий open_store прочитал бы файл снова
+            if changed or not os.path.exists(self.index_path):
+                self.save()
+        return touched
+
+    def save(self):
+        """Записывает индекс разделов и список загруженных файлов"""
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            for path, frame in ((self.index_path, self.frame()),
+                                (self.sources_path, pd.DataFrame(
+                                    [(file, mtime, size) for file, (mtime, size) in self.sources.items()],
+                                    columns=['file', 'mtime', 'size']))):
+                frame.to_csv(path + '.tmp', index=False)
+                os.replace(path + '.tmp', path)
+
+    # Запросы
+
+    def frame(self):
+        """Индекс разделов: station, pollutant, month (ключ), count, sum, min, max, file"""
+        with self.lock:
+            if self._frame is None:
+                self._frame = pd.DataFrame([list(key) + values for key, values in sorted(self.partitions.items())],
+                                           columns=INDEX_COLUMNS)
+            return self._frame
+
+    def stations(self, pollutant=None):
+        with self.lock:
+            return sorted({station for station, item, _ in self.partitions if pollutant in (None, item)})
+
+    def pollutants(self, station=None):
+        with self.lock:
+            return sorted({item for name, item, _ in self.partitions if station in (None, name)})
+
+    def period(self, station=None, pollutant=None):
+        """(начало первого месяца, начало последнего месяца) с показаниями или (None, None)"""
+        with self.lock:
+            keys = [key for name, item, key in self.partitions
+                    if station in (None, name) and pollutant in (None, item)]
+        if not keys:
+            return None, None
+        return month_start(min(keys)), month_start(max(keys))
+
+    def _months(self, station, pollutant, start=None, end=None):
+        """Сводки разделов, пересекающихся с периодом, по возрастанию месяца"""
+        start, stop = time_range(start, end)
+        index = self.frame()
+        index = index[(index['station'] == station) & (index['pollutant'] == pollutant)]
+        if start is not None:
+            index = index[index['month'] >= int(month_keys(pd.Series([start]))[0])]
+        if stop is not None:
+            index = index[index['month'] <= int(month_keys(pd.Series([stop - pd.Timedelta(1)]))[0])]
+        return index, start, stop
+
+    def monthly(self, station, pollutant, start=None, end=None):
+        """
+        Месячные сводки по индексу, без чтения разделов (крайние месяцы
+        периода берутся целиком)
+
+        Returns:
+            DataFrame: date, mean, min, max, count
+        """
+        index, _, _ = self._months(station, pollutant, start, end)
+        return pd.DataFrame({
+            'date': [month_start(key) for key in index['month']],
+            'mean': (index['sum'] / index['count']).to_numpy(),
+            'min': index['min'].to_numpy(),
+            'max': index['max'].to_numpy(),
+            'count': index['count'].to_numpy(),
+        })
+
+    def readings(self, station, pollutant, start=None, end=None):
+        """Показания за период (date, value): читаются только разделы месяцев периода"""
+        index, start, stop = self._months(station, pollutant, start, end)
+        parts = [self._read_partition(file) for file in index['file']]
+        if not parts:
+            return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'value': pd.Series(dtype=float)})
+        readings = pd.concat(parts, ignore_index=True)
+        if start is not None:
+            readings = readings[readings['date'] >= start]
+        if stop is not None:
+            readings = readings[readings['date'] < stop]
+        return readings.reset_index(drop=True)
+
+    def summary(self, station, pollutant, start=None, end=None):
+        """
+        Число, сумма, минимум, максимум и среднее за период: месяцы, целиком
+        входящие в период, берутся из индекса, читаются только крайние
+
+        Returns:
+            dict: count, sum, min, max, mean (для пустого периода count = 0)
+        """
+        index, start, stop = self._months(station, pollutant, start, end)
+        counts, sums, minimums, maximums = [], [], [], []
+        for row in index.itertuples(index=False):
+            first = month_start(row.month)
+            following = first + pd.offsets.MonthBegin(1)
+            if (start is None or first >= start) and (stop is None or following <= stop):
+                counts.append(row.count)
+                sums.append(row.sum)
+                minimums.append(row.min)
+                maximums.append(row.max)
+                continue
+            part = self._read_partition(row.file)
+            inside = np.ones(len(part), dtype=bool)
+            if start is not None:
+                inside &= (part['date'] >= start).to_numpy()
+            if stop is not None:
+                inside &= (part['date'] < stop).to_numpy()
+            values = part['value'][inside]
+            if len(values):
+                counts.append(len(values))
+                sums.append(float(values.sum()))
+                minimums.append(float(values.min()))
+                maximums.append(float(values.max()))
+        count = int(sum(counts))
+        if not count:
+            return {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'mean': None}
+        total = float(sum(sums))
+        return {'count': count, 'sum': total, 'min': float(min(minimums)), 'max': float(max(maximums)),
+                'mean': total / count}
+
+
+# Блокировки синхронизации по корню хранилища: одну папку синхронизирует один поток
+_store_locks = {}
+
+
+def open_store(directory):
+    """
+    Хранилище показаний папки directory (Экология/Атмосфера), синхронизированное
+    с ее CSV-файлами.
+
+    Каждый вызов строит новый объект по сохраненному индексу и синхронизирует
+    его до того, как вернуть, поэтому ранее возвращенное хранилище не меняется
+    и читатели не видят наполовину загруженных данных. Файлы разделов
+    заменяются атомарно (os.replace).
+    """
+    root = os.path.join(directory, STORE_NAME)
+    key = os.path.abspath(root)
+    with _ingests_lock:
+        lock = _store_locks.setdefault(key, threading.Lock())
+    with lock:
+        store = AirQualityStore(root)
+        store.sync(directory)
+    return store
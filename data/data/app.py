@@ -11,6 +11,9 @@ import traceback
 import sys
 from dash_bootstrap_templates import load_figure_template
 
+# Наборы данных читаются лениво при первом показе вкладки, общий кэш - в datasets.py
+import datasets
+
 # Подавление предупреждений
 warnings.filterwarnings('ignore')
 
@@ -86,12 +89,6 @@ except Exception as e:
 
 try:
     from data_analysis import (
-        load_and_prepare_tourism_data,
-        load_and_prepare_water_data,
-        load_and_prepare_fish_data,
-        load_and_prepare_air_quality_data,
-        load_and_prepare_earthquake_data,
-        load_and_prepare_fire_data,
         create_combined_ecological_trends,
         create_tourism_forecast
     )
@@ -182,277 +179,12 @@ app = dash.Dash(__name__,
 )
 server = app.server
 
+# Изменившиеся файлы данных перечитываются в фоне без перезапуска сервера
+datasets.watch()
+
 # Load figure template for consistent styling
 load_figure_template("cosmo")
 
-# Инициализация данных
-tourism_data = pd.DataFrame()
-water_level_data = pd.DataFrame()
-fish_catch_data = pd.DataFrame()
-air_quality_data = pd.DataFrame()
-earthquake_data = None  # Может быть GeoDataFrame или None
-fire_data = None  # Может быть GeoDataFrame или None
-
-# Проверка доступности файлов данных
-data_files_status = {
-    "Туризм": False,
-    "Уровень воды": False,
-    "Вылов рыбы": False,
-    "Качество воздуха": False,
-    "Землетрясения": False,
-    "Пожары": False,
-    "География": False
-}
-
-# Try to preload data
-try:
-    # Проверка наличия папок и файлов
-    if os.path.exists('Туризм') and os.path.exists('Туризм/Турпоток.xlsx'):
-        if DATA_ANALYSIS_MODULE_AVAILABLE:
-            tourism_data = load_and_prepare_tourism_data()
-            if not tourism_data.empty:
-                data_files_status["Туризм"] = True
-        else:
-            try:
-                tourism_data = pd.read_excel('Туризм/Турпоток.xlsx')
-                tourism_data['Год'] = tourism_data['Год'].astype(str)
-                tourism_data['growth_rate'] = tourism_data['Количество туристов, тыс. чел.'].pct_change() * 100
-                data_files_status["Туризм"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных туризма: {e}")
-    
-    if os.path.exists('Экология') and os.path.exists('Экология/Уровень воды.xlsx'):
-        if DATA_ANALYSIS_MODULE_AVAILABLE:
-            water_level_data = load_and_prepare_water_data()
-            if not water_level_data.empty:
-                data_files_status["Уровень воды"] = True
-        else:
-            try:
-                water_level_data = pd.read_excel('Экология/Уровень воды.xlsx')
-                data_files_status["Уровень воды"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных уровня воды: {e}")
-    
-    if os.path.exists('Леса и животные') and os.path.exists('Леса и животные/Вылов рыбы.xlsx'):
-        if DATA_ANALYSIS_MODULE_AVAILABLE:
-            fish_catch_data = load_and_prepare_fish_data()
-            if not fish_catch_data.empty:
-                data_files_status["Вылов рыбы"] = True
-        else:
-            try:
-                fish_catch_data = pd.read_excel('Леса и животные/Вылов рыбы.xlsx')
-                data_files_status["Вылов рыбы"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных вылова рыбы: {e}")
-    
-    if os.path.exists('Экология/Атмосфера') and os.path.exists('Экология/Атмосфера/PM2,5.csv'):
-        if DATA_ANALYSIS_MODULE_AVAILABLE:
-            try:
-                air_quality_data = load_and_prepare_air_quality_data()
-                if not air_quality_data.empty:
-                    data_files_status["Качество воздуха"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных качества воздуха через модуль: {e}")
-                # Пробуем загрузить самостоятельно
-                try:
-                    air_pm25 = pd.read_csv('Экология/Атмосфера/PM2,5.csv', delimiter=';')
-                    
-                    # Пробуем разные форматы дат
-                    try:
-                        # Сначала пытаемся с явным указанием формата DD.MM.YYYY
-                        air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], format="%d.%m.%Y %H:%M:%S", errors='coerce')
-                    except Exception:
-                        try:
-                            # Затем пробуем автоопределение с dayfirst=True
-                            air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], dayfirst=True, errors='coerce')
-                        except Exception:
-                            # В крайнем случае используем mixed формат
-                            air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], format='mixed', dayfirst=True, errors='coerce')
-                    
-                    # Отбрасываем строки с недопустимыми датами
-                    air_pm25 = air_pm25.dropna(subset=['date'])
-                    
-                    # Если есть данные после фильтрации, создаем итоговый DataFrame
-                    if not air_pm25.empty:
-                        air_pm25['month'] = air_pm25['date'].dt.month
-                        air_pm25['year'] = air_pm25['date'].dt.year
-                        air_quality_data = air_pm25.groupby(['year', 'month'])['Значение'].mean().reset_index()
-                        air_quality_data['date'] = pd.to_datetime(air_quality_data[['year', 'month']].assign(day=1))
-                        data_files_status["Качество воздуха"] = True
-                    else:
-                        print("После обработки дат нет допустимых строк в данных качества воздуха")
-                except Exception as e:
-                    print(f"Ошибка при ручной загрузке данных качества воздуха: {e}")
-        else:
-            try:
-                air_pm25 = pd.read_csv('Экология/Атмосфера/PM2,5.csv', delimiter=';')
-                
-                # Пробуем разные форматы дат
-                try:
-                    # Сначала пытаемся с явным указанием формата DD.MM.YYYY
-                    air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], format="%d.%m.%Y %H:%M:%S", errors='coerce')
-                except Exception:
-                    try:
-                        # Затем пробуем автоопределение с dayfirst=True
-                        air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], dayfirst=True, errors='coerce')
-                    except Exception:
-                        # В крайнем случае используем mixed формат
-                        air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], format='mixed', dayfirst=True, errors='coerce')
-                
-                # Отбрасываем строки с недопустимыми датами
-                air_pm25 = air_pm25.dropna(subset=['date'])
-                
-                # Если есть данные после фильтрации, создаем итоговый DataFrame
-                if not air_pm25.empty:
-                    air_pm25['month'] = air_pm25['date'].dt.month
-                    air_pm25['year'] = air_pm25['date'].dt.year
-                    air_quality_data = air_pm25.groupby(['year', 'month'])['Значение'].mean().reset_index()
-                    air_quality_data['date'] = pd.to_datetime(air_quality_data[['year', 'month']].assign(day=1))
-                    data_files_status["Качество воздуха"] = True
-                else:
-                    print("После обработки дат нет допустимых строк в данных качества воздуха")
-            except Exception as e:
-                print(f"Ошибка при загрузке данных качества воздуха: {e}")
-    
-    # Geography data - only if geopandas is available
-    if GEODATA_AVAILABLE:
-        if os.path.exists('География'):
-            try:
-                if os.path.exists('География/baikal_simply.geojson'):
-                    baikal_region = gpd.read_file('География/baikal_simply.geojson')
-                    data_files_status["География"] = True
-                else:
-                    print("Файл с контурами Байкала не найден, создаю...")
-                    import generate_test_data
-                    generate_test_data.generate_geographic_data()
-                    if os.path.exists('География/baikal_simply.geojson'):
-                        baikal_region = gpd.read_file('География/baikal_simply.geojson')
-                        data_files_status["География"] = True
-                
-                if os.path.exists('География/zapovedniki.geojson'):
-                    zapovedniki = gpd.read_file('География/zapovedniki.geojson')
-                if os.path.exists('География/city_points.geojson'):
-                    city_points = gpd.read_file('География/city_points.geojson')
-            except Exception as e:
-                print(f"Ошибка при загрузке географических данных: {e}")
-        else:
-            print("Папка с географическими данными не найдена, создаю...")
-            try:
-                import generate_test_data
-                generate_test_data.generate_geographic_data()
-                
-                if os.path.exists('География/baikal_simply.geojson'):
-                    baikal_region = gpd.read_file('География/baikal_simply.geojson')
-                    data_files_status["География"] = True
-                if os.path.exists('География/zapovedniki.geojson'):
-                    zapovedniki = gpd.read_file('География/zapovedniki.geojson')
-                if os.path.exists('География/city_points.geojson'):
-                    city_points = gpd.read_file('География/city_points.geojson')
-            except Exception as e:
-                print(f"Ошибка при создании географических данных: {e}")
-    elif os.path.exists('География/baikal_simply.geojson'):
-        # Если geopandas не доступен, но файлы есть, отметим это
-        data_files_status["География"] = "Файлы доступны, но требуется geopandas"
-    
-    # Earthquake data - only if geopandas is available
-    if GEODATA_AVAILABLE and os.path.exists('Землетрясения'):
-        if DATA_ANALYSIS_MODULE_AVAILABLE:
-            try:
-                earthquake_data = load_and_prepare_earthquake_data()
-                if earthquake_data is not None and not earthquake_data.empty:
-                    data_files_status["Землетрясения"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных землетрясений через модуль анализа: {e}")
-                # Пробуем загрузить напрямую, если модуль анализа не справился
-                try:
-                    if os.path.exists('Землетрясения/earthquakes_BR_1923-2023.geojson'):
-                        earthquake_data = gpd.read_file('Землетрясения/earthquakes_BR_1923-2023.geojson')
-                        earthquake_data['year'] = pd.to_datetime(earthquake_data['date']).dt.year
-                        earthquake_data['decade'] = (earthquake_data['year'] // 10) * 10
-                        data_files_status["Землетрясения"] = True
-                    else:
-                        print("Запуск генерации данных о землетрясениях...")
-                        import generate_test_data
-                        generate_test_data.generate_earthquake_data()
-                        if os.path.exists('Землетрясения/earthquakes_BR_1923-2023.geojson'):
-                            earthquake_data = gpd.read_file('Землетрясения/earthquakes_BR_1923-2023.geojson')
-                            earthquake_data['year'] = pd.to_datetime(earthquake_data['date']).dt.year
-                            earthquake_data['decade'] = (earthquake_data['year'] // 10) * 10
-                            data_files_status["Землетрясения"] = True
-                except Exception as e:
-                    print(f"Ошибка при загрузке данных землетрясений напрямую: {e}")
-        else:
-            try:
-                if os.path.exists('Землетрясения/earthquakes_BR_1923-2023.geojson'):
-                    earthquake_data = gpd.read_file('Землетрясения/earthquakes_BR_1923-2023.geojson')
-                    earthquake_data['year'] = pd.to_datetime(earthquake_data['date']).dt.year
-                    earthquake_data['decade'] = (earthquake_data['year'] // 10) * 10
-                    data_files_status["Землетрясения"] = True
-                else:
-                    print("Запуск генерации данных о землетрясениях...")
-                    import generate_test_data
-                    generate_test_data.generate_earthquake_data()
-                    if os.path.exists('Землетрясения/earthquakes_BR_1923-2023.geojson'):
-                        earthquake_data = gpd.read_file('Землетрясения/earthquakes_BR_1923-2023.geojson')
-                        earthquake_data['year'] = pd.to_datetime(earthquake_data['date']).dt.year
-                        earthquake_data['decade'] = (earthquake_data['year'] // 10) * 10
-                        data_files_status["Землетрясения"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных землетрясений: {e}")
-    
-    # Fire data - only if geopandas is available
-    if GEODATA_AVAILABLE and os.path.exists('Пожары'):
-        if DATA_ANALYSIS_MODULE_AVAILABLE:
-            try:
-                fire_data = load_and_prepare_fire_data()
-                if fire_data is not None and not fire_data.empty:
-                    data_files_status["Пожары"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных пожаров через модуль анализа: {e}")
-                # Пробуем загрузить напрямую, если модуль анализа не справился
-                try:
-                    if os.path.exists('Пожары/fires_BR_2011-2021.geojson'):
-                        fire_data = gpd.read_file('Пожары/fires_BR_2011-2021.geojson', rows=1000)
-                        fire_data['year'] = pd.to_datetime(fire_data['date']).dt.year
-                        data_files_status["Пожары"] = True
-                    else:
-                        print("Запуск генерации данных о пожарах...")
-                        import generate_test_data
-                        generate_test_data.generate_fire_data()
-                        if os.path.exists('Пожары/fires_BR_2011-2021.geojson'):
-                            fire_data = gpd.read_file('Пожары/fires_BR_2011-2021.geojson', rows=1000)
-                            fire_data['year'] = pd.to_datetime(fire_data['date']).dt.year
-                            data_files_status["Пожары"] = True
-                except Exception as e:
-                    print(f"Ошибка при загрузке данных пожаров напрямую: {e}")
-        else:
-            try:
-                if os.path.exists('Пожары/fires_BR_2011-2021.geojson'):
-                    fire_data = gpd.read_file('Пожары/fires_BR_2011-2021.geojson', rows=1000)
-                    fire_data['year'] = pd.to_datetime(fire_data['date']).dt.year
-                    data_files_status["Пожары"] = True
-                else:
-                    print("Запуск генерации данных о пожарах...")
-                    import generate_test_data
-                    generate_test_data.generate_fire_data()
-                    if os.path.exists('Пожары/fires_BR_2011-2021.geojson'):
-                        fire_data = gpd.read_file('Пожары/fires_BR_2011-2021.geojson', rows=1000)
-                        fire_data['year'] = pd.to_datetime(fire_data['date']).dt.year
-                        data_files_status["Пожары"] = True
-            except Exception as e:
-                print(f"Ошибка при загрузке данных пожаров: {e}")
-    
-    # Данные успешно загружены (хотя бы частично)
-    print("Статус загрузки данных:")
-    for key, value in data_files_status.items():
-        print(f"  {key}: {'Успешно' if value is True else value if isinstance(value, str) else 'Ошибка'}")
-    
-    data_loaded = True
-except Exception as e:
-    print(f"Общая ошибка загрузки данных: {e}")
-    traceback.print_exc()
-    data_loaded = False
-
 # Create a color palette
 colors = {
     'primary': '#1f77b4',
@@ -530,8 +262,8 @@ def render_content(tab):
 def render_map_tab():
     if not GEODATA_AVAILABLE:
         map_warning = "Географические библиотеки не установлены. Отображается упрощенная карта."
-        if isinstance(data_files_status["География"], str):
-            map_warning += " " + data_files_status["География"]
+        if os.path.exists(datasets.DATASETS['baikal_region'].path):
+            map_warning += " Файлы доступны, но требуется geopandas"
         
         return dbc.Card([
             dbc.CardBody([
@@ -553,8 +285,8 @@ def render_map_tab():
     else:
         # Простая карта если модуль недоступен
         try:
-            # Проверяем наличие переменной baikal_region в локальной области видимости
-            if 'baikal_region' in locals() or 'baikal_region' in globals():
+            baikal_region = datasets.get('baikal_region')
+            if baikal_region is not None and not baikal_region.empty:
                 try:
                     baikal_geojson = json.loads(baikal_region.to_json())
                     
@@ -569,7 +301,8 @@ def render_map_tab():
                     )
                     
                     # Добавляем города, если они доступны
-                    if 'city_points' in locals() or 'city_points' in globals():
+                    city_points = datasets.get('city_points')
+                    if city_points is not None and not city_points.empty:
                         detailed_map.add_scattermapbox(
                             lat=city_points.geometry.y,
                             lon=city_points.geometry.x,
@@ -587,7 +320,7 @@ def render_map_tab():
                     print(f"Ошибка при создании карты из геоданных: {e}")
                     detailed_map = create_simple_map()
             else:
-                print("Переменная baikal_region не найдена, создаем простую карту")
+                print("Контуры Байкала недоступны, создаем простую карту")
                 detailed_map = create_simple_map()
         except Exception as e:
             print(f"Ошибка при создании простой карты: {e}")
@@ -630,10 +363,10 @@ def render_ecology_tab():
     )
     
     # Create water level plot if data is available
-    if data_files_status["Уровень воды"]:
+    if datasets.available('water_level'):
         try:
             water_fig = px.line(
-                water_level_data, 
+                datasets.get('water_level'), 
                 x='Год', 
                 y='Уровень, см', 
                 title='Динамика изменения уровня воды в озере Байкал',
@@ -649,10 +382,10 @@ def render_ecology_tab():
         water_fig = create_placeholder_figure("Данные об уровне воды недоступны")
     
     # Create fish catch plot if data is available
-    if data_files_status["Вылов рыбы"]:
+    if datasets.available('fish_catch'):
         try:
             fish_fig = px.bar(
-                fish_catch_data,
+                datasets.get('fish_catch'),
                 x='Год',
                 y='Вылов, тонн',
                 color='Вид',
@@ -685,7 +418,7 @@ def render_ecology_tab():
     )
     
     # Create combined ecological trends if data is available
-    if DATA_ANALYSIS_MODULE_AVAILABLE and data_files_status["Уровень воды"] and data_files_status["Вылов рыбы"]:
+    if DATA_ANALYSIS_MODULE_AVAILABLE and datasets.available('water_level') and datasets.available('fish_catch'):
         try:
             combined_eco_fig = create_combined_ecological_trends()
             panels.append(
@@ -699,10 +432,10 @@ def render_ecology_tab():
             print(f"Ошибка при создании комбинированного графика: {e}")
     
     # Create air quality figure if data is available
-    if data_files_status["Качество воздуха"]:
+    if datasets.available('air_quality'):
         try:
             air_fig = px.line(
-                air_quality_data,
+                datasets.get('air_quality'),
                 x='date',
                 y='Значение',
                 title='Среднемесячная концентрация PM2.5 в атмосфере',
@@ -721,10 +454,112 @@ def render_ecology_tab():
         except Exception as e:
             print(f"Ошибка при создании графика качества воздуха: {e}")
     
+    # Показания станций из хранилища: любая станция, вещество и период
+    if datasets.available('air_quality_store'):
+        try:
+            panels.append(render_air_quality_explorer(datasets.get('air_quality_store')))
+        except Exception as e:
+            print(f"Ошибка при отображении показаний станций: {e}")
+    
     return dbc.Card([
         dbc.CardBody(panels)
     ])
 
+# Период, до которого на графике станции показываются отдельные показания, а не месячные сводки
+AIR_READINGS_MAX_DAYS = 93
+
+def render_air_quality_explorer(store):
+    stations = store.stations()
+    station = stations[0]
+    pollutants = store.pollutants(station)
+    first_month, last_month = store.period()
+    return dbc.Row([
+        dbc.Col([
+            html.H5("Качество воздуха по станциям", className="mt-4"),
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Станция"),
+                    dcc.Dropdown(id='air-station', options=stations, value=station, clearable=False)
+                ], width=12, md=4),
+                dbc.Col([
+                    html.Label("Вещество"),
+                    dcc.Dropdown(id='air-pollutant', options=pollutants, value=pollutants[0], clearable=False)
+                ], width=12, md=4),
+                dbc.Col([
+                    html.Label("Период"),
+                    dcc.DatePickerRange(
+                        id='air-period',
+                        min_date_allowed=first_month.date(),
+                        max_date_allowed=(last_month + pd.offsets.MonthEnd(1)).date(),
+                        start_date=max(first_month, last_month - pd.DateOffset(years=1)).date(),
+                        end_date=(last_month + pd.offsets.MonthEnd(1)).date(),
+                        display_format='DD.MM.YYYY'
+                    )
+                ], width=12, md=4)
+            ]),
+            html.Div(id='air-summary', className="mt-3"),
+            dcc.Graph(id='air-station-graph')
+        ], width=12)
+    ])
+
+@app.callback(
+    Output('air-pollutant', 'options'),
+    Output('air-pollutant', 'value'),
+    Input('air-station', 'value'),
+    State('air-pollutant', 'value')
+)
+def update_air_pollutants(station, pollutant):
+    pollutants = datasets.get('air_quality_store').pollutants(station)
+    return pollutants, pollutant if pollutant in pollutants else (pollutants[0] if pollutants else None)
+
+@app.callback(
+    Output('air-station-graph', 'figure'),
+    Output('air-summary', 'children'),
+    Input('air-station', 'value'),
+    Input('air-pollutant', 'value'),
+    Input('air-period', 'start_date'),
+    Input('air-period', 'end_date')
+)
+def update_air_station_graph(station, pollutant, start_date, end_date):
+    store = datasets.get('air_quality_store')
+    if store is None or store.empty or not station or not pollutant:
+        return create_placeholder_figure("Показания станций недоступны"), None
+    try:
+        title = f"{pollutant}, станция {station}"
+        short_period = (start_date and end_date and
+                        pd.Timestamp(end_date) - pd.Timestamp(start_date) <= pd.Timedelta(days=AIR_READINGS_MAX_DAYS))
+        if short_period:
+            # Короткий период: отдельные показания, читаются только разделы его месяцев
+            readings = store.readings(station, pollutant, start_date, end_date)
+            fig = px.line(readings, x='date', y='value', title=title,
+                          labels={'value': 'Концентрация', 'date': 'Дата'},
+                          color_discrete_sequence=[colors['tertiary']])
+        else:
+            # Длинный период: месячные среднее, минимум и максимум из индекса хранилища
+            monthly = store.monthly(station, pollutant, start_date, end_date)
+            fig = go.Figure([
+                go.Scatter(x=monthly['date'], y=monthly['max'], name='Максимум', mode='lines',
+                           line=dict(width=0), showlegend=False),
+                go.Scatter(x=monthly['date'], y=monthly['min'], name='Минимум', mode='lines',
+                           line=dict(width=0), fill='tonexty', fillcolor='rgba(214, 39, 40, 0.15)',
+                           showlegend=False),
+                go.Scatter(x=monthly['date'], y=monthly['mean'], name='Среднее за месяц', mode='lines+markers',
+                           line=dict(color=colors['tertiary']))
+            ])
+            fig.update_layout(title=title, xaxis_title='Месяц', yaxis_title='Концентрация')
+        fig.update_layout(height=400, hovermode="x unified")
+        
+        summary = store.summary(station, pollutant, start_date, end_date)
+        if not summary['count']:
+            return fig, dbc.Alert("За выбранный период показаний нет", color="info")
+        return fig, html.P(
+            f"Показаний: {summary['count']}, среднее: {summary['mean']:.1f}, "
+            f"минимум: {summary['min']:.1f}, максимум: {summary['max']:.1f}"
+        )
+    except Exception as e:
+        print(f"Ошибка при построении графика станции: {e}")
+        return create_placeholder_figure(f"Ошибка при обработке данных: {str(e)}"), None
+
 def render_tourism_tab():
     panels = []
     
@@ -737,7 +572,7 @@ def render_tourism_tab():
         ])
     )
     
-    if not data_files_status["Туризм"]:
+    if not datasets.available('tourism'):
         panels.append(
             dbc.Row([
                 dbc.Col([
@@ -751,6 +586,8 @@ def render_tourism_tab():
         )
     else:
         try:
+            tourism_data = datasets.get('tourism')
+            
             # Create tourism plot
             tourism_fig = px.bar(
                 tourism_data,
@@ -864,52 +701,24 @@ def render_natural_tab():
         )
         return dbc.Card([dbc.CardBody(panels)])
     
-    # Проверяем наличие данных о землетрясениях и генерируем их при необходимости
-    if not data_files_status["Землетрясения"]:
+    # Отсутствующий файл создается генератором тестовых данных при первой загрузке (см. datasets.py)
+    earthquake_data = datasets.get('earthquakes')
+    if earthquake_data is None or earthquake_data.empty:
         panels.append(
             dbc.Row([
                 dbc.Col([
                     dbc.Alert(
-                        [
-                            html.H5("Данные о землетрясениях отсутствуют"),
-                            html.P("Попытка автоматического создания тестовых данных...")
-                        ],
-                        color="info", 
+                        "Данные о землетрясениях недоступны. Проверьте наличие файла 'earthquakes_BR_1923-2023.geojson' в папке 'Землетрясения'.",
+                        color="danger",
                         id="earthquake-data-alert"
-                    )
+                    ),
+                    dcc.Graph(figure=create_placeholder_figure("Данные о землетрясениях недоступны"))
                 ], width=12)
             ])
         )
-        
-        try:
-            print("Генерация данных о землетрясениях...")
-            import generate_test_data
-            generate_test_data.generate_earthquake_data()
-            print("Данные о землетрясениях созданы.")
-            
-            # Пробуем загрузить созданные данные
-            if os.path.exists('Землетрясения/earthquakes_BR_1923-2023.geojson'):
-                earthquake_data = gpd.read_file('Землетрясения/earthquakes_BR_1923-2023.geojson')
-                earthquake_data['year'] = pd.to_datetime(earthquake_data['date']).dt.year
-                earthquake_data['decade'] = (earthquake_data['year'] // 10) * 10
-                data_files_status["Землетрясения"] = True
-                print("Данные о землетрясениях успешно загружены после генерации.")
-        except Exception as e:
-            print(f"Ошибка при генерации данных о землетрясениях: {e}")
-            panels.append(
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Alert(
-                            f"Не удалось создать данные о землетрясениях: {str(e)}",
-                            color="danger"
-                        ),
-                        dcc.Graph(figure=create_placeholder_figure("Данные о землетрясениях недоступны"))
-                    ], width=12)
-                ])
-            )
     
     # Visualize earthquake data if available
-    if data_files_status["Землетрясения"]:
+    else:
         try:
             # Process earthquake data for visualization
             eq_by_decade = earthquake_data.groupby('decade').size().reset_index(name='count')
@@ -1025,50 +834,22 @@ def render_natural_tab():
                 ])
             )
     
-    # Проверяем наличие данных о пожарах и генерируем их при необходимости
-    if not data_files_status["Пожары"]:
+    fire_data = datasets.get('fires')
+    if fire_data is None or fire_data.empty:
         panels.append(
             dbc.Row([
                 dbc.Col([
                     dbc.Alert(
-                        [
-                            html.H5("Данные о пожарах отсутствуют"),
-                            html.P("Попытка автоматического создания тестовых данных...")
-                        ],
-                        color="info", 
+                        "Данные о пожарах недоступны. Проверьте наличие файла 'fires_BR_2011-2021.geojson' в папке 'Пожары'.",
+                        color="danger",
                         id="fire-data-alert"
                     )
                 ], width=12)
             ])
         )
-        
-        try:
-            print("Генерация данных о пожарах...")
-            import generate_test_data
-            generate_test_data.generate_fire_data()
-            print("Данные о пожарах созданы.")
-            
-            # Пробуем загрузить созданные данные
-            if os.path.exists('Пожары/fires_BR_2011-2021.geojson'):
-                fire_data = gpd.read_file('Пожары/fires_BR_2011-2021.geojson', rows=1000)
-                fire_data['year'] = pd.to_datetime(fire_data['date']).dt.year
-                data_files_status["Пожары"] = True
-                print("Данные о пожарах успешно загружены после генерации.")
-        except Exception as e:
-            print(f"Ошибка при генерации данных о пожарах: {e}")
-            panels.append(
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Alert(
-                            f"Не удалось создать данные о пожарах: {str(e)}",
-                            color="danger"
-                        )
-                    ], width=12)
-                ])
-            )
     
     # Process fire data for visualization if available
-    if data_files_status["Пожары"]:
+    else:
         try:
             fire_by_year = fire_data.groupby('year').size().reset_index(name='count')
             
@@ -9,6 +9,9 @@ import warnings
 import os
 from dash_bootstrap_templates import load_figure_template
 
+# Наборы данных читаются лениво при первом показе вкладки, общий кэш - в datasets.py
+import datasets
+
 # Подавление предупреждений
 warnings.filterwarnings('ignore')
 
@@ -35,76 +38,6 @@ if missing_files:
     except Exception as e:
         print(f"Ошибка при генерации тестовых данных: {e}")
 
-# Инициализация данных
-tourism_data = pd.DataFrame()
-water_level_data = pd.DataFrame()
-fish_catch_data = pd.DataFrame()
-air_quality_data = pd.DataFrame()
-
-# Статус загрузки данных
-data_files_status = {
-    "Туризм": False,
-    "Уровень воды": False,
-    "Вылов рыбы": False,
-    "Качество воздуха": False
-}
-
-# Загрузка данных
-try:
-    if os.path.exists('Туризм/Турпоток.xlsx'):
-        tourism_data = pd.read_excel('Туризм/Турпоток.xlsx')
-        tourism_data['Год'] = tourism_data['Год'].astype(str)
-        tourism_data['growth_rate'] = tourism_data['Количество туристов, тыс. чел.'].pct_change() * 100
-        data_files_status["Туризм"] = True
-        print("Данные о туризме успешно загружены.")
-    
-    if os.path.exists('Экология/Уровень воды.xlsx'):
-        water_level_data = pd.read_excel('Экология/Уровень воды.xlsx')
-        data_files_status["Уровень воды"] = True
-        print("Данные об уровне воды успешно загружены.")
-    
-    if os.path.exists('Леса и животные/Вылов рыбы.xlsx'):
-        fish_catch_data = pd.read_excel('Леса и животные/Вылов рыбы.xlsx')
-        data_files_status["Вылов рыбы"] = True
-        print("Данные о вылове рыбы успешно загружены.")
-    
-    if os.path.exists('Экология/Атмосфера') and os.path.exists('Экология/Атмосфера/PM2,5.csv'):
-        try:
-            air_pm25 = pd.read_csv('Экология/Атмосфера/PM2,5.csv', delimiter=';')
-            
-            # Пробуем разные форматы дат
-            try:
-                # Сначала пытаемся с явным указанием формата DD.MM.YYYY
-                air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], format="%d.%m.%Y %H:%M:%S", errors='coerce')
-            except Exception:
-                try:
-                    # Затем пробуем автоопределение с dayfirst=True
-                    air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], dayfirst=True, errors='coerce')
-                except Exception:
-                    # В крайнем случае используем mixed формат
-                    air_pm25['date'] = pd.to_datetime(air_pm25['Дата/время'], format='mixed', dayfirst=True, errors='coerce')
-            
-            # Отбрасываем строки с недопустимыми датами
-            air_pm25 = air_pm25.dropna(subset=['date'])
-            
-            if not air_pm25.empty:
-                air_pm25['month'] = air_pm25['date'].dt.month
-                air_pm25['year'] = air_pm25['date'].dt.year
-                air_quality_data = air_pm25.groupby(['year', 'month'])['Значение'].mean().reset_index()
-                air_quality_data['date'] = pd.to_datetime(air_quality_data[['year', 'month']].assign(day=1))
-                data_files_status["Качество воздуха"] = True
-                print("Данные о качестве воздуха успешно загружены.")
-        except Exception as e:
-            print(f"Ошибка при загрузке данных качества воздуха: {e}")
-    
-    # Данные успешно загружены (хотя бы частично)
-    print("Статус загрузки данных:")
-    for key, value in data_files_status.items():
-        print(f"  {key}: {'Успешно' if value else 'Ошибка'}")
-    
-except Exception as e:
-    print(f"Общая ошибка загрузки данных: {e}")
-
 # Создание приложения
 app = dash.Dash(__name__, 
                 external_stylesheets=[dbc.themes.JOURNAL],
@@ -112,6 +45,9 @@ app = dash.Dash(__name__,
 )
 server = app.server
 
+# Изменившиеся файлы данных перечитываются в фоне без перезапуска сервера
+datasets.watch()
+
 # Load figure template for consistent styling
 load_figure_template("journal")
 
@@ -373,10 +309,10 @@ def render_ecology_tab():
     )
     
     # График уровня воды
-    if data_files_status["Уровень воды"]:
+    if datasets.available('water_level'):
         try:
             water_fig = px.line(
-                water_level_data, 
+                datasets.get('water_level'), 
                 x='Год', 
                 y='Уровень, см', 
                 title='Динамика изменения уровня воды в озере Байкал',
@@ -410,10 +346,10 @@ def render_ecology_tab():
         water_fig = create_placeholder_figure("Данные об уровне воды недоступны")
     
     # График вылова рыбы
-    if data_files_status["Вылов рыбы"]:
+    if datasets.available('fish_catch'):
         try:
             fish_fig = px.bar(
-                fish_catch_data,
+                datasets.get('fish_catch'),
                 x='Год',
                 y='Вылов, тонн',
                 color='Вид',
@@ -480,10 +416,10 @@ def render_ecology_tab():
     )
     
     # График качества воздуха
-    if data_files_status["Качество воздуха"]:
+    if datasets.available('air_quality'):
         try:
             air_fig = px.line(
-                air_quality_data,
+                datasets.get('air_quality'),
                 x='date',
                 y='Значение',
                 title='Среднемесячная концентрация PM2.5 в атмосфере',
@@ -573,7 +509,7 @@ def render_tourism_tab():
         ])
     )
     
-    if not data_files_status["Туризм"]:
+    if not datasets.available('tourism'):
         panels.append(
             dbc.Row([
                 dbc.Col([
@@ -587,6 +523,8 @@ def render_tourism_tab():
         )
     else:
         try:
+            tourism_data = datasets.get('tourism')
+            
             # График туристического потока
             tourism_fig = px.bar(
                 tourism_data,
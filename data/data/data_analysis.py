@@ -12,18 +12,16 @@ try:
     import plotly.express as px
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
+    import datasets
+    from datasets import depends_on
     BASIC_DEPENDENCIES_AVAILABLE = True
 except ImportError as e:
     print(f"Ошибка импорта базовых зависимостей в data_analysis.py: {e}")
     BASIC_DEPENDENCIES_AVAILABLE = False
 
-# Проверка доступности geopandas для геоданных
-try:
-    import geopandas as gpd
-    GEODATA_DEPENDENCIES_AVAILABLE = True
-except ImportError as e:
-    print(f"Ошибка импорта geopandas в data_analysis.py: {e}")
-    GEODATA_DEPENDENCIES_AVAILABLE = False
+    # Без реестра данных графики не кэшируются (функции ниже вернут заглушки)
+    def depends_on(*names):
+        return lambda func: func
 
 # Проверка доступности scikit-learn для моделей прогнозирования
 try:
@@ -48,185 +46,63 @@ def create_placeholder_figure(title="Данные недоступны"):
     fig.update_layout(height=400)
     return fig
 
-def load_and_prepare_tourism_data(filepath='Туризм/Турпоток.xlsx'):
+def load_and_prepare_tourism_data(filepath=None):
     """
     Load and prepare tourism data for visualization.
     
     Returns:
-        DataFrame: Prepared tourism data
+        DataFrame: Prepared tourism data (shared, see datasets.py)
     """
-    if not BASIC_DEPENDENCIES_AVAILABLE:
-        print("Не установлены необходимые библиотеки для загрузки данных туризма")
-        return pd.DataFrame() if 'pd' in globals() else None
-        
-    try:
-        if not os.path.exists(filepath):
-            print(f"Файл данных туризма не найден: {filepath}")
-            return pd.DataFrame()
-            
-        df = pd.read_excel(filepath)
-        df['Год'] = df['Год'].astype(str)
-        
-        # Calculate year-over-year growth rate
-        df['growth_rate'] = df['Количество туристов, тыс. чел.'].pct_change() * 100
-        
-        return df
-    except Exception as e:
-        print(f"Ошибка загрузки данных туризма: {e}")
-        traceback.print_exc()
-        return pd.DataFrame()
+    return datasets.get('tourism', filepath)
 
-def load_and_prepare_water_data(filepath='Экология/Уровень воды.xlsx'):
+def load_and_prepare_water_data(filepath=None):
     """
     Load and prepare water level data for visualization.
     
     Returns:
-        DataFrame: Prepared water level data
+        DataFrame: Prepared water level data (shared, see datasets.py)
     """
-    if not BASIC_DEPENDENCIES_AVAILABLE:
-        print("Не установлены необходимые библиотеки для загрузки данных об уровне воды")
-        return pd.DataFrame() if 'pd' in globals() else None
-        
-    try:
-        if not os.path.exists(filepath):
-            print(f"Файл данных об уровне воды не найден: {filepath}")
-            return pd.DataFrame()
-            
-        df = pd.read_excel(filepath)
-        return df
-    except Exception as e:
-        print(f"Ошибка загрузки данных об уровне воды: {e}")
-        traceback.print_exc()
-        return pd.DataFrame()
+    return datasets.get('water_level', filepath)
 
-def load_and_prepare_fish_data(filepath='Леса и животные/Вылов рыбы.xlsx'):
+def load_and_prepare_fish_data(filepath=None):
     """
     Load and prepare fish catch data for visualization.
     
     Returns:
-        DataFrame: Prepared fish catch data
+        DataFrame: Prepared fish catch data (shared, see datasets.py)
     """
-    if not BASIC_DEPENDENCIES_AVAILABLE:
-        print("Не установлены необходимые библиотеки для загрузки данных о вылове рыбы")
-        return pd.DataFrame() if 'pd' in globals() else None
-        
-    try:
-        if not os.path.exists(filepath):
-            print(f"Файл данных о вылове рыбы не найден: {filepath}")
-            return pd.DataFrame()
-            
-        df = pd.read_excel(filepath)
-        return df
-    except Exception as e:
-        print(f"Ошибка загрузки данных о вылове рыбы: {e}")
-        traceback.print_exc()
-        return pd.DataFrame()
+    return datasets.get('fish_catch', filepath)
 
-def load_and_prepare_air_quality_data():
+def load_and_prepare_air_quality_data(filepath=None):
     """
-    Загружает и подготавливает данные о качестве воздуха с корректной обработкой дат
+    Загружает данные о качестве воздуха, усредненные по месяцам (общие, см. datasets.py)
     """
-    filepath = 'Экология/Атмосфера/PM2,5.csv'
-    
-    if not os.path.exists(filepath):
-        print(f"Файл {filepath} не найден")
-        return pd.DataFrame()
-    
-    try:
-        # Загружаем данные с указанием разделителя
-        df = pd.read_csv(filepath, delimiter=';')
-        
-        # Пробуем разные форматы дат с обработкой ошибок
-        try:
-            # Сначала пытаемся с русским форматом DD.MM.YYYY
-            df['date'] = pd.to_datetime(df['Дата/время'], format="%d.%m.%Y %H:%M:%S", errors='coerce')
-        except Exception:
-            try:
-                # Затем пробуем автоопределение с dayfirst=True
-                df['date'] = pd.to_datetime(df['Дата/время'], dayfirst=True, errors='coerce')
-            except Exception:
-                # В крайнем случае используем mixed формат
-                df['date'] = pd.to_datetime(df['Дата/время'], format='mixed', dayfirst=True, errors='coerce')
-        
-        # Отбрасываем строки с недопустимыми датами
-        df = df.dropna(subset=['date'])
-        
-        if df.empty:
-            print("После обработки дат все строки признаны недопустимыми")
-            return pd.DataFrame()
-        
-        # Группируем по месяцам
-        df['month'] = df['date'].dt.month
-        df['year'] = df['date'].dt.year
-        
-        # Агрегируем по месяцам и годам
-        monthly_data = df.groupby(['year', 'month'])['Значение'].mean().reset_index()
-        monthly_data['date'] = pd.to_datetime(monthly_data[['year', 'month']].assign(day=1))
-        
-        return monthly_data
-    
-    except Exception as e:
-        print(f"Ошибка при загрузке данных качества воздуха: {e}")
-        return pd.DataFrame()
+    return datasets.get('air_quality', filepath)
 
-def load_and_prepare_earthquake_data(filepath='Землетрясения/earthquakes_BR_1923-2023.geojson'):
+def load_and_prepare_earthquake_data(filepath=None):
     """
     Load and prepare earthquake data for visualization.
     
     Returns:
-        GeoDataFrame: Prepared earthquake data
+        GeoDataFrame: Prepared earthquake data (shared, see datasets.py)
     """
-    if not GEODATA_DEPENDENCIES_AVAILABLE:
-        print("Не установлены необходимые библиотеки для загрузки данных о землетрясениях")
-        return None
-        
-    try:
-        if not os.path.exists(filepath):
-            print(f"Файл данных о землетрясениях не найден: {filepath}")
-            return None
-            
-        gdf = gpd.read_file(filepath)
-        gdf['year'] = pd.to_datetime(gdf['date']).dt.year
-        gdf['decade'] = (gdf['year'] // 10) * 10
-        
-        return gdf
-    except Exception as e:
-        print(f"Ошибка загрузки данных о землетрясениях: {e}")
-        traceback.print_exc()
-        return None
+    return datasets.get('earthquakes', filepath)
 
-def load_and_prepare_fire_data(filepath='Пожары/fires_BR_2011-2021.geojson', sample_size=1000):
+def load_and_prepare_fire_data(filepath=None):
     """
-    Load and prepare fire data for visualization.
+    Load and prepare fire data for visualization
+    (first datasets.FIRE_SAMPLE_SIZE rows to avoid memory issues).
     
-    Args:
-        filepath (str): Path to the fire data file
-        sample_size (int): Number of rows to sample to avoid memory issues
-        
     Returns:
-        GeoDataFrame: Prepared fire data
+        GeoDataFrame: Prepared fire data (shared, see datasets.py)
     """
-    if not GEODATA_DEPENDENCIES_AVAILABLE:
-        print("Не установлены необходимые библиотеки для загрузки данных о пожарах")
-        return None
-        
-    try:
-        if not os.path.exists(filepath):
-            print(f"Файл данных о пожарах не найден: {filepath}")
-            return None
-            
-        gdf = gpd.read_file(filepath, rows=sample_size)
-        gdf['year'] = pd.to_datetime(gdf['date']).dt.year
-        
-        return gdf
-    except Exception as e:
-        print(f"Ошибка загрузки данных о пожарах: {e}")
-        traceback.print_exc()
-        return None
+    return datasets.get('fires', filepath)
 
+@depends_on('water_level', 'fish_catch')
 def create_combined_ecological_trends():
     """
     Create a combined visualization of multiple ecological trends.
+    The figure is rebuilt only after the water level or fish catch data is reloaded.
     
     Returns:
         Figure: Plotly figure with combined ecological trends
@@ -236,16 +112,13 @@ def create_combined_ecological_trends():
         
     try:
         # Проверка наличия файлов данных
-        if not os.path.exists('Экология/Уровень воды.xlsx') or not os.path.exists('Леса и животные/Вылов рыбы.xlsx'):
-            missing_files = []
-            if not os.path.exists('Экология/Уровень воды.xlsx'):
-                missing_files.append('Экология/Уровень воды.xlsx')
-            if not os.path.exists('Леса и животные/Вылов рыбы.xlsx'):
-                missing_files.append('Леса и животные/Вылов рыбы.xlsx')
+        missing_files = [datasets.DATASETS[name].path for name in ('water_level', 'fish_catch')
+                         if not os.path.exists(datasets.DATASETS[name].path)]
+        if missing_files:
             return create_placeholder_figure(f"Отсутствуют файлы: {', '.join(missing_files)}")
         
-        water_data = load_and_prepare_water_data()
-        fish_data = load_and_prepare_fish_data()
+        water_data = datasets.get('water_level')
+        fish_data = datasets.get('fish_catch')
         
         if water_data.empty or fish_data.empty:
             return create_placeholder_figure("Данные об уровне воды или вылове рыбы недоступны")
@@ -300,9 +173,11 @@ def create_combined_ecological_trends():
         traceback.print_exc()
         return create_placeholder_figure(f"Ошибка при обработке данных: {str(e)}")
 
+@depends_on('tourism')
 def create_tourism_forecast():
     """
     Create a tourism forecast visualization based on historical data.
+    The figure is rebuilt only after the tourism data is reloaded.
     
     Returns:
         Figure: Plotly figure with tourism forecast
@@ -315,14 +190,15 @@ def create_tourism_forecast():
         
     try:
         # Проверка наличия файла данных
-        if not os.path.exists('Туризм/Турпоток.xlsx'):
+        if not os.path.exists(datasets.DATASETS['tourism'].path):
             return create_placeholder_figure("Отсутствует файл данных о туризме")
         
-        tourism_data = load_and_prepare_tourism_data()
-        
-        if tourism_data.empty:
+        if not datasets.available('tourism'):
             return create_placeholder_figure("Данные о туризме недоступны или пусты")
         
+        # Копия: таблица из реестра общая, а ниже к ней добавляются столбцы
+        tourism_data = datasets.get('tourism').copy()
+        
         # Convert year to numeric for regression
         tourism_data['Year_num'] = tourism_data['Год'].astype(int)
         
@@ -0,0 +1,411 @@
+"""
+Общий реестр наборов данных дашборда.
+
+Каждый набор (туризм, уровень воды, вылов рыбы, качество воздуха,
+землетрясения, пожары, географические слои) объявлен здесь один раз:
+файл и функция чтения с подготовкой столбцов. Файл читается лениво - при
+первом обращении get() - и дальше таблица берется из памяти процесса,
+поэтому app.py, app_simple.py и функции data_analysis.py работают с одними
+и теми же данными, и ни один файл не разбирается дважды.
+
+Таблицы общие для всех потребителей: изменять их на месте нельзя, для
+дополнительных столбцов нужна копия (df.copy()).
+
+Разбор Excel (XML через openpyxl) - самая медленная часть запуска,
+поэтому прочитанная таблица сохраняется в бинарный столбцовый формат
+Feather (Arrow) в CACHE_DIR. Ключ кэша - путь, время изменения и размер
+исходного файла: при следующем запуске, если файл не менялся, таблица с
+типами столбцов отображается в память из .feather без разбора. Без
+pyarrow кэш отключается и файлы читаются как раньше.
+
+Данные можно обновлять без перезапуска сервера: watch() запускает
+DatasetWatcher, который следит за файлами загруженных наборов и при
+изменении перечитывает в фоне только изменившийся набор, подменяя его
+целиком (reload). Фигуры и агрегаты, построенные по наборам, кэшируются
+декоратором depends_on и пересчитываются только после перезагрузки
+своих наборов.
+
+Пример:
+    import datasets
+    tourism_data = datasets.get('tourism')
+    if datasets.available('earthquakes'):
+        ...
+"""
+import functools
+import hashlib
+import os
+import threading
+import traceback
+
+import pandas as pd
+
+import air_quality
+
+# geopandas нужен только для геоданных (землетрясения, пожары, контуры)
+try:
+    import geopandas as gpd
+    GEODATA_AVAILABLE = True
+except ImportError:
+    GEODATA_AVAILABLE = False
+
+# Кэш разобранных Excel в формате Feather (опционально, нужен pyarrow)
+try:
+    import pyarrow.feather as feather
+    FEATHER_AVAILABLE = True
+except ImportError:
+    FEATHER_AVAILABLE = False
+
+CACHE_DIR = '.cache'
+# Меняется при изменении формата кэша или чтения исходных файлов - старые файлы кэша не используются
+CACHE_VERSION = 1
+
+# Сколько пожаров читается из GeoJSON (полный файл слишком велик для дашборда)
+FIRE_SAMPLE_SIZE = 1000
+
+
+def _cache_path(path, options):
+    """Файл кэша для path: префикс - от пути, остаток - от mtime, размера и параметров чтения"""
+    stat = os.stat(path)
+    source = os.path.abspath(path)
+    prefix = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    key = repr((source, stat.st_mtime_ns, stat.st_size, sorted(options.items()), CACHE_VERSION))
+    return os.path.join(CACHE_DIR, f"{prefix}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.feather"), prefix
+
+
+def _remove_stale(prefix, keep):
+    """Удаляет кэш прежних версий того же исходного файла"""
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith(prefix + '-') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def read_cached(path, parse, **options):
+    """
+    parse(path, **options) с кэшем в Feather: если исходный файл не менялся,
+    таблица читается из кэша (memory map), иначе разбирается и сохраняется.
+    Таблицы, которые Arrow не может сохранить (например, столбцы со смешанными
+    типами), просто не кэшируются.
+    """
+    if not FEATHER_AVAILABLE:
+        return parse(path, **options)
+    cache_path, prefix = _cache_path(path, options)
+    if os.path.exists(cache_path):
+        try:
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+        except Exception as e:
+            print(f"Кэш {cache_path} не прочитан, файл {path} будет разобран заново: {e}")
+    df = parse(path, **options)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        # Без сжатия: несжатый файл отображается в память без распаковки
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, cache_path)
+        _remove_stale(prefix, cache_path)
+    except Exception as e:
+        print(f"Не удалось сохранить кэш для {path}: {e}")
+    return df
+
+
+def read_table(path):
+    """Excel-таблица без дополнительной подготовки"""
+    return read_cached(path, pd.read_excel)
+
+
+def read_tourism(path):
+    """Турпоток: год строкой и темп роста к предыдущему году, %"""
+    df = read_cached(path, pd.read_excel)
+    df['Год'] = df['Год'].astype(str)
+    df['growth_rate'] = df['Количество туристов, тыс. чел.'].pct_change() * 100
+    return df
+
+
+def read_air_quality(path):
+    """
+    Показания PM2.5, усредненные по месяцам. CSV читается по частям
+    (air_quality.py), при перезагрузке дочитываются только новые строки.
+    """
+    return air_quality.load_monthly(path)
+
+
+def read_air_quality_store(path):
+    """
+    Хранилище показаний станций (air_quality.AirQualityStore) в папке path;
+    новые и изменившиеся CSV загружаются в него при чтении
+    """
+    return air_quality.open_store(path)
+
+
+def read_geojson(path):
+    return gpd.read_file(path)
+
+
+def read_earthquakes(path):
+    """Землетрясения с годом и десятилетием"""
+    gdf = gpd.read_file(path)
+    gdf['year'] = pd.to_datetime(gdf['date']).dt.year
+    gdf['decade'] = (gdf['year'] // 10) * 10
+    return gdf
+
+
+def read_fires(path):
+    """Первые FIRE_SAMPLE_SIZE пожаров с годом"""
+    gdf = gpd.read_file(path, rows=FIRE_SAMPLE_SIZE)
+    gdf['year'] = pd.to_datetime(gdf['date']).dt.year
+    return gdf
+
+
+class Dataset:
+    """Объявление набора данных: название для сообщений, файл и функция чтения"""
+
+    def __init__(self, title, path, reader, geo=False, generator=None):
+        """
+        Args:
+            title: название набора в сообщениях и статусе
+            path: путь к файлу относительно папки дашборда
+            reader: функция path -> DataFrame/GeoDataFrame
+            geo: набор требует geopandas
+            generator: функция generate_test_data, создающая файл, если его нет
+        """
+        self.title = title
+        self.path = path
+        self.reader = reader
+        self.geo = geo
+        self.generator = generator
+
+    def empty(self):
+        """Значение набора, если он недоступен: None для геоданных, иначе пустой DataFrame"""
+        return None if self.geo else pd.DataFrame()
+
+    def load(self, path=None, generate=True):
+        """
+        Читает файл набора; при отсутствии файла или ошибке - empty()
+
+        Args:
+            generate: создать отсутствующий файл генератором тестовых данных
+        """
+        path = path or self.path
+        if self.geo and not GEODATA_AVAILABLE:
+            print(f"Не установлены необходимые библиотеки для загрузки данных: {self.title}")
+            return self.empty()
+        if generate and not os.path.exists(path) and self.generator and path == self.path:
+            print(f"Файл {path} не найден, запуск генерации тестовых данных...")
+            try:
+                import generate_test_data
+                getattr(generate_test_data, self.generator)()
+            except Exception as e:
+                print(f"Ошибка при генерации тестовых данных ({self.title}): {e}")
+        if not os.path.exists(path):
+            print(f"Файл данных не найден: {path}")
+            return self.empty()
+        try:
+            return self.reader(path)
+        except Exception as e:
+            print(f"Ошибка загрузки данных ({self.title}): {e}")
+            traceback.print_exc()
+            return self.empty()
+
+
+DATASETS = {
+    'tourism': Dataset('Туризм', 'Туризм/Турпоток.xlsx', read_tourism),
+    'water_level': Dataset('Уровень воды', 'Экология/Уровень воды.xlsx', read_table),
+    'fish_catch': Dataset('Вылов рыбы', 'Леса и животные/Вылов рыбы.xlsx', read_table),
+    'air_quality': Dataset('Качество воздуха', 'Экология/Атмосфера/PM2,5.csv', read_air_quality),
+    'air_quality_store': Dataset('Станции качества воздуха', 'Экология/Атмосфера', read_air_quality_store),
+    'earthquakes': Dataset('Землетрясения', 'Землетрясения/earthquakes_BR_1923-2023.geojson', read_earthquakes,
+                           geo=True, generator='generate_earthquake_data'),
+    'fires': Dataset('Пожары', 'Пожары/fires_BR_2011-2021.geojson', read_fires,
+                     geo=True, generator='generate_fire_data'),
+    'baikal_region': Dataset('География', 'География/baikal_simply.geojson', read_geojson,
+                             geo=True, generator='generate_geographic_data'),
+    'zapovedniki': Dataset('Заповедники', 'География/zapovedniki.geojson', read_geojson, geo=True),
+    'city_points': Dataset('Города', 'География/city_points.geojson', read_geojson, geo=True),
+}
+
+# Загруженные наборы по (имя, путь) и блокировки загрузки: один набор читается один раз,
+# даже если его одновременно запросили несколько callback-ов, а разные наборы - параллельно
+_loaded = {}
+_loading = {}
+_lock = threading.Lock()
+
+# Состояние файла (mtime, размер) на момент чтения и номер версии набора - растет при каждой перезагрузке
+_stats = {}
+_versions = {}
+
+# Как часто DatasetWatcher проверяет файлы загруженных наборов, секунды
+WATCH_INTERVAL = 2.0
+
+
+def _stat(path):
+    """
+    (mtime, размер) файла или None, если файла нет. Для папки (air_quality_store) -
+    состояние ее CSV-файлов: правка файла внутри папки не меняет mtime самой папки
+    """
+    try:
+        if os.path.isdir(path):
+            return air_quality.source_signature(path)
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get(name, path=None):
+    """
+    Набор данных по имени из DATASETS; читается при первом обращении.
+
+    Args:
+        path: другой файл того же формата (по умолчанию - файл из DATASETS)
+
+    Returns:
+        DataFrame/GeoDataFrame (для air_quality_store - AirQualityStore);
+        при недоступности - пустой DataFrame (None для геоданных)
+    """
+    dataset = DATASETS[name]
+    key = (name, path or dataset.path)
+    data = _loaded.get(key)
+    if data is not None or key in _loaded:
+        return data
+    with _lock:
+        key_lock = _loading.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _loaded:
+            data = dataset.load(path)
+            # Состояние файла - после загрузки: файл мог быть только что создан генератором
+            _stats[key] = _stat(key[1])
+            _loaded[key] = data
+    return _loaded[key]
+
+
+def available(name):
+    """Набор загружен и не пуст"""
+    data = get(name)
+    return data is not None and not data.empty
+
+
+def version(name):
+    """Номер версии набора: меняется при каждой перезагрузке (reload/invalidate)"""
+    return _versions.get(name, 0)
+
+
+def _bump(name):
+    with _lock:
+        _versions[name] = _versions.get(name, 0) + 1
+
+
+def invalidate(name=None):
+    """Забывает загруженный набор (или все), следующий get() прочитает файл заново"""
+    with _lock:
+        for key in list(_loaded):
+            if name is None or key[0] == name:
+                del _loaded[key]
+                _stats.pop(key, None)
+                _versions[key[0]] = _versions.get(key[0], 0) + 1
+
+
+def reload(name, path=None):
+    """
+    Перечитывает набор и подменяет его целиком: до окончания чтения get()
+    возвращает прежние данные. Если новый файл не прочитан (например,
+    записан не до конца), остаются прежние данные.
+
+    Returns:
+        bool: данные заменены
+    """
+    dataset = DATASETS[name]
+    key = (name, path or dataset.path)
+    with _lock:
+        key_lock = _loading.setdefault(key, threading.Lock())
+    with key_lock:
+        stat = _stat(key[1])
+        data = dataset.load(path, generate=False)
+        _stats[key] = stat
+        # Удаленный или непрочитанный файл не затирает уже загруженные данные
+        previous = _loaded.get(key)
+        if (data is None or data.empty) and previous is not None and not previous.empty:
+            print(f"Файл {key[1]} изменен, но не прочитан - используются прежние данные ({dataset.title})")
+            return False
+        _loaded[key] = data
+    _bump(name)
+    print(f"Набор данных перезагружен: {dataset.title}")
+    return True
+
+
+def depends_on(*names):
+    """
+    Декоратор функции без аргументов, строящей фигуру или агрегат по наборам
+    names: результат хранится и пересчитывается только после перезагрузки
+    одного из этих наборов
+    """
+    def decorator(func):
+        state = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper():
+            versions = tuple(version(name) for name in names)
+            with lock:
+                if state.get('versions') != versions:
+                    state['result'] = func()
+                    # Если набор перезагрузили во время расчета, следующий вызов пересчитает результат
+                    state['versions'] = versions
+                return state['result']
+
+        wrapper.invalidate = state.clear
+        return wrapper
+    return decorator
+
+
+class DatasetWatcher(threading.Thread):
+    """
+    Фоновый поток, который раз в interval секунд сверяет mtime и размер
+    файлов уже загруженных наборов (для папки - ее CSV-файлов) и перезагружает изменившиеся через
+    reload(). Изменение учитывается, когда файл не меняется две проверки
+    подряд, чтобы не читать файл, который еще копируется.
+    """
+
+    def __init__(self, interval=WATCH_INTERVAL):
+        super().__init__(name='DatasetWatcher', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.pending = {}
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Ошибка при проверке файлов данных: {e}")
+
+    def check(self):
+        """Одна проверка: перезагружает наборы, файлы которых изменились и больше не меняются"""
+        for key, loaded_stat in list(_stats.items()):
+            stat = _stat(key[1])
+            if stat == loaded_stat:
+                self.pending.pop(key, None)
+            elif self.pending.get(key) == stat:
+                del self.pending[key]
+                name, path = key
+                reload(name, None if path == DATASETS[name].path else path)
+            else:
+                self.pending[key] = stat
+
+    def stop(self):
+        self.stopped.set()
+
+
+_watcher = None
+
+
+def watch(interval=WATCH_INTERVAL):
+    """Запускает DatasetWatcher (один на процесс) и возвращает его"""
+    global _watcher
+    with _lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = DatasetWatcher(interval)
+            _watcher.start()
+        return _watcher